@@ -0,0 +1,44 @@
+from django.contrib import admin
+from django.db.models import Sum
+
+from .models import DailyRollup
+from .rollup import METRICS
+
+
+class DailyRollupAdmin(admin.ModelAdmin):
+    """Дашборд активности; читает только таблицу агрегатов."""
+    change_list_template = 'admin/analytics/dailyrollup/change_list.html'
+    list_display = (
+        'day',
+        'dimension',
+        'label',
+        'posts',
+        'comments',
+        'follows',
+        'active_authors',
+    )
+    list_filter = ('dimension',)
+    search_fields = ('label',)
+    date_hierarchy = 'day'
+    show_full_result_count = False
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['totals'] = changelist.queryset.aggregate(
+                **{metric: Sum(metric) for metric in METRICS}
+            )
+        return response
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(DailyRollup, DailyRollupAdmin)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from analytics import rollup
+
+
+class Command(BaseCommand):
+    help = 'Добавляет новые записи, комментарии и подписки в дневные агрегаты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Сколько строк источника обрабатывать за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Удалить агрегаты и посчитать их заново.',
+        )
+
+    def handle(self, *args, **options):
+        action = rollup.rebuild if options['rebuild'] else rollup.run
+        processed = action(options['batch_size'])
+        for source, count in processed.items():
+            self.stdout.write(f'{source}: {count}')
+        self.stdout.write(self.style.SUCCESS('Агрегаты обновлены.'))
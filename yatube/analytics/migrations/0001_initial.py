@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCursor',
+            fields=[
+                ('source', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('last_id', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('dimension', models.CharField(choices=[('site', 'Весь сайт'), ('group', 'Группа'), ('author', 'Автор')], max_length=10, verbose_name='Разрез')),
+                ('key', models.IntegerField(default=0, verbose_name='id группы или автора')),
+                ('label', models.CharField(blank=True, max_length=200, verbose_name='Название')),
+                ('posts', models.IntegerField(default=0, verbose_name='Записей')),
+                ('comments', models.IntegerField(default=0, verbose_name='Комментариев')),
+                ('follows', models.IntegerField(default=0, verbose_name='Подписок')),
+                ('active_authors', models.IntegerField(default=0, verbose_name='Активных авторов')),
+            ],
+            options={
+                'verbose_name': 'дневной агрегат',
+                'verbose_name_plural': 'дневные агрегаты',
+                'ordering': ('-day', 'dimension', 'key'),
+                'unique_together': {('day', 'dimension', 'key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ActiveAuthor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('dimension', models.CharField(max_length=10, verbose_name='Разрез')),
+                ('key', models.IntegerField(default=0, verbose_name='id группы или автора')),
+                ('author_id', models.IntegerField(verbose_name='id автора')),
+            ],
+            options={
+                'unique_together': {('day', 'dimension', 'key', 'author_id')},
+            },
+        ),
+    ]
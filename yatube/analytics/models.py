@@ -0,0 +1,59 @@
+from django.db import models
+
+
+class DailyRollup(models.Model):
+    """Класс для хранения дневных агрегатов активности."""
+    SITE = 'site'
+    GROUP = 'group'
+    AUTHOR = 'author'
+    DIMENSIONS = (
+        (SITE, 'Весь сайт'),
+        (GROUP, 'Группа'),
+        (AUTHOR, 'Автор'),
+    )
+
+    day = models.DateField(verbose_name='День')
+    dimension = models.CharField(
+        max_length=10,
+        choices=DIMENSIONS,
+        verbose_name='Разрез'
+    )
+    key = models.IntegerField(default=0, verbose_name='id группы или автора')
+    label = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Название'
+    )
+    posts = models.IntegerField(default=0, verbose_name='Записей')
+    comments = models.IntegerField(default=0, verbose_name='Комментариев')
+    follows = models.IntegerField(default=0, verbose_name='Подписок')
+    active_authors = models.IntegerField(
+        default=0,
+        verbose_name='Активных авторов'
+    )
+
+    class Meta:
+        unique_together = ('day', 'dimension', 'key')
+        ordering = ('-day', 'dimension', 'key')
+        verbose_name = 'дневной агрегат'
+        verbose_name_plural = 'дневные агрегаты'
+
+    def __str__(self):
+        return f'{self.day} {self.dimension} {self.label}'
+
+
+class ActiveAuthor(models.Model):
+    """Класс для учёта авторов, уже посчитанных активными в агрегате."""
+    day = models.DateField(verbose_name='День')
+    dimension = models.CharField(max_length=10, verbose_name='Разрез')
+    key = models.IntegerField(default=0, verbose_name='id группы или автора')
+    author_id = models.IntegerField(verbose_name='id автора')
+
+    class Meta:
+        unique_together = ('day', 'dimension', 'key', 'author_id')
+
+
+class RollupCursor(models.Model):
+    """Класс для хранения последнего обработанного id источника."""
+    source = models.CharField(max_length=20, primary_key=True)
+    last_id = models.IntegerField(default=0)
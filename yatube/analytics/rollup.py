@@ -0,0 +1,168 @@
+"""Дневные агрегаты активности для дашборда в админке.
+
+Источники (записи, комментарии, подписки) читаются пачками по
+возрастанию id, начиная с сохранённого курсора. Пачка сворачивается в
+памяти в счётчики по ключу (день, разрез, id) и записывается через
+bulk_create/bulk_update в одной транзакции со сдвигом курсора, поэтому
+прерванный прогон можно повторить без двойного счёта.
+
+У Follow нет даты создания, поэтому подписка относится к дню, в который
+её обработал прогон.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, User
+
+from .models import ActiveAuthor, DailyRollup, RollupCursor
+
+SITE = DailyRollup.SITE
+GROUP = DailyRollup.GROUP
+AUTHOR = DailyRollup.AUTHOR
+METRICS = ('posts', 'comments', 'follows', 'active_authors')
+
+
+def post_rows(after, limit):
+    rows = Post.objects.filter(pk__gt=after).order_by('pk').values_list(
+        'pk', 'pub_date', 'author_id', 'group_id'
+    )[:limit]
+    return [
+        (pk, timezone.localdate(date), author_id, group_id)
+        for pk, date, author_id, group_id in rows
+    ]
+
+
+def comment_rows(after, limit):
+    rows = Comment.objects.filter(pk__gt=after).order_by('pk').values_list(
+        'pk', 'created', 'author_id', 'post__group_id'
+    )[:limit]
+    return [
+        (pk, timezone.localdate(date), author_id, group_id)
+        for pk, date, author_id, group_id in rows
+    ]
+
+
+def follow_rows(after, limit):
+    today = timezone.localdate()
+    rows = Follow.objects.filter(pk__gt=after).order_by('pk').values_list(
+        'pk', 'author_id'
+    )[:limit]
+    return [(pk, today, author_id, None) for pk, author_id in rows]
+
+
+# Источник: (выборка строк, метрика, считать ли автора активным).
+SOURCES = {
+    'posts': (post_rows, 'posts', True),
+    'comments': (comment_rows, 'comments', True),
+    'follows': (follow_rows, 'follows', False),
+}
+
+
+def fold(rows, metric, active):
+    """Сворачивает пачку в приращения метрик и кандидатов в активные."""
+    deltas = defaultdict(Counter)
+    candidates = set()
+    for _, day, author_id, group_id in rows:
+        keys = [(day, SITE, 0), (day, AUTHOR, author_id)]
+        if group_id is not None:
+            keys.append((day, GROUP, group_id))
+        for key in keys:
+            deltas[key][metric] += 1
+            if active:
+                candidates.add(key + (author_id,))
+    return deltas, candidates
+
+
+def add_active_authors(deltas, candidates):
+    """Засчитывает авторов, которых ещё не было в агрегате за день."""
+    if not candidates:
+        return
+    seen = set(ActiveAuthor.objects.filter(
+        day__in={day for day, *_ in candidates},
+        author_id__in={author_id for *_, author_id in candidates},
+    ).values_list('day', 'dimension', 'key', 'author_id'))
+    fresh = candidates - seen
+    ActiveAuthor.objects.bulk_create(
+        ActiveAuthor(day=day, dimension=dimension, key=key, author_id=author)
+        for day, dimension, key, author in fresh
+    )
+    for day, dimension, key, _ in fresh:
+        deltas[day, dimension, key]['active_authors'] += 1
+
+
+def labels(keys):
+    group_ids = {key for _, dimension, key in keys if dimension == GROUP}
+    author_ids = {key for _, dimension, key in keys if dimension == AUTHOR}
+    result = {(SITE, 0): ''}
+    for pk, title in Group.objects.filter(
+        pk__in=group_ids
+    ).values_list('pk', 'title'):
+        result[GROUP, pk] = title
+    for pk, username in User.objects.filter(
+        pk__in=author_ids
+    ).values_list('pk', 'username'):
+        result[AUTHOR, pk] = username
+    return result
+
+
+def apply(deltas):
+    """Прибавляет приращения к агрегатам двумя массовыми запросами."""
+    existing = {
+        (row.day, row.dimension, row.key): row
+        for row in DailyRollup.objects.filter(
+            day__in={day for day, _, _ in deltas},
+            key__in={key for _, _, key in deltas},
+        )
+    }
+    names = labels(deltas.keys() - existing.keys())
+    changed, created = [], []
+    for (day, dimension, key), metrics in deltas.items():
+        row = existing.get((day, dimension, key))
+        if row is None:
+            row = DailyRollup(
+                day=day, dimension=dimension, key=key,
+                label=names.get((dimension, key), ''),
+            )
+            created.append(row)
+        else:
+            changed.append(row)
+        for metric, value in metrics.items():
+            setattr(row, metric, getattr(row, metric) + value)
+    DailyRollup.objects.bulk_update(changed, METRICS)
+    DailyRollup.objects.bulk_create(created)
+
+
+def process(source, batch_size=None):
+    """Обрабатывает новые строки источника; возвращает их число."""
+    fetch, metric, active = SOURCES[source]
+    batch_size = batch_size or settings.ANALYTICS_BATCH_SIZE
+    total = 0
+    while True:
+        with transaction.atomic():
+            cursor, _ = RollupCursor.objects.select_for_update(
+            ).get_or_create(source=source)
+            rows = fetch(cursor.last_id, batch_size)
+            if not rows:
+                return total
+            deltas, candidates = fold(rows, metric, active)
+            add_active_authors(deltas, candidates)
+            apply(deltas)
+            cursor.last_id = rows[-1][0]
+            cursor.save()
+        total += len(rows)
+
+
+def run(batch_size=None):
+    return {source: process(source, batch_size) for source in SOURCES}
+
+
+def rebuild(batch_size=None):
+    """Пересчитывает агрегаты с нуля; все подписки попадут в сегодня."""
+    with transaction.atomic():
+        DailyRollup.objects.all().delete()
+        ActiveAuthor.objects.all().delete()
+        RollupCursor.objects.all().delete()
+    return run(batch_size)
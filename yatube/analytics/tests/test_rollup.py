@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from analytics import rollup
+from analytics.models import DailyRollup
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.reader = User.objects.create_user(username='testReader')
+        cls.group = Group.objects.create(
+            title='Тест-группа', slug='test-slug', description='Тест-описание'
+        )
+        cls.yesterday = timezone.now() - timedelta(days=1)
+        posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Тест-пост {i}', group=cls.group
+            )
+            for i in range(2)
+        ]
+        old = Post.objects.create(author=cls.author, text='Вчерашний пост')
+        Post.objects.filter(pk=old.pk).update(pub_date=cls.yesterday)
+        Comment.objects.create(
+            post=posts[0], author=cls.reader, text='Тест-комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def rollups(self):
+        return {
+            (row.day, row.dimension, row.label): (
+                row.posts, row.comments, row.follows, row.active_authors
+            )
+            for row in DailyRollup.objects.all()
+        }
+
+    def test_rollup_is_incremental(self):
+        """Пачки и повторные прогоны дают те же агрегаты без двойного
+        счёта."""
+        processed = rollup.run(batch_size=1)
+        self.assertEqual(
+            processed, {'posts': 3, 'comments': 1, 'follows': 1}
+        )
+        self.assertEqual(
+            rollup.run(), {'posts': 0, 'comments': 0, 'follows': 0}
+        )
+        today = timezone.localdate()
+        yesterday = timezone.localdate(RollupTests.yesterday)
+        expected = {
+            (today, 'site', ''): (2, 1, 1, 2),
+            (today, 'group', 'Тест-группа'): (2, 1, 0, 2),
+            (today, 'author', 'testAuthor'): (2, 0, 1, 1),
+            (today, 'author', 'testReader'): (0, 1, 0, 1),
+            (yesterday, 'site', ''): (1, 0, 0, 1),
+            (yesterday, 'author', 'testAuthor'): (1, 0, 0, 1),
+        }
+        self.assertEqual(self.rollups(), expected)
+        Post.objects.create(
+            author=RollupTests.author, text='Новый пост', group=self.group
+        )
+        rollup.run()
+        self.assertEqual(self.rollups()[today, 'site', ''], (3, 1, 1, 2))
+        rollup.rebuild()
+        expected[today, 'site', ''] = (3, 1, 1, 2)
+        expected[today, 'group', 'Тест-группа'] = (3, 1, 0, 2)
+        expected[today, 'author', 'testAuthor'] = (3, 0, 1, 1)
+        self.assertEqual(self.rollups(), expected)
+
+    def test_dashboard(self):
+        """Дашборд в админке показывает агрегаты и итоги."""
+        rollup.run()
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:analytics_dailyrollup_changelist'),
+            {'dimension__exact': 'site'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['totals']['posts'], 3)
+        self.assertEqual(response.context['totals']['comments'], 1)
@@ -0,0 +1,82 @@
+"""Сериализация строк values() без создания экземпляров моделей."""
+from django.conf import settings
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+GROUP_FIELDS = {
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+}
+PROFILE_FIELDS = {
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+}
+
+
+class FieldsetError(ValueError):
+    pass
+
+
+def select_fields(field_map, requested):
+    """Возвращает пары (ключ ответа, путь в values()) для ?fields=."""
+    if not requested:
+        return list(field_map.items())
+    names = [name for name in requested.split(',') if name]
+    unknown = set(names) - set(field_map)
+    if unknown:
+        raise FieldsetError(', '.join(sorted(unknown)))
+    return [(name, field_map[name]) for name in names]
+
+
+def media_url(value):
+    return settings.MEDIA_URL + value if value else None
+
+
+CONVERTERS = {
+    'image': media_url,
+}
+
+
+def serialize_rows(rows, fields):
+    """Переименовывает ключи строк values() в ключи ответа."""
+    converters = [
+        (name, path, CONVERTERS.get(name)) for name, path in fields
+    ]
+    return [
+        {
+            name: convert(row[path]) if convert else row[path]
+            for name, path, convert in converters
+        }
+        for row in rows
+    ]
+
+
+def encode_cursor(value, pk):
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return urlsafe_base64_encode(f'{value}|{pk}'.encode())
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор в пару (значение ключа, pk) или возвращает None."""
+    try:
+        value, pk = urlsafe_base64_decode(cursor).decode().rsplit('|', 1)
+        return value, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from api.serializers import encode_cursor
+from posts.models import Comment, Follow, Group, Post, User
+
+POST_LIST_URL = reverse('api:post_list')
+FOLLOW_LIST_URL = reverse('api:follow_list')
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.group = Group.objects.create(
+            title='Тест-группа',
+            slug='test-slug',
+            description='Тест-описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                text=f'Тест-пост {number}',
+                group=cls.group,
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Тест-комментарий'
+        )
+        cls.POST_DETAIL_URL = reverse(
+            'api:post_detail', kwargs={'post_id': cls.posts[0].id}
+        )
+        cls.COMMENT_LIST_URL = reverse(
+            'api:comment_list', kwargs={'post_id': cls.posts[0].id}
+        )
+        cls.PROFILE_URL = reverse(
+            'api:profile_detail', kwargs={'username': cls.author.username}
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_cursor_pagination_walks_all_posts(self):
+        """Курсор проходит по всем записям без повторов."""
+        seen = []
+        url = f'{POST_LIST_URL}?limit=2'
+        while url:
+            data = self.guest_client.get(url).json()
+            seen.extend(post['id'] for post in data['results'])
+            url = data['next'] and (
+                f'{POST_LIST_URL}?limit=2&cursor={data["next"]}'
+            )
+        self.assertEqual(
+            seen, [post.id for post in reversed(ApiViewsTests.posts)]
+        )
+
+    def test_invalid_cursor_value(self):
+        """Курсор с неразбираемым значением ключа - ошибка 400."""
+        for url, value in (
+            (POST_LIST_URL, 'garbage'),
+            (reverse('api:group_list'), 'x'),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, {'cursor': encode_cursor(value, 1)}
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
+    def test_sparse_fieldset(self):
+        """?fields= ограничивает набор полей."""
+        data = self.guest_client.get(
+            ApiViewsTests.POST_DETAIL_URL, {'fields': 'id,author'}
+        ).json()
+        self.assertEqual(
+            data, {'id': ApiViewsTests.posts[0].id, 'author': 'testAuthor'}
+        )
+        response = self.guest_client.get(POST_LIST_URL, {'fields': 'x'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_batch_fetch_single_query(self):
+        """?ids= отдаёт записи одним запросом в порядке запроса."""
+        ids = [ApiViewsTests.posts[2].id, ApiViewsTests.posts[0].id, 0]
+        with self.assertNumQueries(1):
+            data = self.guest_client.get(
+                POST_LIST_URL, {'ids': ','.join(map(str, ids))}
+            ).json()
+        self.assertEqual([post['id'] for post in data['results']], ids[:2])
+
+    def test_comments_profile_and_group(self):
+        """Комментарии, профиль и группа доступны через API."""
+        comments = self.guest_client.get(
+            ApiViewsTests.COMMENT_LIST_URL
+        ).json()
+        self.assertEqual(comments['results'][0]['text'], 'Тест-комментарий')
+        profile = self.guest_client.get(ApiViewsTests.PROFILE_URL).json()
+        self.assertEqual(profile['posts_count'], 5)
+        group = self.guest_client.get(
+            reverse('api:group_detail', kwargs={'slug': 'test-slug'})
+        ).json()
+        self.assertEqual(group['title'], 'Тест-группа')
+
+    def test_follow_feed(self):
+        """Лента подписок требует авторизации."""
+        response = self.guest_client.get(FOLLOW_LIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        user = User.objects.create_user(username='testFollower')
+        Follow.objects.create(user=user, author=ApiViewsTests.author)
+        client = Client()
+        client.force_login(user)
+        data = client.get(FOLLOW_LIST_URL).json()
+        self.assertEqual(len(data['results']), 5)
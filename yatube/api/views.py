@@ -0,0 +1,209 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from posts.models import Comment, Group, Post, User
+from .serializers import (
+    COMMENT_FIELDS, GROUP_FIELDS, POST_FIELDS, PROFILE_FIELDS,
+    FieldsetError, decode_cursor, encode_cursor, select_fields,
+    serialize_rows,
+)
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def json_response(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+    )
+
+
+def api_view(view):
+    """Разрешает только GET и превращает ApiError в JSON-ответ."""
+    @require_GET
+    def wrapper(request, *args, **kwargs):
+        try:
+            return json_response(view(request, *args, **kwargs))
+        except ApiError as error:
+            return json_response({'detail': error.detail}, error.status)
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+
+def get_fields(request, field_map):
+    try:
+        return select_fields(field_map, request.GET.get('fields'))
+    except FieldsetError as error:
+        raise ApiError(f'Неизвестные поля: {error}')
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.NUMBER_ROWS))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def keyset_page(request, queryset, field_map, key, descending=False):
+    """Страница по курсору (key, pk) без OFFSET и COUNT(*)."""
+    fields = get_fields(request, field_map)
+    limit = get_limit(request)
+    direction = '-' if descending else ''
+    queryset = queryset.order_by(direction + key, direction + 'pk')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise ApiError('Некорректный курсор')
+        value, pk = position
+        meta = queryset.model._meta
+        field = meta.pk if key == 'pk' else meta.get_field(key)
+        try:
+            value = field.to_python(value)
+        except ValidationError:
+            raise ApiError('Некорректный курсор')
+        lookup = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{key}__{lookup}': value})
+            | Q(**{key: value, f'pk__{lookup}': pk})
+        )
+    paths = {path for _, path in fields} | {key, 'pk'}
+    rows = list(queryset.values(*paths)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][key], rows[-1]['pk'])
+    return {
+        'results': serialize_rows(rows, fields),
+        'next': next_cursor,
+    }
+
+
+def parse_ids(raw):
+    try:
+        ids = [int(pk) for pk in raw.split(',') if pk]
+    except ValueError:
+        raise ApiError('ids должен быть списком чисел через запятую')
+    if len(ids) > settings.API_BATCH_SIZE:
+        raise ApiError(
+            f'Не больше {settings.API_BATCH_SIZE} записей за запрос'
+        )
+    return ids
+
+
+def posts_batch(request, ids):
+    """Все запрошенные записи одним запросом, в порядке ids."""
+    fields = get_fields(request, POST_FIELDS)
+    paths = {path for _, path in fields} | {'id'}
+    rows = {
+        row['id']: row
+        for row in Post.objects.visible().filter(pk__in=ids).values(
+            *paths
+        )
+    }
+    found = [rows[pk] for pk in dict.fromkeys(ids) if pk in rows]
+    return {'results': serialize_rows(found, fields)}
+
+
+def get_row(queryset, fields, detail):
+    row = queryset.values(*{path for _, path in fields}).first()
+    if row is None:
+        raise ApiError(detail, HTTPStatus.NOT_FOUND)
+    return serialize_rows([row], fields)[0]
+
+
+@api_view
+def post_list(request):
+    """Лента записей: общая, группы (?group=) или автора (?author=)."""
+    if 'ids' in request.GET:
+        return posts_batch(request, parse_ids(request.GET['ids']))
+    queryset = Post.objects.visible()
+    if 'group' in request.GET:
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return keyset_page(
+        request, queryset, POST_FIELDS, 'pub_date', descending=True
+    )
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = get_fields(request, POST_FIELDS)
+    return get_row(
+        Post.objects.visible().filter(pk=post_id), fields,
+        'Запись не найдена'
+    )
+
+
+@api_view
+def comment_list(request, post_id):
+    if not Post.objects.visible().filter(pk=post_id).exists():
+        raise ApiError('Запись не найдена', HTTPStatus.NOT_FOUND)
+    return keyset_page(
+        request,
+        Comment.objects.visible().filter(post_id=post_id),
+        COMMENT_FIELDS,
+        'created',
+    )
+
+
+@api_view
+def follow_list(request):
+    """Лента подписок текущего пользователя."""
+    if not request.user.is_authenticated:
+        raise ApiError('Требуется авторизация', HTTPStatus.UNAUTHORIZED)
+    return keyset_page(
+        request,
+        Post.objects.visible().filter(
+            author__following__user=request.user
+        ),
+        POST_FIELDS,
+        'pub_date',
+        descending=True,
+    )
+
+
+@api_view
+def group_list(request):
+    return keyset_page(
+        request, Group.objects.filter(hidden=False), GROUP_FIELDS, 'pk'
+    )
+
+
+@api_view
+def group_detail(request, slug):
+    fields = get_fields(request, GROUP_FIELDS)
+    return get_row(
+        Group.objects.filter(slug=slug, hidden=False), fields,
+        'Группа не найдена'
+    )
+
+
+@api_view
+def profile_detail(request, username):
+    fields = get_fields(
+        request,
+        dict(PROFILE_FIELDS, posts_count='posts_count',
+             last_post='last_post'),
+    )
+    queryset = User.objects.filter(
+        username=username, is_active=True
+    ).annotate(
+        posts_count=Count('posts'),
+        last_post=Max('posts__pub_date'),
+    )
+    return get_row(queryset, fields, 'Пользователь не найден')
@@ -0,0 +1,116 @@
+from django.contrib import admin
+
+from . import bulk
+from .models import BulkAction, Deletion, Job, Metric, OutboxMessage
+
+
+class BulkActionAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'progress',
+        'user',
+        'created',
+        'updated',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = (
+        'name', 'params', 'total', 'processed', 'last_id', 'status',
+        'error', 'user', 'created', 'updated',
+    )
+    exclude = ('ids',)
+    actions = ('resume',)
+
+    def resume(self, request, queryset):
+        count = bulk.resume(queryset)
+        self.message_user(request, f'Возвращено в очередь: {count}.')
+    resume.short_description = 'Продолжить остановленные действия'
+
+    def has_add_permission(self, request):
+        return False
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'task',
+        'queue',
+        'priority',
+        'status',
+        'attempts',
+        'run_at',
+        'finished',
+    )
+    list_filter = ('status', 'queue', 'task')
+    readonly_fields = (
+        'task', 'payload', 'queue', 'priority', 'status', 'key', 'attempts',
+        'max_attempts', 'run_at', 'locked_by', 'locked_at', 'error',
+        'created', 'finished',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+class DeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'model',
+        'label',
+        'status',
+        'step',
+        'progress',
+        'user',
+        'created',
+        'updated',
+    )
+    list_filter = ('status', 'model')
+    readonly_fields = (
+        'model', 'object_id', 'label', 'status', 'step', 'total',
+        'processed', 'error', 'user', 'created', 'updated',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'status',
+        'attempts',
+        'created',
+        'sent',
+    )
+    list_filter = ('status',)
+    search_fields = ('recipients',)
+    exclude = ('payload',)
+    readonly_fields = (
+        'recipients', 'subject', 'status', 'attempts', 'next_attempt',
+        'locked_at', 'error', 'created', 'sent',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+class MetricAdmin(admin.ModelAdmin):
+    """Счётчики инструментирования: сжатие, лимиты и шлюз записей."""
+    list_display = ('name', 'value', 'updated')
+    search_fields = ('name',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(BulkAction, BulkActionAdmin)
+admin.site.register(Deletion, DeletionAdmin)
+admin.site.register(Job, JobAdmin)
+admin.site.register(Metric, MetricAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
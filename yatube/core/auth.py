@@ -0,0 +1,72 @@
+"""Пользователь запроса из кэша.
+
+AuthenticationMiddleware на каждом запросе достаёт пользователя по id из
+сессии. Бэкенд держит объект пользователя в локальном кэше процесса
+вместе с токеном версии, а сам токен живёт в общем для всех процессов
+кэше SESSION_CACHE_ALIAS. Сохранение и удаление User (смена пароля,
+блокировка, last_login при входе) выписывают новый токен сразу и ещё раз
+после коммита, поэтому копия в любом процессе перестаёт совпадать и
+пользователь перечитывается из базы с актуальным хэшем пароля.
+
+queryset.update() сигналов не посылает: после такого изменения
+пользователей вызывайте forget() для их id.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+USER_KEY = 'auth-user:{}'
+VERSION_KEY = 'auth-user-version:{}'
+
+User = get_user_model()
+
+
+def shared_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def current_version(user_id):
+    """Токен версии пользователя; потерянный кэшем выписывается заново,
+    и все старые копии становятся недействительны."""
+    key = VERSION_KEY.format(user_id)
+    version = shared_cache().get(key)
+    if version is None:
+        shared_cache().add(key, uuid.uuid4().hex, None)
+        version = shared_cache().get(key)
+    return version
+
+
+def forget(user_id):
+    shared_cache().set(VERSION_KEY.format(user_id), uuid.uuid4().hex, None)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        # Токен читаем до базы: изменение, закоммиченное после чтения,
+        # выпишет новый токен, и копия не доживёт до следующего запроса.
+        version = current_version(user_id)
+        cached = cache.get(key)
+        if cached is not None and cached[0] == version:
+            user = cached[1]
+        else:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(
+                key, (version, user), settings.AUTH_USER_CACHE_TIMEOUT
+            )
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    forget(instance.pk)
+    transaction.on_commit(lambda: forget(instance.pk))
@@ -0,0 +1,117 @@
+"""Массовые действия админки, которые выполняются в фоне пачками.
+
+Действие сохраняется как BulkAction со списком id, ставится в очередь
+фоновых задач и сразу возвращает управление запросу. Задача
+обрабатывает id по возрастанию пачками
+по BULK_CHUNK_SIZE; каждая пачка выполняется в своей транзакции вместе
+с отметкой прогресса, поэтому прерванное действие продолжается с места
+остановки, а база не блокируется надолго.
+"""
+import json
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import jobs
+from .models import BulkAction
+
+HANDLERS = {}
+
+
+def register(name):
+    """Регистрирует обработчик пачки: handler(ids, **params)."""
+    def decorator(handler):
+        HANDLERS[name] = handler
+        return handler
+    return decorator
+
+
+def enqueue(name, queryset, user=None, **params):
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    action = BulkAction.objects.create(
+        name=name,
+        ids=json.dumps(ids),
+        params=json.dumps(params),
+        total=len(ids),
+        user=user,
+    )
+    jobs.enqueue('core.run_bulk_action', action.pk)
+    return action
+
+
+def resume(queryset):
+    """Возвращает остановленные с ошибкой действия в очередь."""
+    action_ids = list(
+        queryset.filter(status=BulkAction.FAILED).values_list('pk', flat=True)
+    )
+    BulkAction.objects.filter(pk__in=action_ids).update(
+        status=BulkAction.PENDING, error=''
+    )
+    for action_id in action_ids:
+        jobs.enqueue('core.run_bulk_action', action_id)
+    return len(action_ids)
+
+
+def claim(action_id):
+    """Забирает действие себе, если его никто не выполняет.
+
+    Действие, которое не отмечало прогресс дольше BULK_STALE_AFTER,
+    считается брошенным упавшим исполнителем.
+    """
+    stale = timezone.now() - settings.BULK_STALE_AFTER
+    return BulkAction.objects.filter(pk=action_id).filter(
+        Q(status=BulkAction.PENDING)
+        | Q(status=BulkAction.RUNNING, updated__lt=stale)
+    ).update(status=BulkAction.RUNNING, updated=timezone.now()) == 1
+
+
+def run(action, chunk_size=None):
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    handler = HANDLERS[action.name]
+    params = json.loads(action.params)
+    ids = [pk for pk in json.loads(action.ids) if pk > action.last_id]
+    actions = BulkAction.objects.filter(pk=action.pk)
+    for start_index in range(0, len(ids), chunk_size):
+        chunk = ids[start_index:start_index + chunk_size]
+        try:
+            with transaction.atomic():
+                handler(chunk, **params)
+                actions.update(
+                    processed=F('processed') + len(chunk),
+                    last_id=chunk[-1],
+                    updated=timezone.now(),
+                )
+        except Exception:
+            actions.update(
+                status=BulkAction.FAILED, error=traceback.format_exc()
+            )
+            return False
+    actions.update(status=BulkAction.DONE, updated=timezone.now())
+    return True
+
+
+def run_pending(chunk_size=None):
+    """Выполняет все ожидающие и брошенные действия по очереди."""
+    done = 0
+    while True:
+        action = BulkAction.objects.filter(
+            status__in=(BulkAction.PENDING, BulkAction.RUNNING)
+        ).exclude(
+            status=BulkAction.RUNNING,
+            updated__gte=timezone.now() - settings.BULK_STALE_AFTER,
+        ).order_by('pk').first()
+        if action is None or not claim(action.pk):
+            return done
+        action.refresh_from_db()
+        run(action, chunk_size)
+        done += 1
+
+
+@jobs.task('core.run_bulk_action', queue='bulk', max_attempts=1)
+def run_action(action_id):
+    """Задача очереди; ошибки пачек записываются в само действие."""
+    if claim(action_id):
+        run(BulkAction.objects.get(pk=action_id))
@@ -0,0 +1,49 @@
+"""Проверки настроек, которые Django запускает при старте."""
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Настройки с псевдонимами кэшей, которые должны быть общими для
+# процессов: в локальном кэше изменения одного процесса не видны
+# остальным.
+SHARED_ALIASES = (
+    'AUTOCOMPLETE_CACHE_ALIAS',
+    'EXISTENCE_CACHE_ALIAS',
+    'SCOPES_CACHE_ALIAS',
+    'THROTTLE_CACHE_ALIAS',
+    'VIEWS_CACHE_ALIAS',
+)
+
+
+def shared_aliases():
+    names = list(SHARED_ALIASES)
+    if (
+        settings.SESSION_ENGINE == 'core.sessions'
+        or 'core.auth.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS
+    ):
+        names.insert(0, 'SESSION_CACHE_ALIAS')
+    return names
+
+
+@register()
+def shared_caches(app_configs, **kwargs):
+    """Сессии, пользователи, фильтр существования и лимиты записи
+    требуют кэша, общего для всех процессов."""
+    errors = []
+    for name in shared_aliases():
+        alias = getattr(settings, name)
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in LOCAL_CACHES:
+            errors.append(Error(
+                f'{name} указывает на кэш в памяти процесса.',
+                hint=(
+                    f'Укажите в {name} кэш, общий для всех процессов, '
+                    f'а не {backend}.'
+                ),
+                id='core.E001',
+            ))
+    return errors
@@ -0,0 +1,128 @@
+"""Удаление пользователей и групп в фоне небольшими пачками.
+
+schedule() сразу скрывает объект функцией, зарегистрированной для его
+модели через hider(), и ставит задачу очереди. Задача проходит по
+обратным связям модели: строки со связью CASCADE удаляются, со связью
+SET_NULL - обнуляются через save(), чтобы сработали сигналы. Пачки по
+DELETION_BATCH_SIZE идут по возрастанию id, каждая в своей транзакции,
+поэтому база не блокируется надолго, а коллектор Django не загружает
+все зависимые объекты разом. Сам объект удаляется последним. Состояние
+берётся из базы, так что прерванное удаление продолжается повторным
+запуском задачи.
+"""
+import traceback
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import jobs
+from .models import Deletion
+
+HIDERS = {}
+
+
+def hider(model):
+    """Регистрирует функцию, скрывающую объект model до удаления."""
+    def decorator(func):
+        HIDERS[model._meta.label_lower] = func
+        return func
+    return decorator
+
+
+def schedule(instance, user=None):
+    label = instance._meta.label_lower
+    with transaction.atomic():
+        if label in HIDERS:
+            HIDERS[label](instance)
+        deletion = Deletion.objects.create(
+            model=label,
+            object_id=instance.pk,
+            label=str(instance)[:200],
+            user=user,
+        )
+        jobs.enqueue('core.run_deletion', deletion.pk)
+    return deletion
+
+
+def relations(model):
+    """Обратные связи, строки которых удаляются или обнуляются."""
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete
+        and (field.one_to_many or field.one_to_one)
+        and field.on_delete in (models.CASCADE, models.SET_NULL)
+    ]
+
+
+def dependent_rows(relation, object_id):
+    return relation.related_model._base_manager.filter(
+        **{relation.field.name: object_id}
+    )
+
+
+def process_batch(relation, object_id, batch_size):
+    """Обрабатывает одну пачку связи; возвращает число строк."""
+    rows = dependent_rows(relation, object_id)
+    ids = list(rows.order_by('pk').values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    batch = relation.related_model._base_manager.filter(pk__in=ids)
+    if relation.on_delete is models.CASCADE:
+        batch.delete()
+    else:
+        for row in batch:
+            setattr(row, relation.field.name, None)
+            row.save(update_fields=[relation.field.name])
+    return len(ids)
+
+
+def run(deletion, batch_size=None):
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    model = apps.get_model(deletion.model)
+    current = Deletion.objects.filter(pk=deletion.pk)
+    related = relations(model)
+    current.update(
+        status=Deletion.RUNNING,
+        total=F('processed') + sum(
+            dependent_rows(relation, deletion.object_id).count()
+            for relation in related
+        ),
+        updated=timezone.now(),
+    )
+    for relation in related:
+        current.update(step=(
+            f'{relation.related_model._meta.label_lower}.'
+            f'{relation.field.name}'
+        ))
+        while True:
+            with transaction.atomic():
+                count = process_batch(
+                    relation, deletion.object_id, batch_size
+                )
+                current.update(
+                    processed=F('processed') + count,
+                    updated=timezone.now(),
+                )
+            if not count:
+                break
+    with transaction.atomic():
+        model._base_manager.filter(pk=deletion.object_id).delete()
+        current.update(
+            status=Deletion.DONE, step='', error='', updated=timezone.now()
+        )
+
+
+@jobs.task('core.run_deletion', queue='bulk')
+def run_deletion(deletion_id):
+    """Задача очереди; при ошибке очередь повторит её с задержкой."""
+    deletion = Deletion.objects.get(pk=deletion_id)
+    try:
+        run(deletion)
+    except Exception:
+        Deletion.objects.filter(pk=deletion_id).update(
+            status=Deletion.FAILED, error=traceback.format_exc()
+        )
+        raise
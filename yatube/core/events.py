@@ -0,0 +1,213 @@
+"""Шина событий для Server-Sent Events.
+
+Подписчики живут в памяти процесса. Чтобы события доходили до
+подписчиков в других процессах, включается бэкенд sqlite: события
+пишутся в отдельный файл SQLite, а фоновый поток каждого процесса
+читает чужие события и раздаёт их своим подписчикам.
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+LAGGED = 'lagged'
+
+logger = logging.getLogger(__name__)
+
+
+class TooManyConnections(Exception):
+    pass
+
+
+class Subscription:
+    """Очередь событий одного соединения.
+
+    Очередь ограничена: если клиент не успевает читать, старые события
+    отбрасываются, а клиент получает событие lagged и должен
+    перезагрузить данные сам.
+    """
+
+    def __init__(self, bus, channels, size):
+        self.bus = bus
+        self.channels = channels
+        self.queue = queue.Queue(maxsize=size)
+        self.lagged = False
+        self.lock = threading.Lock()
+
+    def put(self, event):
+        with self.lock:
+            if self.queue.full():
+                self.lagged = True
+                self.queue.get_nowait()
+            self.queue.put_nowait(event)
+
+    def get(self, timeout):
+        """Следующее событие или None, если за timeout ничего не пришло."""
+        if self.lagged:
+            self.lagged = False
+            return LAGGED, {}
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """Освобождает место подписки; повторный вызов ничего не делает."""
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    def __init__(self, max_connections, queue_size):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, *channels):
+        with self.lock:
+            if len(self.subscriptions) >= self.max_connections:
+                raise TooManyConnections
+            subscription = Subscription(self, channels, self.queue_size)
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def publish(self, channel, event, data):
+        self.dispatch(channel, event, data)
+
+    def dispatch(self, channel, event, data):
+        with self.lock:
+            subscriptions = [
+                subscription for subscription in self.subscriptions
+                if channel in subscription.channels
+            ]
+        for subscription in subscriptions:
+            subscription.put((event, data))
+
+
+class SqliteEventBus(EventBus):
+    """Шина, пересылающая события между процессами через SQLite."""
+
+    def __init__(self, path, poll_interval, retention, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.pid = os.getpid()
+        with self.connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'pid INTEGER, channel TEXT, event TEXT, data TEXT, '
+                'created REAL)'
+            )
+            self.last_id = connection.execute(
+                'SELECT COALESCE(MAX(id), 0) FROM events'
+            ).fetchone()[0]
+        threading.Thread(target=self.poll_forever, daemon=True).start()
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def publish(self, channel, event, data):
+        super().publish(channel, event, data)
+        now = time.time()
+        with self.connect() as connection:
+            connection.execute(
+                'INSERT INTO events (pid, channel, event, data, created) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (self.pid, channel, event, json.dumps(data), now),
+            )
+            connection.execute(
+                'DELETE FROM events WHERE created < ?',
+                (now - self.retention,),
+            )
+
+    def poll(self):
+        """Раздаёт подписчикам события других процессов."""
+        with self.connect() as connection:
+            rows = connection.execute(
+                'SELECT id, pid, channel, event, data FROM events '
+                'WHERE id > ? ORDER BY id',
+                (self.last_id,),
+            ).fetchall()
+        for event_id, pid, channel, event, data in rows:
+            self.last_id = event_id
+            if pid != self.pid:
+                self.dispatch(channel, event, json.loads(data))
+
+    def poll_forever(self):
+        """Ошибка SQLite (например, занятая база) не должна навсегда
+        останавливать доставку: пишем её в лог и опрашиваем дальше."""
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if self.subscriptions:
+                    self.poll()
+                else:
+                    self.skip_to_end()
+            except sqlite3.Error:
+                logger.exception('Не удалось прочитать события из %s',
+                                 self.path)
+
+    def skip_to_end(self):
+        with self.connect() as connection:
+            self.last_id = connection.execute(
+                'SELECT COALESCE(MAX(id), ?) FROM events', (self.last_id,)
+            ).fetchone()[0]
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            options = {
+                'max_connections': settings.EVENTS_MAX_CONNECTIONS,
+                'queue_size': settings.EVENTS_QUEUE_SIZE,
+            }
+            if settings.EVENTS_BACKEND == 'sqlite':
+                _bus = SqliteEventBus(
+                    settings.EVENTS_SQLITE_PATH,
+                    settings.EVENTS_POLL_INTERVAL,
+                    settings.EVENTS_RETENTION,
+                    **options,
+                )
+            else:
+                _bus = EventBus(**options)
+        return _bus
+
+
+def publish(channel, event, data):
+    get_bus().publish(channel, event, data)
+
+
+def event_stream(subscription, keepalive, max_age):
+    """Поток в формате text/event-stream.
+
+    Поток закрывается через max_age секунд, браузер переподключится
+    сам; так долгие соединения не держат поток воркера бесконечно.
+    """
+    deadline = time.monotonic() + max_age
+    try:
+        yield f'retry: {settings.EVENTS_RETRY_MS}\n\n'
+        while time.monotonic() < deadline:
+            event = subscription.get(keepalive)
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            name, data = event
+            yield f'event: {name}\ndata: {json.dumps(data)}\n\n'
+    finally:
+        subscription.close()
@@ -0,0 +1,196 @@
+"""Очередь фоновых задач в базе данных.
+
+Код запроса ставит задачу одним вызовом enqueue() и сразу отвечает;
+строка задачи пишется в той же транзакции, поэтому задача появится,
+только если запрос закоммитился. Процессы manage.py worker забирают
+задачи условным UPDATE (работает и на SQLite), по убыванию приоритета;
+тот же UPDATE проверяет, что в очереди задачи есть свободное место.
+Упавшая задача повторяется с экспоненциальной задержкой, задача
+исполнителя, который умер, возвращается в очередь по истечении
+JOBS_TIMEOUT. Число одновременно выполняемых задач каждой очереди
+ограничено JOBS_QUEUES.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    IntegrityError, close_old_connections, connection, transaction,
+)
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+
+def task(name, queue='default', priority=0, max_attempts=None):
+    """Регистрирует функцию как задачу с параметрами по умолчанию."""
+    def decorator(func):
+        TASKS[name] = (func, queue, priority, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(name, *args, key=None, priority=None, queue=None, delay=None,
+            **kwargs):
+    """Ставит задачу в очередь и возвращает её строку.
+
+    Повторный вызов с тем же key возвращает уже созданную задачу.
+    """
+    _, default_queue, default_priority, max_attempts = TASKS[name]
+    queue = queue or default_queue
+    if queue not in settings.JOBS_QUEUES:
+        raise ValueError(f'Неизвестная очередь задач: {queue}')
+    if key is not None:
+        job = Job.objects.filter(key=key).first()
+        if job is not None:
+            return job
+    fields = dict(
+        task=name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        queue=queue,
+        priority=default_priority if priority is None else priority,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=timezone.now() + (delay or timedelta()),
+        key=key,
+    )
+    try:
+        with transaction.atomic():
+            return Job.objects.create(**fields)
+    except IntegrityError:
+        if key is None:
+            raise
+        return Job.objects.get(key=key)
+
+
+def enqueue_once(name, *args, **kwargs):
+    """Ставит задачу, если такая же (с теми же аргументами) ещё ждёт в
+    очереди. В отличие от key, после запуска задачи её можно поставить
+    снова: пересчёт после новых изменений не теряется.
+    """
+    payload = json.dumps({'args': args, 'kwargs': kwargs})
+    if not Job.objects.filter(
+        task=name, payload=payload, status=Job.QUEUED
+    ).exists():
+        enqueue(name, *args, **kwargs)
+
+
+def backoff(attempts):
+    return timedelta(seconds=settings.JOBS_BACKOFF * 2 ** (attempts - 1))
+
+
+def requeue_expired(now):
+    """Возвращает в очередь задачи исполнителей, переставших отвечать."""
+    expired = Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=now - settings.JOBS_TIMEOUT
+    )
+    expired.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished=now, error='Истекло время выполнения.'
+    )
+    expired.update(status=Job.QUEUED, locked_by='')
+
+
+def claim(queues, worker):
+    """Забирает следующую задачу из очередей, где есть свободные места."""
+    now = timezone.now()
+    requeue_expired(now)
+    running = dict(
+        Job.objects.filter(status=Job.RUNNING, queue__in=queues).values(
+            'queue'
+        ).annotate(count=Count('pk')).values_list('queue', 'count')
+    )
+    open_queues = [
+        queue for queue in queues
+        if running.get(queue, 0) < settings.JOBS_QUEUES.get(queue, 1)
+    ]
+    if not open_queues:
+        return None
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, queue__in=open_queues, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'pk').values_list('pk', 'queue')
+    for pk, queue in candidates[:10]:
+        if take(pk, queue, worker, now):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def take(pk, queue, worker, now):
+    """Занимает задачу, если она ещё в очереди и в её очереди есть место.
+
+    Проверка места - подзапрос внутри того же UPDATE: оператор
+    выполняется под блокировкой записи, и два исполнителя не могут оба
+    пройти проверку, как при отдельном подсчёте.
+    """
+    table = connection.ops.quote_name(Job._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET status = %s, locked_by = %s, '
+            f'locked_at = %s, attempts = attempts + 1 '
+            f'WHERE id = %s AND status = %s AND ('
+            f'SELECT COUNT(*) FROM {table} WHERE status = %s AND queue = %s'
+            f') < %s',
+            [
+                Job.RUNNING, worker,
+                connection.ops.adapt_datetimefield_value(now),
+                pk, Job.QUEUED, Job.RUNNING, queue,
+                settings.JOBS_QUEUES.get(queue, 1),
+            ],
+        )
+        return cursor.rowcount == 1
+
+
+def execute(job):
+    """Выполняет задачу и записывает результат; True при успехе."""
+    payload = json.loads(job.payload)
+    func = TASKS[job.task][0]
+    owned = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    try:
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        now = timezone.now()
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            owned.update(status=Job.FAILED, finished=now, error=error)
+        else:
+            owned.update(
+                status=Job.QUEUED,
+                run_at=now + backoff(job.attempts),
+                locked_by='',
+                error=error,
+            )
+        return False
+    owned.update(status=Job.DONE, finished=timezone.now(), error='')
+    return True
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def work(queues=None, burst=False, stop=None):
+    """Цикл исполнителя; с burst выходит, когда задачи кончились.
+
+    Возвращает число выполненных задач.
+    """
+    queues = queues or list(settings.JOBS_QUEUES)
+    stop = stop or threading.Event()
+    worker = worker_name()
+    done = 0
+    while not stop.is_set():
+        close_old_connections()
+        job = claim(queues, worker)
+        if job is None:
+            if burst:
+                break
+            time.sleep(settings.JOBS_POLL_INTERVAL)
+            continue
+        execute(job)
+        done += 1
+    return done
@@ -0,0 +1,157 @@
+"""Исходящие письма через таблицу OutboxMessage.
+
+OutboxBackend вместо отправки записывает письма в таблицу и ставит
+задачу core.send_outbox, поэтому запрос не ждёт почтовый сервер.
+Отправитель забирает письма пачками по OUTBOX_BATCH_SIZE и шлёт их
+через одно соединение бэкенда OUTBOX_DELIVERY_BACKEND, не быстрее
+OUTBOX_RATE_LIMIT писем в секунду. Неотправленное письмо повторяется с
+экспоненциальной задержкой, после OUTBOX_MAX_ATTEMPTS попыток
+помечается ошибкой.
+"""
+import base64
+import json
+import time
+import traceback
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import F, Min
+from django.utils import timezone
+
+from . import jobs
+from .models import Job, OutboxMessage
+
+DISCONNECTS = (SMTPServerDisconnected, ConnectionError, TimeoutError)
+FIELDS = ('subject', 'body', 'from_email', 'to', 'cc', 'bcc', 'reply_to',
+          'extra_headers', 'alternatives')
+
+
+def serialize(message):
+    data = {field: getattr(message, field, None) for field in FIELDS}
+    data['alternatives'] = list(data['alternatives'] or [])
+    data['attachments'] = [
+        (name, base64.b64encode(
+            content.encode() if isinstance(content, str) else content
+        ).decode(), mimetype)
+        for name, content, mimetype in message.attachments
+    ]
+    return json.dumps(data)
+
+
+def deserialize(payload):
+    data = json.loads(payload)
+    attachments = data.pop('attachments')
+    headers = data.pop('extra_headers')
+    message = EmailMultiAlternatives(headers=headers, **data)
+    for name, content, mimetype in attachments:
+        message.attach(name, base64.b64decode(content), mimetype)
+    return message
+
+
+class OutboxBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который только кладёт письма в очередь."""
+
+    def send_messages(self, email_messages):
+        rows = [
+            OutboxMessage(
+                payload=serialize(message),
+                recipients=', '.join(message.recipients()),
+                subject=str(message.subject)[:255],
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxMessage.objects.bulk_create(rows)
+        if rows:
+            schedule()
+        return len(rows)
+
+
+def schedule(delay=None):
+    """Ставит отправку, если она ещё не ждёт в очереди."""
+    if not Job.objects.filter(
+        task='core.send_outbox', status=Job.QUEUED
+    ).exists():
+        jobs.enqueue('core.send_outbox', delay=delay)
+
+
+def claim(now):
+    """Забирает пачку писем, готовых к отправке."""
+    OutboxMessage.objects.filter(
+        status=OutboxMessage.SENDING,
+        locked_at__lt=now - settings.OUTBOX_TIMEOUT,
+    ).update(status=OutboxMessage.PENDING)
+    ids = list(OutboxMessage.objects.filter(
+        status=OutboxMessage.PENDING, next_attempt__lte=now
+    ).order_by('pk').values_list(
+        'pk', flat=True
+    )[:settings.OUTBOX_BATCH_SIZE])
+    OutboxMessage.objects.filter(
+        pk__in=ids, status=OutboxMessage.PENDING
+    ).update(status=OutboxMessage.SENDING, locked_at=now)
+    return list(OutboxMessage.objects.filter(
+        pk__in=ids, status=OutboxMessage.SENDING, locked_at=now
+    ).order_by('pk'))
+
+
+def failed(row, error):
+    attempts = row.attempts + 1
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        status, next_attempt = OutboxMessage.FAILED, row.next_attempt
+    else:
+        status = OutboxMessage.PENDING
+        next_attempt = timezone.now() + timedelta(
+            seconds=settings.OUTBOX_BACKOFF * 2 ** (attempts - 1)
+        )
+    OutboxMessage.objects.filter(pk=row.pk).update(
+        status=status, attempts=F('attempts') + 1,
+        next_attempt=next_attempt, error=error,
+    )
+
+
+def drain():
+    """Отправляет все готовые письма; возвращает число отправленных."""
+    connection = get_connection(
+        settings.OUTBOX_DELIVERY_BACKEND, fail_silently=False
+    )
+    interval = 1 / settings.OUTBOX_RATE_LIMIT
+    sent = 0
+    last_send = 0
+    try:
+        while True:
+            batch = claim(timezone.now())
+            if not batch:
+                return sent
+            for row in batch:
+                time.sleep(max(0, last_send + interval - time.monotonic()))
+                last_send = time.monotonic()
+                try:
+                    connection.open()
+                    connection.send_messages([deserialize(row.payload)])
+                except Exception as error:
+                    if isinstance(error, DISCONNECTS):
+                        # Следующее письмо откроет новое соединение.
+                        connection.close()
+                    failed(row, traceback.format_exc())
+                    continue
+                OutboxMessage.objects.filter(pk=row.pk).update(
+                    status=OutboxMessage.SENT, sent=timezone.now(), error=''
+                )
+                sent += 1
+    finally:
+        connection.close()
+
+
+@jobs.task('core.send_outbox', queue='mail')
+def send_outbox():
+    """Отправляет письма и ставит следующую отправку к ближайшему
+    повтору."""
+    drain()
+    retry_at = OutboxMessage.objects.filter(
+        status=OutboxMessage.PENDING
+    ).aggregate(first=Min('next_attempt'))['first']
+    if retry_at is not None:
+        schedule(max(retry_at - timezone.now(), timedelta()))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core import bulk
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет ожидающие массовые действия и продолжает брошенные '
+        'после перезапуска.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Сколько объектов обрабатывать за одну транзакцию.',
+        )
+
+    def handle(self, *args, **options):
+        done = bulk.run_pending(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Выполнено действий: {done}.'))
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import jobs
+
+
+def stopper():
+    """Событие остановки, которое выставляют SIGTERM и SIGINT: исполнитель
+    доделывает текущую задачу и выходит."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    return stop
+
+
+def child(queues, burst):
+    """Процесс-исполнитель: по SIGTERM доделывает текущую задачу и
+    выходит."""
+    jobs.work(queues, burst=burst, stop=stopper())
+
+
+def supervise(children):
+    """Ждёт дочерние процессы. SIGTERM родителю (остановка сервиса)
+    передаётся детям, иначе они остались бы работать сиротами."""
+    def forward(signum, frame):
+        for process in children:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    try:
+        for process in children:
+            process.join()
+    except KeyboardInterrupt:
+        for process in children:
+            process.terminate()
+        for process in children:
+            process.join()
+
+
+class Command(BaseCommand):
+    help = 'Запускает процессы, выполняющие фоновые задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.JOBS_PROCESSES,
+            help='Сколько процессов-исполнителей запустить.',
+        )
+        parser.add_argument(
+            '--queue',
+            action='append',
+            dest='queues',
+            help='Очередь, из которой брать задачи (можно повторять).',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Выйти, когда задачи в очереди закончатся.',
+        )
+
+    def handle(self, *args, **options):
+        queues = options['queues'] or list(settings.JOBS_QUEUES)
+        if options['processes'] <= 1:
+            done = jobs.work(
+                queues, burst=options['burst'], stop=stopper()
+            )
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}.'))
+            return
+        # Дочерние процессы не должны делить соединение родителя.
+        connection.close()
+        children = [
+            multiprocessing.Process(
+                target=child, args=(queues, options['burst'])
+            )
+            for _ in range(options['processes'])
+        ]
+        for process in children:
+            process.start()
+        supervise(children)
@@ -0,0 +1,77 @@
+"""Счётчики для инструментирования запросов.
+
+Процесс копит счётчики в памяти и не чаще раза в METRICS_FLUSH_INTERVAL
+секунд прибавляет накопленное с прошлой записи к строкам Metric, так что
+в админке видны суммы по всем процессам. snapshot() по-прежнему
+возвращает счётчики своего процесса.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Metric
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters = Counter()
+_flushed = Counter()
+_state = {'flushed': time.monotonic()}
+
+
+def incr(name, value=1):
+    """Увеличивает счётчик name на value."""
+    with _lock:
+        _counters[name] += value
+        due = (
+            time.monotonic() - _state['flushed']
+            > settings.METRICS_FLUSH_INTERVAL
+        )
+    if due:
+        try:
+            flush()
+        except Exception:
+            logger.exception('Не удалось записать счётчики')
+
+
+def flush():
+    """Прибавляет к строкам Metric приращения с прошлой записи."""
+    with _lock:
+        deltas = {
+            name: value - _flushed[name]
+            for name, value in _counters.items() if value != _flushed[name]
+        }
+        _flushed.update(deltas)
+        _state['flushed'] = time.monotonic()
+    if not deltas:
+        return
+    try:
+        with transaction.atomic():
+            now = timezone.now()
+            for name, delta in deltas.items():
+                Metric.objects.get_or_create(name=name)
+                Metric.objects.filter(name=name).update(
+                    value=F('value') + delta, updated=now
+                )
+    except Exception:
+        with _lock:
+            _flushed.subtract(deltas)
+        raise
+
+
+def snapshot():
+    """Возвращает копию всех счётчиков процесса."""
+    with _lock:
+        return dict(_counters)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _flushed.clear()
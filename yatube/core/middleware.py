@@ -0,0 +1,165 @@
+import re
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/atom+xml',
+    'application/rss+xml',
+    'application/feed+json',
+    'image/svg+xml',
+)
+
+re_accepts = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q=([0-9.]+))?')
+
+
+def accepted_encodings(header):
+    """Разбирает Accept-Encoding и отбрасывает кодировки с q=0."""
+    encodings = set()
+    for part in header.lower().split(','):
+        match = re_accepts.match(part)
+        if not match:
+            continue
+        name, quality = match.groups()
+        try:
+            if quality is not None and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(name)
+    return encodings
+
+
+class GzipCompressor:
+    encoding = 'gzip'
+
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    encoding = 'br'
+
+    def __init__(self, level):
+        # У brotli шкала качества 0..11, у zlib 1..9.
+        self._obj = brotli.Compressor(quality=min(level + 2, 11))
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает ответы brotli или gzip, в том числе потоковые.
+
+    В отличие от GZipMiddleware потоковый ответ не буферизуется:
+    каждый фрагмент сжимается и сбрасывается клиенту сразу.
+    Счётчики compression.* (сэкономленные байты и процессорное время
+    сжатия) уходят в core.metrics и видны в админке на странице Metric.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        compressor_class = self.negotiate(request, response)
+        if compressor_class is None:
+            return response
+        compressor = compressor_class(settings.COMPRESSION_LEVEL)
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                compressor, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            started = time.thread_time()
+            content = response.content
+            compressed = compressor.compress(content) + compressor.finish()
+            elapsed = time.thread_time() - started
+            self.record(len(content), len(compressed), elapsed)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+            response['Server-Timing'] = (
+                f'compress;dur={elapsed * 1000:.3f}'
+            )
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['Content-Encoding'] = compressor.encoding
+        return response
+
+    def negotiate(self, request, response):
+        """Выбирает кодировку или возвращает None, если сжимать не нужно."""
+        if response.has_header('Content-Encoding'):
+            return None
+        content_type = response.get('Content-Type', '').lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return None
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_LENGTH):
+            return None
+        encodings = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if brotli is not None and 'br' in encodings:
+            return BrotliCompressor
+        if 'gzip' in encodings or '*' in encodings:
+            return GzipCompressor
+        return None
+
+    def compress_stream(self, compressor, chunks):
+        size_in = size_out = 0
+        elapsed = 0.0
+        try:
+            for chunk in chunks:
+                started = time.thread_time()
+                data = compressor.compress(chunk) + compressor.flush()
+                elapsed += time.thread_time() - started
+                size_in += len(chunk)
+                size_out += len(data)
+                if data:
+                    yield data
+            data = compressor.finish()
+            size_out += len(data)
+            yield data
+        finally:
+            self.record(size_in, size_out, elapsed)
+
+    @staticmethod
+    def record(size_in, size_out, elapsed):
+        """Учитывает ответ; elapsed — процессорное время потока."""
+        metrics.incr('compression.responses')
+        metrics.incr('compression.bytes_in', size_in)
+        metrics.incr('compression.bytes_saved', size_in - size_out)
+        metrics.incr('compression.cpu_seconds', elapsed)
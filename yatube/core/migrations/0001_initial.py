@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkAction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Действие')),
+                ('params', models.TextField(default='{}', verbose_name='Параметры')),
+                ('ids', models.TextField(verbose_name='id объектов')),
+                ('total', models.IntegerField(default=0, verbose_name='Всего')),
+                ('processed', models.IntegerField(default=0, verbose_name='Обработано')),
+                ('last_id', models.IntegerField(default=0, verbose_name='Последний обработанный id')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Обновлено')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Запустил')),
+            ],
+            options={
+                'verbose_name': 'массовое действие',
+                'verbose_name_plural': 'массовые действия',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
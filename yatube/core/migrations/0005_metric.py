@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:56
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_deletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Metric',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Счётчик')),
+                ('value', models.FloatField(default=0, verbose_name='Значение')),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Обновлён')),
+            ],
+            options={
+                'verbose_name': 'счётчик',
+                'verbose_name_plural': 'счётчики',
+                'ordering': ('name',),
+            },
+        ),
+    ]
@@ -0,0 +1,242 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class BulkAction(models.Model):
+    """Класс для массового действия админки, выполняемого в фоне."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=50, verbose_name='Действие')
+    params = models.TextField(default='{}', verbose_name='Параметры')
+    ids = models.TextField(verbose_name='id объектов')
+    total = models.IntegerField(default=0, verbose_name='Всего')
+    processed = models.IntegerField(default=0, verbose_name='Обработано')
+    last_id = models.IntegerField(
+        default=0,
+        verbose_name='Последний обработанный id'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    user = models.ForeignKey(
+        User,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Запустил'
+    )
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    updated = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Обновлено'
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'массовое действие'
+        verbose_name_plural = 'массовые действия'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+    def progress(self):
+        if not self.total:
+            return '100%'
+        return f'{100 * self.processed // self.total}%'
+    progress.short_description = 'Прогресс'
+
+
+class Job(models.Model):
+    """Класс для задачи из очереди фоновых задач."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(max_length=100, verbose_name='Задача')
+    payload = models.TextField(default='{}', verbose_name='Аргументы')
+    queue = models.CharField(max_length=50, verbose_name='Очередь')
+    priority = models.IntegerField(default=0, verbose_name='Приоритет')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    key = models.CharField(
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name='Ключ идемпотентности'
+    )
+    attempts = models.IntegerField(default=0, verbose_name='Попыток')
+    max_attempts = models.IntegerField(verbose_name='Максимум попыток')
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить после'
+    )
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Исполнитель'
+    )
+    locked_at = models.DateTimeField(null=True, verbose_name='Взята')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+    finished = models.DateTimeField(null=True, verbose_name='Завершена')
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['status', 'queue', '-priority', 'run_at']),
+        ]
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'фоновые задачи'
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
+
+
+class OutboxMessage(models.Model):
+    """Класс для письма, ожидающего отправки фоновым отправителем."""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    payload = models.TextField(verbose_name='Письмо')
+    recipients = models.TextField(verbose_name='Получатели')
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.IntegerField(default=0, verbose_name='Попыток')
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    locked_at = models.DateTimeField(null=True, verbose_name='Взято')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    sent = models.DateTimeField(null=True, verbose_name='Отправлено')
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [models.Index(fields=['status', 'next_attempt'])]
+        verbose_name = 'письмо'
+        verbose_name_plural = 'исходящие письма'
+
+    def __str__(self):
+        return self.subject
+
+
+class Deletion(models.Model):
+    """Класс для фонового удаления пользователя или группы."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    model = models.CharField(max_length=100, verbose_name='Модель')
+    object_id = models.IntegerField(verbose_name='id объекта')
+    label = models.CharField(max_length=200, verbose_name='Объект')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    step = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Текущая связь'
+    )
+    total = models.IntegerField(default=0, verbose_name='Всего строк')
+    processed = models.IntegerField(default=0, verbose_name='Обработано')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    user = models.ForeignKey(
+        User,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Запустил'
+    )
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    updated = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Обновлено'
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'удаление'
+        verbose_name_plural = 'удаления'
+
+    def __str__(self):
+        return f'{self.model} {self.label}'
+
+    def progress(self):
+        if not self.total:
+            return '0%' if self.status != self.DONE else '100%'
+        return f'{min(100, 100 * self.processed // self.total)}%'
+    progress.short_description = 'Прогресс'
+
+
+class Metric(models.Model):
+    """Класс для счётчика инструментирования, общего для процессов."""
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Счётчик'
+    )
+    value = models.FloatField(default=0, verbose_name='Значение')
+    updated = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Обновлён'
+    )
+
+    class Meta:
+        ordering = ('name',)
+        verbose_name = 'счётчик'
+        verbose_name_plural = 'счётчики'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,50 @@
+"""Сессии в кэше с отложенной записью в базу.
+
+Каждое сохранение сессии сразу попадает в кэш, а в базу - только при
+создании сессии (вход, смена ключа) и не чаще раза в
+SESSION_PERSIST_INTERVAL секунд. Смена данных входа (вход, выход,
+смена пароля) пишется в базу сразу. Чтение идёт из кэша; база нужна,
+лишь если кэш потерял сессию, и тогда пропадут только правки последних
+SESSION_PERSIST_INTERVAL секунд.
+"""
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY,
+)
+from django.contrib.sessions.backends import cached_db
+
+KEY_PREFIX = 'core.sessions'
+AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+
+class SessionStore(cached_db.SessionStore):
+    cache_key_prefix = KEY_PREFIX
+
+    @property
+    def persisted_key(self):
+        return f'{self.cache_key}:persisted'
+
+    def auth_state(self):
+        """Данные входа в сессии: их смена пишется в базу сразу."""
+        session = self._get_session(no_load=True)
+        return [session.get(key) for key in AUTH_KEYS]
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        state = self.auth_state()
+        if must_create or self._cache.get(self.persisted_key) != state:
+            super().save(must_create)
+            self._cache.set(
+                self.persisted_key, state, settings.SESSION_PERSIST_INTERVAL
+            )
+        else:
+            self._cache.set(
+                self.cache_key, self._session, self.get_expiry_age()
+            )
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        super().delete(session_key)
+        if key is not None:
+            self._cache.delete(f'{self.cache_key_prefix}{key}:persisted')
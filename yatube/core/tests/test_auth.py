@@ -0,0 +1,113 @@
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import auth, checks
+from core.sessions import SessionStore
+from posts.models import User
+
+
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.user = User.objects.create_user(
+            username='testUser', password='old-password-1'
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_steady_state_without_queries(self):
+        """Сессия и пользователь после первого запроса берутся из кэша."""
+        url = reverse('about:author')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_password_change_logs_out(self):
+        """Смена пароля сбрасывает кэш пользователя и старые сессии."""
+        url = reverse('posts:post_create')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.user.set_password('new-password-2')
+        self.user.save()
+        response = self.client.get(url)
+        self.assertRedirects(
+            response, f"{reverse('users:login')}?next={url}"
+        )
+
+    def test_deactivated_user_rejected(self):
+        """Заблокированный пользователь не берётся из кэша."""
+        url = reverse('posts:post_create')
+        self.client.get(url)
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_copy_in_other_process_rejected(self):
+        """Копия пользователя в локальном кэше не переживает смену
+        пароля, записанную мимо сигналов."""
+        url = reverse('posts:post_create')
+        self.client.get(url)
+        User.objects.filter(pk=self.user.pk).update(password='!')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        auth.forget(self.user.pk)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    })
+    def test_local_session_cache_rejected(self):
+        """Кэш сессий в памяти процесса не проходит проверку настроек."""
+        errors = checks.shared_caches(None)
+        self.assertEqual(
+            [error.id for error in errors], ['core.E001'] * 6
+        )
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+
+    def stored(self, session):
+        return Session.objects.get(
+            session_key=session.session_key
+        ).get_decoded()
+
+    def test_lazy_persistence(self):
+        """Новая сессия пишется в базу сразу, правки - не чаще
+        SESSION_PERSIST_INTERVAL, но читаются из кэша."""
+        session = SessionStore()
+        session['step'] = 1
+        session.save()
+        self.assertEqual(self.stored(session), {'step': 1})
+        session['step'] = 2
+        with self.assertNumQueries(0):
+            session.save()
+            loaded = SessionStore(session.session_key)
+            self.assertEqual(loaded['step'], 2)
+        self.assertEqual(self.stored(session), {'step': 1})
+        caches['shared'].delete(session.persisted_key)
+        session.save()
+        self.assertEqual(self.stored(session), {'step': 2})
+        session[SESSION_KEY] = '1'
+        session.save()
+        self.assertEqual(self.stored(session)[SESSION_KEY], '1')
+
+    def test_load_falls_back_to_database(self):
+        """Потерянная кэшем сессия читается из базы."""
+        session = SessionStore()
+        session['step'] = 1
+        session.save()
+        caches['shared'].clear()
+        self.assertEqual(SessionStore(session.session_key)['step'], 1)
+        session.delete()
+        self.assertFalse(Session.objects.exists())
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import bulk
+from core.models import BulkAction
+
+User = get_user_model()
+seen = []
+failing = set()
+
+
+@bulk.register('test_collect')
+def collect(ids, suffix=''):
+    if failing & set(ids):
+        raise RuntimeError('сбой')
+    User.objects.filter(pk__in=ids).update(last_name=suffix)
+    seen.append(list(ids))
+
+
+class BulkActionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(5)
+        ]
+
+    def setUp(self):
+        seen.clear()
+        failing.clear()
+
+    def test_runs_in_chunks(self):
+        """Действие выполняется пачками и отмечает прогресс."""
+        action = bulk.enqueue(
+            'test_collect', User.objects.all(), suffix='готово'
+        )
+        self.assertEqual(bulk.run_pending(chunk_size=2), 1)
+        action.refresh_from_db()
+        self.assertEqual(action.status, BulkAction.DONE)
+        self.assertEqual((action.processed, action.total), (5, 5))
+        self.assertEqual([len(chunk) for chunk in seen], [2, 2, 1])
+        self.assertEqual(
+            User.objects.filter(last_name='готово').count(), 5
+        )
+
+    def test_resume_after_failure(self):
+        """Прерванное действие продолжается с первой необработанной
+        пачки."""
+        ids = [user.pk for user in BulkActionTests.users]
+        failing.add(ids[2])
+        action = bulk.enqueue('test_collect', User.objects.all())
+        bulk.run_pending(chunk_size=2)
+        action.refresh_from_db()
+        self.assertEqual(action.status, BulkAction.FAILED)
+        self.assertEqual(action.processed, 2)
+        self.assertIn('RuntimeError', action.error)
+        failing.clear()
+        self.assertEqual(bulk.resume(BulkAction.objects.all()), 1)
+        bulk.run_pending(chunk_size=2)
+        action.refresh_from_db()
+        self.assertEqual(action.status, BulkAction.DONE)
+        self.assertEqual(seen, [ids[:2], ids[2:4], ids[4:]])
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core import events
+
+
+class EventBusTests(SimpleTestCase):
+    def setUp(self):
+        self.bus = events.EventBus(max_connections=2, queue_size=2)
+
+    def test_publish_to_channel_subscribers(self):
+        """Событие получают только подписчики его канала."""
+        subscription = self.bus.subscribe('post:1')
+        other = self.bus.subscribe('post:2')
+        self.bus.publish('post:1', 'comment', {'id': 1})
+        self.assertEqual(subscription.get(0), ('comment', {'id': 1}))
+        self.assertIsNone(other.get(0))
+
+    def test_backpressure_drops_oldest(self):
+        """Медленный клиент теряет старые события и получает lagged."""
+        subscription = self.bus.subscribe('posts')
+        for number in range(3):
+            self.bus.publish('posts', 'post', {'id': number})
+        self.assertEqual(subscription.get(0), (events.LAGGED, {}))
+        self.assertEqual(subscription.get(0), ('post', {'id': 1}))
+        self.assertEqual(subscription.get(0), ('post', {'id': 2}))
+
+    def test_connection_cap(self):
+        """Сверх лимита соединений подписка не создаётся."""
+        first = self.bus.subscribe('posts')
+        self.bus.subscribe('posts')
+        with self.assertRaises(events.TooManyConnections):
+            self.bus.subscribe('posts')
+        first.close()
+        self.bus.subscribe('posts')
+
+
+class SqliteEventBusTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'events.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_bus(self):
+        return events.SqliteEventBus(
+            self.path,
+            poll_interval=60,
+            retention=60,
+            max_connections=10,
+            queue_size=10,
+        )
+
+    def test_events_cross_processes(self):
+        """События другого процесса доходят до подписчиков."""
+        publisher = self.make_bus()
+        publisher.pid = -1
+        subscriber_bus = self.make_bus()
+        subscription = subscriber_bus.subscribe('posts')
+        publisher.publish('posts', 'post', {'id': 7})
+        subscriber_bus.poll()
+        self.assertEqual(subscription.get(0), ('post', {'id': 7}))
+        self.assertIsNone(subscription.get(0))
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+calls = []
+
+
+@jobs.task('test.record')
+def record(value):
+    calls.append(value)
+
+
+@jobs.task('test.flaky', max_attempts=2)
+def flaky():
+    calls.append('flaky')
+    raise RuntimeError('сбой')
+
+
+@override_settings(JOBS_QUEUES={'default': 1, 'other': 1})
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_priority_and_idempotency(self):
+        """Задачи выполняются по приоритету, повтор ключа не создаёт
+        дубль."""
+        jobs.enqueue('test.record', 'low')
+        first = jobs.enqueue('test.record', 'high', priority=10, key='k')
+        second = jobs.enqueue('test.record', 'again', key='k')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(jobs.work(burst=True), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+    def test_retry_with_backoff(self):
+        """Упавшая задача откладывается и после всех попыток
+        помечается ошибкой."""
+        job = jobs.enqueue('test.flaky')
+        jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError', job.error)
+        self.assertEqual(jobs.work(burst=True), 0)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(calls, ['flaky', 'flaky'])
+
+    def test_queue_concurrency_limit(self):
+        """Очередь с занятыми местами пропускается, пока задача не
+        завершится или не истечёт её время."""
+        busy = jobs.enqueue('test.record', 'busy')
+        jobs.claim(['default'], 'other-worker')
+        jobs.enqueue('test.record', 'waiting')
+        jobs.enqueue('test.record', 'other', queue='other')
+        self.assertEqual(jobs.work(burst=True), 1)
+        self.assertEqual(calls, ['other'])
+        Job.objects.filter(pk=busy.pk).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(jobs.work(burst=True), 2)
+        self.assertEqual(calls, ['other', 'busy', 'waiting'])
+
+    def test_claim_checks_capacity_atomically(self):
+        """Занять задачу сверх лимита очереди нельзя, даже если проверка
+        мест уже пройдена."""
+        running = jobs.enqueue('test.record', 'running')
+        waiting = jobs.enqueue('test.record', 'waiting')
+        now = timezone.now()
+        self.assertTrue(jobs.take(running.pk, 'default', 'first', now))
+        self.assertFalse(jobs.take(waiting.pk, 'default', 'second', now))
+        self.assertEqual(
+            Job.objects.get(pk=waiting.pk).status, Job.QUEUED
+        )
+        self.assertEqual(
+            Job.objects.get(pk=running.pk).locked_at, now
+        )
+
+    def test_unknown_queue(self):
+        """Задачу нельзя поставить в неописанную очередь."""
+        with self.assertRaises(ValueError):
+            jobs.enqueue('test.record', 'x', queue='missing')
@@ -0,0 +1,117 @@
+import socketserver
+import threading
+
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import jobs
+from core.models import OutboxMessage
+from posts.models import User
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма и запоминает их."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip('<> ')
+                if address in self.server.rejected:
+                    self.reply('550 no such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 go ahead')
+                lines = []
+                for line in self.rfile:
+                    if line == b'.\r\n':
+                        break
+                    lines.append(line)
+                self.server.messages.append(
+                    (recipients, b''.join(lines).decode())
+                )
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.smtp = SMTPStandIn()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        settings = override_settings(
+            EMAIL_BACKEND='core.mail.OutboxBackend',
+            OUTBOX_DELIVERY_BACKEND=(
+                'django.core.mail.backends.smtp.EmailBackend'
+            ),
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.smtp.server_address[1],
+            OUTBOX_RATE_LIMIT=1000,
+            OUTBOX_BATCH_SIZE=2,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_password_reset_goes_through_outbox(self):
+        """Сброс пароля не ждёт почтовый сервер: письмо уходит из
+        очереди."""
+        User.objects.create_user(
+            username='user', email='user@example.com', password='pass'
+        )
+        Client().post(
+            reverse('users:password_reset'), {'email': 'user@example.com'}
+        )
+        self.assertEqual(self.smtp.messages, [])
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        jobs.work(burst=True)
+        (recipients, data), = self.smtp.messages
+        self.assertEqual(recipients, ['user@example.com'])
+        self.assertIn('/auth/reset/', data)
+
+    def test_batches_share_connection_and_retry(self):
+        """Пачки уходят через одно соединение, отказ откладывается."""
+        self.smtp.rejected.add('bad@example.com')
+        mail.send_mass_mail([
+            (f'Тема {i}', 'Текст', 'from@example.com', [address])
+            for i, address in enumerate(
+                ['a@example.com', 'bad@example.com', 'c@example.com']
+            )
+        ])
+        jobs.work(burst=True)
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(
+            [recipients for recipients, _ in self.smtp.messages],
+            [['a@example.com'], ['c@example.com']],
+        )
+        bad = OutboxMessage.objects.get(recipients='bad@example.com')
+        self.assertEqual((bad.status, bad.attempts), ('pending', 1))
+        self.assertIn('SMTPRecipientsRefused', bad.error)
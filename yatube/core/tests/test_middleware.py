@@ -0,0 +1,67 @@
+import gzip
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import metrics
+from core.middleware import CompressionMiddleware
+from core.models import Metric
+
+TEXT = 'Большой тест-пост. ' * 100
+
+
+@override_settings(COMPRESSION_LEVEL=6, COMPRESSION_MIN_LENGTH=200)
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        metrics.reset()
+
+    def process(self, response, encoding='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_regular_response_compressed(self):
+        """Обычный ответ сжимается gzip."""
+        response = self.process(HttpResponse(TEXT))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(
+            gzip.decompress(response.content).decode(), TEXT
+        )
+        self.assertGreater(metrics.snapshot()['compression.bytes_saved'], 0)
+
+    def test_streaming_response_compressed(self):
+        """Потоковый ответ сжимается по фрагментам."""
+        response = self.process(
+            StreamingHttpResponse(TEXT.encode() for _ in range(3))
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body).decode(), TEXT * 3)
+
+    def test_skipped_responses(self):
+        """Маленькие, уже сжатые и бинарные ответы не трогаем."""
+        encoded = HttpResponse(TEXT)
+        encoded['Content-Encoding'] = 'identity'
+        responses = {
+            'small': (HttpResponse('ok'), 'gzip'),
+            'encoded': (encoded, 'gzip'),
+            'binary': (HttpResponse(TEXT, content_type='image/png'), 'gzip'),
+            'not_accepted': (HttpResponse(TEXT), 'gzip;q=0'),
+        }
+        for name, (response, encoding) in responses.items():
+            with self.subTest(name=name):
+                response = self.process(response, encoding)
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_counters_reach_metric_table(self):
+        """Сэкономленные байты и время сжатия попадают в Metric."""
+        self.process(HttpResponse(TEXT))
+        metrics.flush()
+        values = dict(
+            Metric.objects.filter(name__startswith='compression.')
+            .values_list('name', 'value')
+        )
+        self.assertEqual(values['compression.responses'], 1)
+        self.assertGreater(values['compression.bytes_saved'], 0)
+        self.assertIn('compression.cpu_seconds', values)
@@ -0,0 +1,114 @@
+import time
+
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics, throttle
+from core.models import Metric
+from posts.models import Comment, Post, User
+
+
+@override_settings(
+    RATE_LIMITS={'comment': (2, 60), 'post': (2, 60), 'follow': (2, 60)},
+    RATE_LIMIT_IP_FACTOR=2,
+    WRITE_CONCURRENCY=2,
+)
+class ThrottleTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.post = Post.objects.create(author=cls.author, text='Тест-пост')
+        cls.COMMENT_URL = reverse(
+            'posts:add_comment', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        caches['shared'].clear()
+        metrics.reset()
+
+    def client_for(self, username):
+        client = Client()
+        client.force_login(User.objects.create_user(username=username))
+        return client
+
+    def comment(self, client):
+        return client.post(ThrottleTests.COMMENT_URL, {'text': 'Коммент'})
+
+    def test_user_bucket(self):
+        """Сверх лимита пользователь получает 429 с Retry-After."""
+        client = self.client_for('reader')
+        for _ in range(2):
+            self.assertEqual(self.comment(client).status_code, 302)
+        response = self.comment(client)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(metrics.snapshot()['throttle.throttled.comment'], 1)
+        self.assertEqual(
+            client.get(reverse('posts:post_create')).status_code, 200
+        )
+
+    def test_ip_bucket(self):
+        """Ведро IP общее для всех пользователей с этого адреса."""
+        first, second = self.client_for('first'), self.client_for('second')
+        for client in (first, first, second, second):
+            self.assertEqual(self.comment(client).status_code, 302)
+        self.assertEqual(
+            self.comment(self.client_for('third')).status_code, 429
+        )
+
+    def test_gate_sheds_load(self):
+        """При занятом шлюзе запись сразу получает 429."""
+        client = self.client_for('reader')
+        slots = [throttle.SLOT_KEY.format(i) for i in range(2)]
+        caches['shared'].set_many({key: 'busy' for key in slots})
+        response = self.comment(client)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(metrics.snapshot()['throttle.shed'], 1)
+        caches['shared'].delete(slots[1])
+        self.assertEqual(self.comment(client).status_code, 302)
+        self.assertEqual(
+            caches['shared'].get_many(slots), {slots[0]: 'busy'}
+        )
+
+    def test_lost_slot_expires(self):
+        """Место упавшего запроса освобождается по сроку, а не живёт,
+        пока идут другие записи."""
+        with override_settings(WRITE_GATE_TIMEOUT=0.2):
+            lost = throttle.enter()
+            self.assertIsNotNone(throttle.enter())
+            self.assertIsNone(throttle.enter())
+            time.sleep(0.3)
+            lease = throttle.enter()
+        self.assertIsNotNone(lease)
+        throttle.leave(lease)
+        self.assertEqual(caches['shared'].get(lost[0]), None)
+
+    def test_refused_bucket_not_charged(self):
+        """Отказ по ведру IP не тратит жетоны ведра пользователя."""
+        first, second = self.client_for('first'), self.client_for('second')
+        for client in (first, first, second, second):
+            self.comment(client)
+        third = self.client_for('third')
+        self.assertEqual(self.comment(third).status_code, 429)
+        key = throttle.BUCKET_KEY.format(
+            'comment', 'user', User.objects.get(username='third').pk
+        )
+        self.assertIsNone(caches['shared'].get(key))
+
+    def test_counters_saved_for_admin(self):
+        """Отказы попадают в общую таблицу счётчиков."""
+        client = self.client_for('reader')
+        for _ in range(3):
+            self.comment(client)
+        metrics.flush()
+        self.assertEqual(
+            Metric.objects.get(name='throttle.throttled.comment').value, 1
+        )
+        metrics.flush()
+        self.assertEqual(
+            Metric.objects.get(name='throttle.throttled').value, 1
+        )
@@ -0,0 +1,129 @@
+"""Ограничение частоты и числа одновременных запросов на запись.
+
+У каждого пользователя и каждого IP на каждую область (scope) своё
+ведро жетонов в кэше THROTTLE_CACHE_ALIAS, общем для всех процессов
+(проверка core.E001): ведро вмещает N жетонов и наполняется за период
+из RATE_LIMITS. Ведро IP в RATE_LIMIT_IP_FACTOR раз больше, чтобы не
+мешать пользователям за одним NAT. Жетон берётся из обоих вёдер, только
+если в обоих он есть, - отказ по одному не тратит другое. Чтение и
+запись ведра не атомарны, поэтому при одновременных запросах одного
+клиента лимит может быть превышен на несколько запросов.
+
+Вдобавок все процессы делят WRITE_CONCURRENCY мест для выполняемых
+записей: если все заняты, запрос сразу получает 429, а не ждёт в очереди
+к единственному писателю SQLite. Место - отдельный ключ, занимаемый
+через add и живущий WRITE_GATE_TIMEOUT секунд, так что место,
+потерянное упавшим процессом, освобождается само, даже когда остальные
+места всё время заняты. В memcached add атомарен; файловый кэш этого не
+гарантирует, и в редкой гонке место могут занять двое.
+
+Отказы и сброс нагрузки считаются в core.metrics и видны в админке.
+"""
+import functools
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import metrics
+
+BUCKET_KEY = 'throttle:{}:{}:{}'
+SLOT_KEY = 'throttle:writes:{}'
+
+
+def shared_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+def level(key, capacity, period, now):
+    """Жетонов в ведре на момент now."""
+    tokens, updated = shared_cache().get(key, (capacity, now))
+    return min(capacity, tokens + (now - updated) * capacity / period)
+
+
+def retry_after(request, scope):
+    capacity, period = settings.RATE_LIMITS[scope]
+    now = time.time()
+    buckets = [(
+        BUCKET_KEY.format(scope, 'ip', request.META.get('REMOTE_ADDR')),
+        capacity * settings.RATE_LIMIT_IP_FACTOR,
+    )]
+    if request.user.is_authenticated:
+        buckets.insert(
+            0, (BUCKET_KEY.format(scope, 'user', request.user.pk), capacity)
+        )
+    levels = [
+        (key, size, level(key, size, period, now)) for key, size in buckets
+    ]
+    waits = [
+        math.ceil((1 - tokens) * period / size)
+        for key, size, tokens in levels if tokens < 1
+    ]
+    if waits:
+        return max(waits)
+    for key, size, tokens in levels:
+        shared_cache().set(key, (tokens - 1, now), period)
+    return 0
+
+
+def enter():
+    """Занимает место в шлюзе записей: (ключ, метка) или None, если мест
+    нет. Начинаем со случайного места, чтобы не перебирать занятые."""
+    token = uuid.uuid4().hex
+    start = random.randrange(settings.WRITE_CONCURRENCY)
+    for offset in range(settings.WRITE_CONCURRENCY):
+        key = SLOT_KEY.format(
+            (start + offset) % settings.WRITE_CONCURRENCY
+        )
+        if shared_cache().add(key, token, settings.WRITE_GATE_TIMEOUT):
+            return key, token
+    return None
+
+
+def leave(lease):
+    """Освобождает место, если его не успел занять другой запрос после
+    истечения срока."""
+    key, token = lease
+    if shared_cache().get(key) == token:
+        shared_cache().delete(key)
+
+
+def too_many_requests(seconds):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        content_type='text/plain; charset=utf-8',
+        status=429,
+    )
+    response['Retry-After'] = seconds
+    return response
+
+
+def limit_writes(scope, methods=('POST',)):
+    """Декоратор view на запись: лимит частоты и общий шлюз записей.
+
+    methods=None - ограничивать запросы любым методом (подписка по GET).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is not None and request.method not in methods:
+                return view(request, *args, **kwargs)
+            wait = retry_after(request, scope)
+            if wait:
+                metrics.incr('throttle.throttled')
+                metrics.incr(f'throttle.throttled.{scope}')
+                return too_many_requests(wait)
+            lease = enter()
+            if lease is None:
+                metrics.incr('throttle.shed')
+                return too_many_requests(settings.WRITE_SHED_RETRY_AFTER)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                leave(lease)
+        return wrapper
+    return decorator
@@ -1,8 +1,31 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseNotFound
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.html import escape
+
+NOT_FOUND_KEY = 'not-found:{}'
+PATH_PLACEHOLDER = '__not_found_path__'
 
 
 def page_not_found(request, exception):
-    return render(request, 'core/404.html', {'path': request.path}, status=404)
+    """Гостям отдаём заранее отрисованную страницу, подставляя адрес."""
+    if request.user.is_authenticated:
+        return render(
+            request, 'core/404.html', {'path': request.path}, status=404
+        )
+    match = request.resolver_match
+    key = NOT_FOUND_KEY.format(match.view_name if match else '')
+    content = cache.get(key)
+    if content is None:
+        content = render_to_string(
+            'core/404.html', {'path': PATH_PLACEHOLDER}, request
+        )
+        cache.set(key, content, settings.NOT_FOUND_CACHE_TIMEOUT)
+    return HttpResponseNotFound(
+        content.replace(PATH_PLACEHOLDER, escape(request.path))
+    )
 
 
 def csrf_failure(request, reason=''):
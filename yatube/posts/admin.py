@@ -1,23 +1,256 @@
+import hashlib
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.db import connection
+from django.shortcuts import render
+
+from core import bulk, deletion
+
+from .forms import GroupPkChoiceField, group_choices
+from .models import Post, Group, PostTerm
+from .related import tokenize
+
+CURSOR_VAR = 'after'
+COUNT_KEY = 'admin-count:{}'
+
+
+def estimated_count(queryset):
+    """Примерное число строк выборки без COUNT(*) на каждую загрузку.
+
+    Для всей таблицы на PostgreSQL берём оценку планировщика, иначе -
+    COUNT(*), закэшированный на ADMIN_COUNT_CACHE_TIMEOUT секунд.
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return int(row[0])
+    key = COUNT_KEY.format(
+        hashlib.md5(str(queryset.query).encode()).hexdigest()
+    )
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class CursorChangeList(ChangeList):
+    """Список записей по убыванию id со ссылкой «дальше» вместо номеров
+    страниц: страница читается по индексу, без OFFSET."""
+    cursor_pagination = True
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        if CURSOR_VAR not in (new_params or {}):
+            remove = [CURSOR_VAR] + list(remove or [])
+        return super().get_query_string(new_params, remove)
+
+    def get_results(self, request):
+        queryset = self.queryset.order_by('-pk')
+        cursor = request.GET.get(CURSOR_VAR, '')
+        if cursor.isdigit():
+            queryset = queryset.filter(pk__lt=int(cursor))
+        ids = list(
+            queryset.values_list('pk', flat=True)[:self.list_per_page + 1]
+        )
+        self.next_cursor = None
+        if len(ids) > self.list_per_page:
+            ids = ids[:self.list_per_page]
+            self.next_cursor = ids[-1]
+        self.result_list = queryset.filter(pk__in=ids)
+        self.result_count = estimated_count(self.queryset)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = bool(cursor) or self.next_cursor is not None
+        self.paginator = self.model_admin.get_paginator(
+            request, self.result_list, self.list_per_page
+        )
+        self.first_page_url = self.get_query_string()
+        self.next_page_url = self.next_cursor and self.get_query_string(
+            {CURSOR_VAR: self.next_cursor}
+        )
+
+
+class ReassignGroupForm(forms.Form):
+    group = GroupPkChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        label='Новая группа',
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].choices = group_choices()
+
 
-from .models import Post, Group
+class BackgroundActionsMixin:
+    """Массовые действия, которые ставятся в очередь и выполняются
+    пачками в фоне."""
 
+    def enqueue(self, request, name, queryset, **params):
+        action = bulk.enqueue(name, queryset, request.user, **params)
+        self.message_user(
+            request,
+            f'Действие «{action}» поставлено в очередь: '
+            f'{action.total} объектов. Прогресс - в разделе '
+            f'«Массовые действия».'
+        )
 
-class PostAdmin(admin.ModelAdmin):
+    def delete_in_background(self, request, queryset):
+        self.enqueue(request, 'delete_posts', queryset)
+    delete_in_background.short_description = 'Удалить выбранные в фоне'
+
+
+class DuplicateFilter(admin.SimpleListFilter):
+    """Записи, помеченные как копии, скрыты с сайта до решения
+    модератора."""
+    title = 'копия'
+    parameter_name = 'duplicate'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Копии'), ('no', 'Оригиналы'))
+
+    def queryset(self, request, queryset):
+        if self.value() in ('yes', 'no'):
+            return queryset.filter(
+                duplicate_of__isnull=self.value() == 'no'
+            )
+        return queryset
+
+
+class PostAdmin(BackgroundActionsMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
         'pub_date',
         'author',
         'group',
+        'duplicate_of',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group', 'duplicate_of')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', DuplicateFilter)
+    readonly_fields = ('duplicate_of',)
     empty_value_display = '-пусто-'
+    actions = (
+        'reassign_group',
+        'delete_in_background',
+        'regenerate_thumbnails',
+        'clear_duplicate',
+    )
+
+    def reassign_group(self, request, queryset):
+        form = ReassignGroupForm(request.POST if 'apply' in request.POST
+                                 else None)
+        if form.is_valid():
+            group = form.cleaned_data['group']
+            self.enqueue(
+                request, 'reassign_group', queryset,
+                group_id=group.pk if group else None,
+            )
+            return None
+        return render(request, 'admin/posts/post/reassign_group.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Перенести записи в другую группу',
+            'opts': self.model._meta,
+            'form': form,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+        })
+    reassign_group.short_description = 'Перенести в другую группу в фоне'
+
+    def regenerate_thumbnails(self, request, queryset):
+        self.enqueue(
+            request, 'regenerate_thumbnails', queryset.exclude(image='')
+        )
+    regenerate_thumbnails.short_description = 'Пересоздать миниатюры в фоне'
+
+    def clear_duplicate(self, request, queryset):
+        count = queryset.exclude(duplicate_of=None).update(duplicate_of=None)
+        self.message_user(request, f'Опубликовано записей: {count}.')
+    clear_duplicate.short_description = 'Снять пометку копии'
+
+    def get_changelist(self, request, **kwargs):
+        if settings.ADMIN_HIGH_VOLUME:
+            return CursorChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_sortable_by(self, request):
+        if settings.ADMIN_HIGH_VOLUME:
+            return ()
+        return super().get_sortable_by(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по целым словам через индекс PostTerm вместо
+        LIKE '%...%' по всей таблице; число ищется как id записи."""
+        if not settings.ADMIN_HIGH_VOLUME:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if search_term.isascii() and search_term.isdigit():
+            return queryset.filter(pk=int(search_term)), False
+        terms = tokenize(search_term)
+        if not terms:
+            # В запросе нет слов, попадающих в индекс (короткие, с
+            # цифрами): ищем обычным способом, а не показываем всё.
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        for term in terms:
+            queryset = queryset.filter(pk__in=PostTerm.objects.filter(
+                term=term
+            ).values('post_id'))
+        return queryset, False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """Группы для list_editable берутся из кэша, а не запросом на
+        каждую строку."""
+        if db_field.name != 'group':
+            return super().formfield_for_foreignkey(
+                db_field, request, **kwargs
+            )
+        field = db_field.formfield(form_class=GroupPkChoiceField, **kwargs)
+        field.choices = group_choices()
+        return field
+
+
+class ScheduledDeletionMixin:
+    """Удаление, которое сразу скрывает объекты, а зависимые строки
+    удаляет в фоне пачками."""
+
+    def delete_in_background(self, request, queryset):
+        for obj in queryset:
+            deletion.schedule(obj, request.user)
+        self.message_user(
+            request,
+            f'Скрыто и поставлено в очередь на удаление: {len(queryset)}. '
+            f'Прогресс - в разделе «Удаления».'
+        )
+    delete_in_background.short_description = 'Удалить выбранные в фоне'
 
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(ScheduledDeletionMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'title',
@@ -28,6 +261,7 @@ class GroupAdmin(admin.ModelAdmin):
     list_filter = ('title',)
     prepopulated_fields = {'slug': ('title',)}
     empty_value_display = '-пусто-'
+    actions = ('delete_in_background',)
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,186 @@
+"""Автодополнение по префиксу для пользователей, групп и тегов.
+
+Каждый индекс - отсортированный список кортежей
+(ключ в нижнем регистре, значение, подпись); поиск по префиксу -
+bisect и проход вперёд, пока ключ начинается с префикса.
+Индексы строятся лениво из базы и обновляются сигналами моделей.
+Каждое изменение получает номер версии и кладётся в кэш
+AUTOCOMPLETE_CACHE_ALIAS, общий для всех процессов сервера; другие
+процессы применяют пропущенные изменения по порядку. Заново из базы
+индекс строится, только если изменение уже пропало из кэша или их
+накопилось больше AUTOCOMPLETE_MAX_REPLAY.
+"""
+import bisect
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Group, PostTag, User
+
+VERSION_KEY = 'autocomplete-version:{}'
+CHANGE_KEY = 'autocomplete-change:{}:{}'
+
+
+class PrefixIndex:
+    def __init__(self, entries=()):
+        self.entries = sorted(set(entries))
+
+    def add(self, entry):
+        index = bisect.bisect_left(self.entries, entry)
+        if index == len(self.entries) or self.entries[index] != entry:
+            self.entries.insert(index, entry)
+
+    def remove_value(self, value):
+        self.entries = [entry for entry in self.entries if entry[1] != value]
+
+    def search(self, prefix, limit):
+        """До limit пар (значение, подпись) с ключом на prefix."""
+        prefix = prefix.lower()
+        results = {}
+        index = bisect.bisect_left(self.entries, (prefix,))
+        while index < len(self.entries) and len(results) < limit:
+            key, value, label = self.entries[index]
+            if not key.startswith(prefix):
+                break
+            results.setdefault(value, label)
+            index += 1
+        return list(results.items())
+
+
+def user_entries(username, full_name=''):
+    return [(username.lower(), username, full_name or username)]
+
+
+def group_entries(title, slug):
+    return [(title.lower(), slug, title), (slug.lower(), slug, title)]
+
+
+def tag_entries(tag):
+    return [(tag, tag, f'#{tag}')]
+
+
+def load_users():
+    entries = []
+    for username, first_name, last_name in User.objects.filter(
+        is_active=True
+    ).values_list(
+        'username', 'first_name', 'last_name'
+    ).iterator():
+        entries += user_entries(username, f'{first_name} {last_name}'.strip())
+    return entries
+
+
+def load_groups():
+    entries = []
+    for title, slug in Group.objects.filter(hidden=False).values_list(
+        'title', 'slug'
+    ).iterator():
+        entries += group_entries(title, slug)
+    return entries
+
+
+def load_tags():
+    entries = []
+    for tag in PostTag.objects.values_list('tag', flat=True).distinct():
+        entries += tag_entries(tag)
+    return entries
+
+
+LOADERS = {
+    'users': load_users,
+    'groups': load_groups,
+    'tags': load_tags,
+}
+
+_indexes = {}
+_versions = {}
+_lock = threading.Lock()
+
+
+def shared_cache():
+    return caches[settings.AUTOCOMPLETE_CACHE_ALIAS]
+
+
+def current_version(kind):
+    """Версия индекса kind. Потерянный кэшем счётчик начинается со
+    случайного числа, чтобы не совпасть с версией старого индекса."""
+    key = VERSION_KEY.format(kind)
+    version = shared_cache().get(key)
+    if version is None:
+        shared_cache().add(key, random.getrandbits(48), None)
+        version = shared_cache().get(key)
+    return version
+
+
+def pending_changes(kind, start, stop):
+    """Изменения с номерами start..stop или None, если какого-то нет."""
+    if stop - start + 1 > settings.AUTOCOMPLETE_MAX_REPLAY:
+        return None
+    keys = [
+        CHANGE_KEY.format(kind, number) for number in range(start, stop + 1)
+    ]
+    found = shared_cache().get_many(keys)
+    if len(found) != len(keys):
+        return None
+    return [found[key] for key in keys]
+
+
+def apply_change(index, remove_values, entries):
+    for value in remove_values:
+        index.remove_value(value)
+    for entry in entries:
+        index.add(entry)
+
+
+def get_index(kind):
+    """Индекс kind с применёнными изменениями других процессов."""
+    version = current_version(kind)
+    with _lock:
+        current = _versions.get(kind)
+        if kind in _indexes and current == version:
+            return _indexes[kind]
+        changes = (
+            kind in _indexes and current < version
+            and pending_changes(kind, current + 1, version)
+        )
+        if changes:
+            for remove_values, entries in changes:
+                apply_change(_indexes[kind], remove_values, entries)
+        else:
+            _indexes[kind] = PrefixIndex(LOADERS[kind]())
+        _versions[kind] = version
+        return _indexes[kind]
+
+
+def change(kind, remove_values=(), entries=()):
+    """Публикует изменение индекса для всех процессов и применяет его
+    в своём вместе с пропущенными чужими."""
+    key = VERSION_KEY.format(kind)
+    shared_cache().add(key, random.getrandbits(48), None)
+    try:
+        version = shared_cache().incr(key)
+    except ValueError:
+        version = None
+    if version is None:
+        index = get_index(kind)
+        with _lock:
+            apply_change(index, remove_values, entries)
+        return
+    shared_cache().set(
+        CHANGE_KEY.format(kind, version),
+        (list(remove_values), list(entries)),
+        settings.AUTOCOMPLETE_CHANGE_TIMEOUT,
+    )
+    get_index(kind)
+
+
+def search(kind, prefix, limit):
+    return get_index(kind).search(prefix, limit)
+
+
+def reset():
+    with _lock:
+        _indexes.clear()
+        _versions.clear()
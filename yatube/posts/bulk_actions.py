@@ -0,0 +1,54 @@
+"""Обработчики фоновых массовых действий над записями и группами."""
+from sorl.thumbnail import delete, get_thumbnail
+
+from core import bulk, deletion
+
+from .models import Group, Post, User
+
+# Те же параметры, что у {% thumbnail %} в шаблонах записей.
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@bulk.register('reassign_group')
+def reassign_group(ids, group_id=None):
+    """Переносит записи в группу; сигналы обновляют ленты и
+    статистику."""
+    group = Group.objects.filter(pk=group_id).first() if group_id else None
+    for post in Post.objects.filter(pk__in=ids):
+        post.group = group
+        post.save(update_fields=['group'])
+
+
+@bulk.register('delete_posts')
+def delete_posts(ids):
+    Post.objects.filter(pk__in=ids).delete()
+
+
+@bulk.register('delete_groups')
+def delete_groups(ids):
+    """Действие, поставленное в очередь до фонового удаления: группы
+    уходят в тот же сервис, что и из админки."""
+    for group in Group.objects.filter(pk__in=ids, hidden=False):
+        deletion.schedule(group)
+
+
+@deletion.hider(User)
+def hide_user(user):
+    """Пользователь не может войти, а его профиль отдаёт 404."""
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+
+
+@deletion.hider(Group)
+def hide_group(group):
+    """Группа пропадает из каталога, подсказок и формы записи."""
+    group.hidden = True
+    group.save(update_fields=['hidden'])
+
+
+@bulk.register('regenerate_thumbnails')
+def regenerate_thumbnails(ids):
+    for post in Post.objects.filter(pk__in=ids).exclude(image=''):
+        delete(post.image, delete_file=False)
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
@@ -0,0 +1,149 @@
+"""Поиск почти одинаковых записей по MinHash и LSH.
+
+Текст режется на шинглы из трёх слов. Подпись - минимумы хешей шинглов
+для DEDUP_PERMUTATIONS случайных перестановок; доля совпавших позиций
+двух подписей оценивает сходство Жаккара их шинглов. Подпись делится на
+DEDUP_BANDS полос, хеш каждой полосы хранится в PostBand: кандидаты -
+записи, у которых совпала хотя бы одна полоса. Число кандидатов
+ограничено DEDUP_MAX_CANDIDATES, поэтому проверка новой записи не
+зависит от размера таблицы.
+"""
+import functools
+import hashlib
+import random
+import re
+import zlib
+from array import array
+
+from django.conf import settings
+
+from .models import PostBand, PostSignature
+
+WORD_RE = re.compile(r'\w+')
+SHINGLE_SIZE = 3
+PRIME = (1 << 61) - 1
+
+
+@functools.lru_cache(maxsize=None)
+def coefficients(count):
+    """Параметры перестановок (a * x + b) mod PRIME, одни для всех
+    процессов."""
+    generator = random.Random(count)
+    return tuple(
+        (generator.randrange(1, PRIME), generator.randrange(PRIME))
+        for _ in range(count)
+    )
+
+
+def shingles(text):
+    words = WORD_RE.findall(text.lower())
+    return {
+        ' '.join(words[index:index + SHINGLE_SIZE])
+        for index in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(text):
+    """MinHash-подпись текста; None, если текст слишком короткий."""
+    found = shingles(text)
+    if len(found) < settings.DEDUP_MIN_SHINGLES:
+        return None
+    hashes = [zlib.crc32(shingle.encode()) for shingle in found]
+    return array('q', (
+        min((a * value + b) % PRIME for value in hashes)
+        for a, b in coefficients(settings.DEDUP_PERMUTATIONS)
+    ))
+
+
+def load(raw):
+    return array('q', bytes(raw))
+
+
+def bands(minhash):
+    """Пары (полоса, корзина) для LSH-индекса."""
+    rows = len(minhash) // settings.DEDUP_BANDS
+    result = []
+    for band in range(settings.DEDUP_BANDS):
+        digest = hashlib.blake2b(
+            minhash[band * rows:(band + 1) * rows].tobytes(), digest_size=8
+        ).digest()
+        result.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return result
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def find_duplicates(minhashes, earlier_only=False, exclude=()):
+    """Для {id: подпись} находит {id: id самой похожей записи}.
+
+    Сходство должно быть не ниже DEDUP_THRESHOLD; при равенстве
+    выбирается более ранняя запись. С earlier_only сравниваем только с
+    записями, у которых id меньше.
+    """
+    wanted = {}
+    for post_id, minhash in minhashes.items():
+        for key in bands(minhash):
+            wanted.setdefault(key, []).append(post_id)
+    if not wanted:
+        return {}
+    limit = settings.DEDUP_MAX_CANDIDATES
+    rows = PostBand.objects.filter(
+        bucket__in={bucket for _, bucket in wanted}
+    ).exclude(post_id__in=exclude).order_by('post_id').values_list(
+        'band', 'bucket', 'post_id'
+    )[:limit * len(wanted)]
+    candidates = {}
+    for band, bucket, other_id in rows:
+        for post_id in wanted.get((band, bucket), ()):
+            found = candidates.setdefault(post_id, set())
+            if (other_id != post_id and len(found) < limit
+                    and not (earlier_only and other_id > post_id)):
+                found.add(other_id)
+    stored = dict(PostSignature.objects.filter(
+        post_id__in=set().union(*candidates.values())
+    ).values_list('post_id', 'minhash'))
+    result = {}
+    for post_id, found in candidates.items():
+        scores = [
+            (similarity(minhashes[post_id], load(stored[other_id])), -other_id)
+            for other_id in found if other_id in stored
+        ]
+        if scores:
+            score, other_id = max(scores)
+            if score >= settings.DEDUP_THRESHOLD:
+                result[post_id] = -other_id
+    return result
+
+
+def find_duplicate(text, exclude=None):
+    """id уже опубликованной записи, почти совпадающей с text."""
+    minhash = signature(text)
+    if minhash is None:
+        return None
+    return find_duplicates(
+        {0: minhash}, exclude=[exclude] if exclude else ()
+    ).get(0)
+
+
+def index_posts(posts):
+    """Заменяет подписи и корзины пачки записей."""
+    post_ids = [post.pk for post in posts]
+    PostBand.objects.filter(post_id__in=post_ids).delete()
+    PostSignature.objects.filter(post_id__in=post_ids).delete()
+    minhashes = {}
+    for post in posts:
+        minhash = signature(post.text)
+        if minhash is not None:
+            minhashes[post.pk] = minhash
+    PostSignature.objects.bulk_create(
+        PostSignature(post_id=post_id, minhash=minhash.tobytes())
+        for post_id, minhash in minhashes.items()
+    )
+    PostBand.objects.bulk_create(
+        PostBand(post_id=post_id, band=band, bucket=bucket)
+        for post_id, minhash in minhashes.items()
+        for band, bucket in bands(minhash)
+    )
+    return minhashes
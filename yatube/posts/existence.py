@@ -0,0 +1,173 @@
+"""Быстрый ответ 404 для несуществующих записей, групп и авторов.
+
+В каждом процессе держим фильтр Блума по id записей, slug групп и
+именам пользователей. Если значения в фильтре нет, страница заведомо
+не существует, и 404 отдаётся без запросов к базе.
+
+Отрицательному ответу можно верить, только если фильтр знает обо всех
+новых значениях. Поэтому каждое добавление получает номер версии в
+общем кэше EXISTENCE_CACHE_ALIAS, а само значение кладётся туда же под
+этим номером. Перед проверкой процесс догоняет версию, добавляя
+пропущенные значения; если какое-то уже пропало из кэша или их больше
+EXISTENCE_MAX_REPLAY, фильтр строится заново, а пока он строится,
+проверка уходит в базу. Сборка - запрос по всей таблице, поэтому она
+идёт вне блокировки и только в одном потоке процесса. Раз в
+EXISTENCE_REBUILD_INTERVAL секунд фильтр тоже строится заново, чтобы
+выбросить удалённые значения. Id записей растут, поэтому id больше
+максимального на момент сборки тоже считаем возможным - это покрывает
+bulk_create, который не шлёт сигналов.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.bloom import BloomFilter
+from .models import Group, Post, User
+
+VERSION_KEY = 'exists-version:{}'
+CHANGE_KEY = 'exists-change:{}:{}'
+
+SOURCES = {
+    'post': (Post, 'pk'),
+    'group': (Group, 'slug'),
+    'user': (User, 'username'),
+}
+
+_filters = {}
+_building = set()
+_lock = threading.Lock()
+
+
+def shared_cache():
+    return caches[settings.EXISTENCE_CACHE_ALIAS]
+
+
+class Existence:
+    def __init__(self, kind, version):
+        model, field = SOURCES[kind]
+        values = list(
+            model._default_manager.values_list(field, flat=True)
+        )
+        self.bloom = BloomFilter(
+            max(len(values) * 2, settings.EXISTENCE_MIN_CAPACITY),
+            settings.EXISTENCE_ERROR_RATE,
+        )
+        for value in values:
+            self.bloom.add(value)
+        self.high_water = max(values, default=0) if kind == 'post' else None
+        self.version = version
+        self.built = time.monotonic()
+
+    def __contains__(self, value):
+        if self.high_water is not None and value > self.high_water:
+            return True
+        return value in self.bloom
+
+
+def current_version(kind):
+    """Версия значений kind. Потерянный кэшем счётчик начинается со
+    случайного числа, чтобы не совпасть с версией старого фильтра."""
+    key = VERSION_KEY.format(kind)
+    version = shared_cache().get(key)
+    if version is None:
+        shared_cache().add(key, random.getrandbits(48), None)
+        version = shared_cache().get(key)
+    return version
+
+
+def pending_changes(kind, start, stop):
+    """Значения с номерами start..stop или None, если какого-то нет."""
+    if stop - start + 1 > settings.EXISTENCE_MAX_REPLAY:
+        return None
+    keys = [
+        CHANGE_KEY.format(kind, number) for number in range(start, stop + 1)
+    ]
+    found = shared_cache().get_many(keys)
+    if len(found) != len(keys):
+        return None
+    return [found[key] for key in keys]
+
+
+def catch_up(existence, kind, version):
+    """Добавляет в фильтр пропущенные значения; False, если не вышло."""
+    if existence.version == version:
+        return True
+    if existence.version > version:
+        return False
+    changes = pending_changes(kind, existence.version + 1, version)
+    if changes is None:
+        return False
+    for value in changes:
+        existence.bloom.add(value)
+    existence.version = version
+    return True
+
+
+def get_filter(kind):
+    """Актуальный фильтр kind или None, если его сейчас строят."""
+    # Версию читаем до базы: значение, добавленное во время сборки,
+    # получит следующий номер и будет добавлено при следующей проверке.
+    version = current_version(kind)
+    with _lock:
+        existence = _filters.get(kind)
+        if existence is not None and (
+            time.monotonic() - existence.built
+            <= settings.EXISTENCE_REBUILD_INTERVAL
+        ) and catch_up(existence, kind, version):
+            return existence
+        if kind in _building:
+            return None
+        _building.add(kind)
+    try:
+        existence = Existence(kind, version)
+    finally:
+        with _lock:
+            _building.discard(kind)
+    with _lock:
+        _filters[kind] = existence
+    return existence
+
+
+def may_exist(kind, value):
+    """False, только если значения точно нет в базе."""
+    existence = get_filter(kind)
+    return existence is None or value in existence
+
+
+def publish(kind, value):
+    cache = shared_cache()
+    key = VERSION_KEY.format(kind)
+    cache.add(key, random.getrandbits(48), None)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # Счётчик пропал: новый начнётся со случайного числа, и фильтры
+        # всех процессов будут построены заново.
+        return
+    cache.set(
+        CHANGE_KEY.format(kind, version), value,
+        settings.EXISTENCE_CHANGE_TIMEOUT,
+    )
+
+
+def remember(kind, value):
+    """Добавляет новое значение в фильтр процесса и сообщает другим.
+
+    Значение публикуется сразу и ещё раз после коммита: фильтр, который
+    другой процесс построил до коммита, иначе не узнал бы о нём.
+    """
+    with _lock:
+        existence = _filters.get(kind)
+        if existence is not None:
+            existence.bloom.add(value)
+    publish(kind, value)
+    transaction.on_commit(lambda: publish(kind, value))
+
+
+def reset():
+    with _lock:
+        _filters.clear()
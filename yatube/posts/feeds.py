@@ -0,0 +1,150 @@
+import copy
+import json
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import scopes
+from .models import Group, Post, User
+
+
+class JsonFeedGenerator(feedgenerator.SyndicationFeed):
+    """Генератор JSON Feed 1.1 (https://jsonfeed.org/version/1.1)."""
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def write(self, outfile, encoding):
+        feed = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.feed['title'],
+            'home_page_url': self.feed['link'],
+            'feed_url': self.feed['feed_url'],
+            'description': self.feed['description'],
+            'items': [
+                {
+                    'id': item['unique_id'] or item['link'],
+                    'url': item['link'],
+                    'title': item['title'],
+                    'content_text': item['description'],
+                    'date_published': item['pubdate'].isoformat(),
+                    'authors': [{'name': item['author_name']}],
+                }
+                for item in self.items
+            ],
+        }
+        outfile.write(json.dumps(feed, ensure_ascii=False).encode(encoding))
+
+
+FEED_TYPES = {
+    'rss': feedgenerator.Rss201rev2Feed,
+    'atom': feedgenerator.Atom1Feed,
+    'json': JsonFeedGenerator,
+}
+
+
+class CachedFeed(Feed):
+    """Лента с условным GET и кэшированием готового ответа.
+
+    Ключ кэша включает отметку изменения ленты из scopes, поэтому
+    сохранение записи сразу делает старый ответ недоступным.
+    """
+
+    def __call__(self, request, fmt, **kwargs):
+        if fmt not in FEED_TYPES:
+            raise Http404('Неизвестный формат ленты.')
+        scope = self.get_scope(**kwargs)
+        modified = scopes.last_modified(scope)
+        etag = f'"{scope}:{fmt}:{modified}"'
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(modified)
+        )
+        if response is not None:
+            return response
+        key = f'feed:{scope}:{fmt}:{modified}'
+        response = cache.get(key)
+        if response is None:
+            feed = copy.copy(self)
+            feed.feed_type = FEED_TYPES[fmt]
+            response = super(CachedFeed, feed).__call__(request, **kwargs)
+            cache.set(key, response, settings.FEED_CACHE_TIMEOUT)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        return response
+
+    def get_scope(self, **kwargs):
+        return scopes.INDEX
+
+    def get_posts(self, obj):
+        return Post.objects.visible().select_related('author', 'group')
+
+    def items(self, obj):
+        return self.get_posts(obj)[:settings.FEED_ITEMS]
+
+    def item_title(self, item):
+        return str(item)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class IndexFeed(CachedFeed):
+    title = 'Yatube: последние обновления'
+    description = 'Новые записи на сайте'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupFeed(CachedFeed):
+    def get_scope(self, slug):
+        return scopes.group_scope(slug)
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug, hidden=False)
+
+    def get_posts(self, obj):
+        return obj.posts.visible().select_related('author', 'group')
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+
+class AuthorFeed(CachedFeed):
+    def get_scope(self, username):
+        return scopes.author_scope(username)
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username, is_active=True)
+
+    def get_posts(self, obj):
+        return obj.posts.visible().select_related('author', 'group')
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
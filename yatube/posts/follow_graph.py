@@ -0,0 +1,346 @@
+"""Граф подписок в виде отсортированных массивов id.
+
+Для каждого пользователя хранятся отсортированные массивы id авторов,
+на которых он подписан, и id его подписчиков. Снимок графа лежит в
+файле в формате CSR (ключи, смещения, значения) и отображается в
+память, поэтому воркеры делят одну копию. Изменения после снимка
+дописываются в журнал; каждый воркер применяет новые записи журнала
+поверх снимка. Повторное применение записи ничего не меняет, так что
+журнал можно читать с любого места до его конца.
+
+После коммита воркер не берёт операцию из сигнала, а под исключающей
+блокировкой журнала читает из базы, есть ли подписка сейчас, и пишет
+это состояние. Так журнал совпадает с Follow, даже если параллельные
+подписка и отписка на одного автора закоммитились в одном порядке, а
+до журнала дошли в обратном.
+
+Когда журнал вырастает больше FOLLOW_GRAPH_COMPACT_BYTES, снимок
+пересобирается из базы, а журнал очищается. Пересборка держит
+исключающую блокировку файла, а дописывание в журнал - разделяемую,
+поэтому ни одна запись не теряется между чтением базы и очисткой.
+"""
+import bisect
+import contextlib
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import connection
+
+MAGIC = b'YTFOLLOW'
+HEADER = struct.Struct('<8s5q')
+RECORD = struct.Struct('<bqq')
+FOLLOW = 1
+UNFOLLOW = 0
+EMPTY = array('q')
+
+
+def intersect(first, second):
+    """Пересечение двух отсортированных массивов слиянием."""
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if first[i] == second[j]:
+            result.append(first[i])
+            i += 1
+            j += 1
+        elif first[i] < second[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def contains(values, value):
+    index = bisect.bisect_left(values, value)
+    return index < len(values) and values[index] == value
+
+
+class Adjacency:
+    """Списки смежности в формате CSR с правками поверх снимка."""
+
+    def __init__(self, keys, offsets, values):
+        self.keys = keys
+        self.offsets = offsets
+        self.values = values
+        self.overrides = {}
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Строит CSR из отсортированных пар (узел, сосед)."""
+        keys, offsets, values = array('q'), array('q'), array('q')
+        previous = None
+        for node, other in pairs:
+            if (node, other) == previous:
+                continue
+            if previous is None or node != previous[0]:
+                keys.append(node)
+                offsets.append(len(values))
+            values.append(other)
+            previous = (node, other)
+        offsets.append(len(values))
+        return cls(keys, offsets, values)
+
+    def get(self, node):
+        if node in self.overrides:
+            return self.overrides[node]
+        index = bisect.bisect_left(self.keys, node)
+        if index < len(self.keys) and self.keys[index] == node:
+            return self.values[self.offsets[index]:self.offsets[index + 1]]
+        return EMPTY
+
+    def add(self, node, other):
+        values = self.get(node)
+        index = bisect.bisect_left(values, other)
+        if index < len(values) and values[index] == other:
+            return
+        values = array('q', values)
+        values.insert(index, other)
+        self.overrides[node] = values
+
+    def remove(self, node, other):
+        values = self.get(node)
+        index = bisect.bisect_left(values, other)
+        if index == len(values) or values[index] != other:
+            return
+        values = array('q', values)
+        del values[index]
+        self.overrides[node] = values
+
+
+@contextlib.contextmanager
+def locked(log_path, operation):
+    """Блокировка журнала через отдельный файл: сам журнал очищается."""
+    with open(f'{log_path}.lock', 'a') as lock:
+        fcntl.flock(lock, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class FollowGraph:
+    def __init__(self, followees, followers, log_path=None, log_offset=0):
+        self._followees = followees
+        self._followers = followers
+        self.log_path = log_path
+        self.log_offset = log_offset
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_pairs(cls, pairs, **kwargs):
+        pairs = sorted(pairs)
+        return cls(
+            Adjacency.from_pairs(pairs),
+            Adjacency.from_pairs(sorted((a, u) for u, a in pairs)),
+            **kwargs,
+        )
+
+    def followees(self, user_id):
+        return self._followees.get(user_id)
+
+    def followers(self, author_id):
+        return self._followers.get(author_id)
+
+    def is_following(self, user_id, author_id):
+        return contains(self._followees.get(user_id), author_id)
+
+    def followees_count(self, user_id):
+        return len(self._followees.get(user_id))
+
+    def followers_count(self, author_id):
+        return len(self._followers.get(author_id))
+
+    def common_followees(self, first_id, second_id):
+        """Авторы, на которых подписаны оба пользователя."""
+        return intersect(
+            self._followees.get(first_id), self._followees.get(second_id)
+        )
+
+    def common_followers(self, first_id, second_id):
+        return intersect(
+            self._followers.get(first_id), self._followers.get(second_id)
+        )
+
+    def apply(self, op, user_id, author_id):
+        with self.lock:
+            if op == FOLLOW:
+                self._followees.add(user_id, author_id)
+                self._followers.add(author_id, user_id)
+            else:
+                self._followees.remove(user_id, author_id)
+                self._followers.remove(author_id, user_id)
+
+    def record(self, op, user_id, author_id):
+        """Применяет изменение и дописывает его в журнал."""
+        self.apply(op, user_id, author_id)
+        if self.log_path:
+            with locked(self.log_path, fcntl.LOCK_SH):
+                self.append(op, user_id, author_id)
+
+    def sync_edge(self, user_id, author_id):
+        """Записывает в журнал состояние подписки, прочитанное из базы.
+
+        Чтение и запись идут под исключающей блокировкой, поэтому
+        последней в журнале оказывается запись, сделанная после всех
+        уже закоммиченных изменений этой пары.
+        """
+        from .models import Follow
+        if not self.log_path:
+            return
+        with locked(self.log_path, fcntl.LOCK_EX):
+            exists = Follow.objects.filter(
+                user_id=user_id, author_id=author_id
+            ).exists()
+            op = FOLLOW if exists else UNFOLLOW
+            self.apply(op, user_id, author_id)
+            self.append(op, user_id, author_id)
+
+    def append(self, op, user_id, author_id):
+        with open(self.log_path, 'ab') as log:
+            log.write(RECORD.pack(op, user_id, author_id))
+
+    def follow(self, user_id, author_id):
+        self.record(FOLLOW, user_id, author_id)
+
+    def unfollow(self, user_id, author_id):
+        self.record(UNFOLLOW, user_id, author_id)
+
+    def refresh(self):
+        """Применяет записи журнала, сделанные другими процессами."""
+        if not self.log_path or not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb') as log:
+            log.seek(self.log_offset)
+            data = log.read()
+        usable = len(data) - len(data) % RECORD.size
+        for op, user_id, author_id in RECORD.iter_unpack(data[:usable]):
+            self.apply(op, user_id, author_id)
+        self.log_offset += usable
+
+
+def write_snapshot(path, pairs, log_offset):
+    """Атомарно записывает снимок графа в path."""
+    graph = FollowGraph.from_pairs(pairs)
+    parts = [
+        graph._followees.keys, graph._followees.offsets,
+        graph._followees.values,
+        graph._followers.keys, graph._followers.offsets,
+        graph._followers.values,
+    ]
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as snapshot:
+        snapshot.write(HEADER.pack(
+            MAGIC, log_offset,
+            len(parts[0]), len(parts[2]), len(parts[3]), len(parts[5]),
+        ))
+        for part in parts:
+            snapshot.write(part.tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path, log_path):
+    """Отображает снимок в память без копирования массивов."""
+    with open(path, 'rb') as snapshot:
+        buffer = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, log_offset, *sizes = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f'{path} не является снимком графа подписок')
+    words = memoryview(buffer).cast('q')
+    position = HEADER.size // 8
+    parts = []
+    for keys_count, values_count in (sizes[:2], sizes[2:]):
+        for length in (keys_count, keys_count + 1, values_count):
+            parts.append(words[position:position + length])
+            position += length
+    graph = FollowGraph(
+        Adjacency(*parts[:3]), Adjacency(*parts[3:]),
+        log_path=log_path, log_offset=log_offset,
+    )
+    graph.refresh()
+    return graph
+
+
+def follow_pairs():
+    from .models import Follow
+    return Follow.objects.values_list('user_id', 'author_id').distinct()
+
+
+def shared_paths():
+    """Пути снимка и журнала или None, если граф не разделяется.
+
+    База в памяти (тесты) не видна другим процессам и откатывается
+    вместе с транзакцией теста, поэтому граф для неё строится заново
+    при каждом обращении.
+    """
+    directory = settings.FOLLOW_GRAPH_DIR
+    in_memory = getattr(connection, 'is_in_memory_db', lambda: False)()
+    if not directory or in_memory:
+        return None
+    return (
+        os.path.join(directory, 'follow_graph.snapshot'),
+        os.path.join(directory, 'follow_graph.log'),
+    )
+
+
+def rebuild_snapshot():
+    """Пересобирает снимок из таблицы Follow и очищает журнал.
+
+    В журнал пишут после коммита, так что под блокировкой база уже
+    содержит всё, что в нём есть. Журнал очищаем до замены снимка:
+    воркер со старым снимком увидит короткий журнал, ничего из него не
+    применит и на следующем обращении загрузит новый снимок.
+    """
+    snapshot_path, log_path = shared_paths()
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    with locked(log_path, fcntl.LOCK_EX):
+        pairs = list(follow_pairs())
+        open(log_path, 'wb').close()
+        write_snapshot(snapshot_path, pairs, 0)
+
+
+def needs_compaction():
+    paths = shared_paths()
+    return paths is not None and os.path.exists(paths[1]) and (
+        os.path.getsize(paths[1]) > settings.FOLLOW_GRAPH_COMPACT_BYTES
+    )
+
+
+_graph = None
+_graph_state = {}
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """Граф подписок процесса, согласованный с журналом."""
+    global _graph
+    with _graph_lock:
+        paths = shared_paths()
+        if paths is None:
+            return FollowGraph.from_pairs(follow_pairs())
+        snapshot_path, log_path = paths
+        if not os.path.exists(snapshot_path):
+            rebuild_snapshot()
+        mtime = os.stat(snapshot_path).st_mtime_ns
+        if _graph is None or _graph_state.get('mtime') != mtime:
+            _graph = load_snapshot(snapshot_path, log_path)
+            _graph_state.update(mtime=mtime, refreshed=time.monotonic())
+        elif (time.monotonic() - _graph_state['refreshed']
+              > settings.FOLLOW_GRAPH_REFRESH):
+            _graph.refresh()
+            _graph_state['refreshed'] = time.monotonic()
+        return _graph
+
+
+def reset():
+    """Сбрасывает граф процесса; следующий вызов get_graph() прочитает
+    его заново."""
+    global _graph
+    with _graph_lock:
+        _graph = None
+        _graph_state.clear()
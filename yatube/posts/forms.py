@@ -1,12 +1,149 @@
+from urllib.parse import quote
+
 from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse_lazy
+
+from . import dedup
+from .models import Post, Comment, Group
+
+GROUP_KEY = 'group:{}'
+GROUP_SLUG_KEY = 'group-slug:{}'
+GROUP_CHOICES_KEY = 'group-choices'
+
+
+def load_group_row(**lookup):
+    row = Group.objects.filter(hidden=False, **lookup).values_list(
+        'pk', 'slug', 'title'
+    ).first()
+    if row is not None:
+        cache.set_many({
+            GROUP_KEY.format(row[0]): row,
+            GROUP_SLUG_KEY.format(quote(row[1])): row[0],
+        }, None)
+    return row
+
+
+def group_row_by_slug(slug):
+    pk = cache.get(GROUP_SLUG_KEY.format(quote(slug)))
+    row = pk is not None and cache.get(GROUP_KEY.format(pk))
+    if row and row[1] == slug:
+        return row
+    return load_group_row(slug=slug)
+
+
+def cached_group(value):
+    """Группа по slug или по pk из кэша; к базе - только при промахе.
+
+    Число - это pk (начальное значение поля). Строку виджет присылает
+    как slug, поэтому сначала ищем по slug (он может состоять из одних
+    цифр), а pk пробуем, только если строка - ASCII-число. Возвращает
+    экземпляр с загруженными id, slug и title.
+    """
+    row = None
+    if not isinstance(value, int):
+        value = str(value)
+        row = group_row_by_slug(value)
+        if row is None and value.isascii() and value.isdigit():
+            value = int(value)
+    if isinstance(value, int):
+        row = cache.get(GROUP_KEY.format(value)) or load_group_row(pk=value)
+    if row is None:
+        return None
+    pk, slug, title = row
+    # from_db ждёт значения в порядке полей модели, а не field_names.
+    return Group.from_db(None, ['id', 'title', 'slug'], (pk, title, slug))
+
+
+def group_choices():
+    """Варианты для <select> групп из кэша."""
+    choices = cache.get(GROUP_CHOICES_KEY)
+    if choices is None:
+        choices = list(
+            Group.objects.filter(hidden=False).order_by('title').values_list(
+                'pk', 'title'
+            )
+        )
+        cache.set(GROUP_CHOICES_KEY, choices, None)
+    return [('', '---------')] + choices
 
-from .models import Post, Comment
+
+def forget_group(group):
+    cache.delete_many([
+        GROUP_KEY.format(group.pk),
+        GROUP_SLUG_KEY.format(quote(group.slug)),
+        GROUP_CHOICES_KEY,
+    ])
+
+
+class GroupAutocompleteWidget(forms.Widget):
+    """Поле поиска группы с подсказками вместо <select> со всеми
+    группами; в форму уходит slug выбранной группы."""
+    template_name = 'posts/widgets/group_autocomplete.html'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        group = cached_group(value) if value else None
+        context['widget'].update(
+            slug=group.slug if group else '',
+            label=group.title if group else '',
+            url=reverse_lazy('posts:autocomplete'),
+        )
+        return context
+
+    def id_for_label(self, id_):
+        return f'{id_}_search' if id_ else id_
+
+
+class GroupChoiceField(forms.ModelChoiceField):
+    """Выбор группы без загрузки списка всех групп."""
+    widget = GroupAutocompleteWidget
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            group = cached_group(value)
+        except (TypeError, ValueError):
+            group = None
+        if group is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice'
+            )
+        return group
+
+
+class GroupPkChoiceField(GroupChoiceField):
+    """Выбор группы из <select> админки: значение - только pk, поэтому
+    slug из цифр не спутать с pk другой группы."""
+    widget = forms.Select
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        value = str(value)
+        if not (value.isascii() and value.isdigit()):
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice'
+            )
+        return super().to_python(int(value))
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'group': GroupChoiceField}
+
+    def clean_text(self):
+        """Находит почти такую же запись; в режиме reject не пускает
+        копию."""
+        text = self.cleaned_data['text']
+        self.duplicate_of = dedup.find_duplicate(text, self.instance.pk)
+        if self.duplicate_of and settings.DEDUP_ACTION == 'reject':
+            raise forms.ValidationError('Похожая запись уже опубликована.')
+        return text
 
 
 class CommentForm(forms.ModelForm):
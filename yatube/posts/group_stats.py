@@ -0,0 +1,163 @@
+"""Статистика сообществ, которая обновляется по мере публикации.
+
+Каталог групп читает только GroupStats и не агрегирует posts_post.
+Число записей за 7 дней складывается из дневных счётчиков
+GroupDailyPosts; команда refresh_group_stats сдвигает окно раз в
+сутки, а с --rebuild пересчитывает всё с нуля.
+"""
+import json
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .models import Group, GroupDailyPosts, GroupStats, Post
+
+WEEK = timedelta(days=7)
+
+SORTS = {
+    'posts': ('-posts_count', '-group_id'),
+    'week': ('-posts_week', '-group_id'),
+    'title': ('group__title', 'group_id'),
+}
+
+
+def week_start():
+    return timezone.localdate() - WEEK + timedelta(days=1)
+
+
+def add_daily(group_id, day, delta):
+    updated = GroupDailyPosts.objects.filter(
+        group_id=group_id, day=day
+    ).update(posts_count=F('posts_count') + delta)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            GroupDailyPosts.objects.create(
+                group_id=group_id, day=day, posts_count=delta
+            )
+    except IntegrityError:
+        add_daily(group_id, day, delta)
+
+
+def post_added(group_id, pub_date):
+    in_week = timezone.localdate(pub_date) >= week_start()
+    GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') + 1,
+        posts_week=F('posts_week') + int(in_week),
+        last_post=Greatest(Coalesce('last_post', pub_date), pub_date),
+    )
+    add_daily(group_id, timezone.localdate(pub_date), 1)
+
+
+def post_removed(group_id, pub_date):
+    in_week = timezone.localdate(pub_date) >= week_start()
+    GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') - 1,
+        posts_week=F('posts_week') - int(in_week),
+    )
+    add_daily(group_id, timezone.localdate(pub_date), -1)
+
+
+def refresh_week():
+    """Пересчитывает записи за 7 дней по дневным счётчикам."""
+    start = week_start()
+    GroupDailyPosts.objects.filter(day__lt=start - WEEK).delete()
+    weekly = dict(
+        GroupDailyPosts.objects.filter(day__gte=start).values(
+            'group_id'
+        ).annotate(total=Sum('posts_count')).values_list(
+            'group_id', 'total'
+        )
+    )
+    GroupStats.objects.exclude(group_id__in=weekly).update(posts_week=0)
+    for group_id, total in weekly.items():
+        GroupStats.objects.filter(group_id=group_id).update(posts_week=total)
+
+
+def rebuild():
+    """Полный пересчёт по таблице записей для обслуживания."""
+    start = week_start()
+    GroupDailyPosts.objects.all().delete()
+    GroupStats.objects.all().delete()
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=row['pk'],
+            posts_count=row['total'],
+            posts_week=row['week'],
+            last_post=row['last'],
+        )
+        for row in Group.objects.values('pk').annotate(
+            total=Count('posts'),
+            week=Count('posts', filter=Q(posts__pub_date__date__gte=start)),
+            last=Max('posts__pub_date'),
+        )
+    )
+    GroupDailyPosts.objects.bulk_create(
+        GroupDailyPosts(
+            group_id=row['group_id'], day=row['day'], posts_count=row['total']
+        )
+        for row in Post.objects.filter(
+            group__isnull=False, pub_date__date__gte=start - WEEK
+        ).annotate(day=TruncDate('pub_date')).order_by().values(
+            'group_id', 'day'
+        ).annotate(total=Count('pk'))
+    )
+
+
+def page(sort, cursor, limit):
+    """Страница каталога, отсортированная по sort, после cursor."""
+    ordering = SORTS[sort]
+    rows = GroupStats.objects.filter(group__hidden=False).select_related(
+        'group'
+    ).order_by(*ordering)
+    if cursor is not None:
+        value, group_id = cursor
+        field = ordering[0].lstrip('-')
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        rows = rows.filter(
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'group_id__{lookup}': group_id})
+        )
+    rows = list(rows[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        value = (
+            last.group.title if sort == 'title'
+            else getattr(last, ordering[0].lstrip('-'))
+        )
+        next_cursor = encode_cursor([value, last.group_id])
+    return rows, next_cursor
+
+
+def encode_cursor(cursor):
+    return urlsafe_base64_encode(json.dumps(cursor).encode())
+
+
+def sort_field(sort):
+    """Поле модели, по которому идёт сортировка sort."""
+    path = SORTS[sort][0].lstrip('-')
+    if path.startswith('group__'):
+        return Group._meta.get_field(path.split('__', 1)[1])
+    return GroupStats._meta.get_field(path)
+
+
+def decode_cursor(raw, sort):
+    """Курсор сортировки sort или None, если его значение не подходит
+    к полю сортировки."""
+    try:
+        value, group_id = json.loads(urlsafe_base64_decode(raw))
+        value = sort_field(sort).to_python(value)
+        group_id = int(group_id)
+    except (ValueError, TypeError, ValidationError):
+        return None
+    if value is None:
+        return None
+    return value, group_id
@@ -0,0 +1,112 @@
+"""Лента «Популярное»: записи по вовлечённости с затуханием во времени.
+
+Каждое событие (публикация, комментарий) весом w в момент t даёт вклад
+w * exp(t / tau). Вес записи хранится в логарифме:
+score = ln(sum(w * exp(t / tau))). Новый вклад добавляется одним
+UPDATE через logaddexp, а порядок по score совпадает с порядком по
+затухающему весу в любой момент времени, поэтому пересчитывать веса
+при каждом запросе не нужно. Периодическая команда rescore_hot_posts
+пересчитывает веса окна заново и удаляет устаревшие строки.
+"""
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from .models import Comment, Post, PostScore, visible_posts
+
+
+def contribution(weight, moment):
+    return math.log(weight) + moment.timestamp() / settings.HOT_DECAY
+
+
+def record_post(post):
+    PostScore.objects.create(
+        post=post, score=contribution(1, post.pub_date)
+    )
+
+
+def record_comment(comment):
+    """Добавляет вклад комментария к весу записи одним UPDATE."""
+    value = contribution(settings.HOT_COMMENT_WEIGHT, comment.created)
+    PostScore.objects.filter(post_id=comment.post_id).update(
+        score=Greatest(F('score'), value)
+        + Ln(1 + Exp(-Abs(F('score') - value)))
+    )
+
+
+def page(cursor=None):
+    """Страница ленты и курсор следующей страницы."""
+    rows = PostScore.objects.filter(visible_posts('post__')).select_related(
+        'post__author', 'post__group'
+    ).order_by('-score', '-post_id')
+    if cursor:
+        score, post_id = cursor
+        rows = rows.filter(
+            Q(score__lt=score) | Q(score=score, post_id__lt=post_id)
+        )
+    rows = list(rows[:settings.NUMBER_ROWS + 1])
+    next_cursor = None
+    if len(rows) > settings.NUMBER_ROWS:
+        rows = rows[:settings.NUMBER_ROWS]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].post_id)
+    return [row.post for row in rows], next_cursor
+
+
+def encode_cursor(score, post_id):
+    return f'{score!r}_{post_id}'
+
+
+def decode_cursor(cursor):
+    try:
+        score, post_id = cursor.rsplit('_', 1)
+        return float(score), int(post_id)
+    except ValueError:
+        return None
+
+
+def rescore(batch_size=500):
+    """Пересчитывает веса записей окна и удаляет записи старше окна."""
+    since = timezone.now() - settings.HOT_WINDOW
+    PostScore.objects.filter(post__pub_date__lt=since).delete()
+    post_ids = list(
+        Post.objects.filter(pub_date__gte=since).values_list('pk', flat=True)
+    )
+    for start in range(0, len(post_ids), batch_size):
+        rescore_batch(post_ids[start:start + batch_size])
+
+
+def rescore_batch(batch):
+    """Пересчитывает пачку в одной транзакции.
+
+    Строки удаляем до чтения комментариев: удаление берёт блокировку
+    на запись, и UPDATE нового комментария ждёт коммита пачки, а не
+    попадает в промежуток между удалением и вставкой. Читатели же видят
+    либо старые веса, либо новые, но не пропавшие записи.
+    """
+    with transaction.atomic():
+        PostScore.objects.filter(post_id__in=batch).delete()
+        scores = {
+            pk: [contribution(1, pub_date)]
+            for pk, pub_date in Post.objects.filter(
+                pk__in=batch
+            ).values_list('pk', 'pub_date')
+        }
+        for post_id, created in Comment.objects.filter(
+            post_id__in=batch
+        ).values_list('post_id', 'created'):
+            scores[post_id].append(
+                contribution(settings.HOT_COMMENT_WEIGHT, created)
+            )
+        PostScore.objects.bulk_create(
+            PostScore(post_id=pk, score=logsumexp(values))
+            for pk, values in scores.items()
+        )
+
+
+def logsumexp(values):
+    top = max(values)
+    return top + math.log(sum(math.exp(value - top) for value in values))
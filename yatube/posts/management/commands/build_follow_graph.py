@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import follow_graph
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает снимок графа подписок из таблицы Follow.'
+
+    def handle(self, *args, **options):
+        if follow_graph.shared_paths() is None:
+            raise CommandError('FOLLOW_GRAPH_DIR не задан.')
+        follow_graph.rebuild_snapshot()
+        self.stdout.write(self.style.SUCCESS('Снимок графа подписок собран.'))
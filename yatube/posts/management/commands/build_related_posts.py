@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import related
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает TF-IDF индекс и похожие записи пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        related.rebuild(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Похожие записи пересчитаны.'))
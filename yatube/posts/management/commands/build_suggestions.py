@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+from posts.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для всех подписчиков.'
+
+    def handle(self, *args, **options):
+        user_ids = list(
+            Follow.objects.values_list('user_id', flat=True)
+            .distinct().order_by('user_id')
+        )
+        suggestions.refresh_all(user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации пересчитаны для {len(user_ids)} пользователей.'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import tags
+
+
+class Command(BaseCommand):
+    help = 'Извлекает теги и упоминания существующих записей пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        done = tags.rebuild(options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Теги обновлены у записей: {done}.')
+        )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import dedup
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает индекс MinHash и помечает почти одинаковые записи '
+        'копиями более ранних.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Сколько записей обрабатывать за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Удалять найденные копии вместо пометки.',
+        )
+
+    def handle(self, *args, **options):
+        roots = {}
+        last_id = 0
+        while True:
+            posts = list(Post.objects.filter(pk__gt=last_id).order_by(
+                'pk'
+            ).only('pk', 'text', 'duplicate_of')[:options['chunk_size']])
+            if not posts:
+                break
+            with transaction.atomic():
+                duplicates = dedup.find_duplicates(
+                    dedup.index_posts(posts), earlier_only=True
+                )
+                for post_id, original_id in duplicates.items():
+                    roots[post_id] = roots.get(original_id, original_id)
+                if options['delete']:
+                    Post.objects.filter(pk__in=duplicates).delete()
+                else:
+                    for post in posts:
+                        post.duplicate_of_id = roots.get(post.pk)
+                    Post.objects.bulk_update(posts, ['duplicate_of'])
+            last_id = posts[-1].pk
+        action = 'Удалено' if options['delete'] else 'Помечено'
+        self.stdout.write(self.style.SUCCESS(f'{action} копий: {len(roots)}.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import group_stats
+
+
+class Command(BaseCommand):
+    help = 'Сдвигает окно статистики групп за 7 дней (запускать раз в сутки).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересчитать статистику по таблице записей целиком.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            group_stats.rebuild()
+        else:
+            group_stats.refresh_week()
+        self.stdout.write(self.style.SUCCESS('Статистика групп обновлена.'))
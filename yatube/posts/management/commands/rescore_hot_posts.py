@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import hot
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает веса ленты «Популярное» и удаляет устаревшие.'
+
+    def handle(self, *args, **options):
+        hot.rescore()
+        self.stdout.write(self.style.SUCCESS('Веса пересчитаны.'))
@@ -0,0 +1,65 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:04
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=row['pk'],
+            posts_count=row['total'],
+            last_post=row['last'],
+        )
+        for row in Group.objects.values('pk').annotate(
+            total=Count('posts'), last=Max('posts__pub_date')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_auto_20261019_0901'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupDailyPosts',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Записей')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Всего записей')),
+                ('posts_week', models.IntegerField(default=0, verbose_name='Записей за 7 дней')),
+                ('last_post', models.DateTimeField(blank=True, null=True, verbose_name='Последняя запись')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['posts_count', 'group'], name='posts_group_posts_c_f5c23a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['posts_week', 'group'], name='posts_group_posts_w_a90baa_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupdailyposts',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_posts', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='groupdailyposts',
+            unique_together={('group', 'day')},
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_auto_20261019_0904'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSignature',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='posts.Post', verbose_name='Запись')),
+                ('minhash', models.BinaryField(verbose_name='Подпись')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='posts.Post', verbose_name='Копия записи'),
+        ),
+        migrations.CreateModel(
+            name='PostBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.SmallIntegerField(verbose_name='Полоса')),
+                ('bucket', models.BigIntegerField(verbose_name='Корзина')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='posts.Post', verbose_name='Запись')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='postband',
+            index=models.Index(fields=['bucket', 'band'], name='posts_postb_bucket_77d2cc_idx'),
+        ),
+    ]
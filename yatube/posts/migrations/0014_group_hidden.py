@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_auto_20261019_0908'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='hidden',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Скрыта до удаления'),
+        ),
+    ]
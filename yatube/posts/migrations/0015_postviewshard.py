@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_group_hidden'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.SmallIntegerField(verbose_name='Шард')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Просмотров')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_shards', to='posts.Post', verbose_name='Запись')),
+            ],
+            options={
+                'unique_together': {('post', 'shard')},
+            },
+        ),
+    ]
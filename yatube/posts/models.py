@@ -1,14 +1,43 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+def visible_posts(prefix=''):
+    """Условие на записи, автор и группа которых не скрыты до удаления,
+    а сама запись не помечена как копия; prefix - путь до записи от
+    запрашиваемой модели."""
+    return (
+        Q(**{f'{prefix}author__is_active': True})
+        & ~Q(**{f'{prefix}group__hidden': True})
+        & Q(**{f'{prefix}duplicate_of__isnull': True})
+    )
+
+
+class PostQuerySet(models.QuerySet):
+    def visible(self):
+        return self.filter(visible_posts())
+
+
+class CommentQuerySet(models.QuerySet):
+    def visible(self):
+        return self.filter(
+            Q(author__is_active=True) & visible_posts('post__')
+        )
+
+
 class Group(models.Model):
     """Класс для создания сообществ."""
     title = models.CharField(max_length=200, verbose_name='Имя группы')
     slug = models.SlugField(unique=True, verbose_name='Адрес')
     description = models.TextField(verbose_name='Описание группы')
+    hidden = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Скрыта до удаления'
+    )
 
     def __str__(self):
         return self.title
@@ -42,6 +71,22 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    spans = models.TextField(
+        default='',
+        editable=False,
+        verbose_name='Разметка тегов и упоминаний'
+    )
+    duplicate_of = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        editable=False,
+        related_name='duplicates',
+        verbose_name='Копия записи'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
@@ -68,6 +113,8 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации комментария')
 
+    objects = CommentQuerySet.as_manager()
+
 
 class Follow(models.Model):
     """Класс для подписки на авторов."""
@@ -83,3 +130,240 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор'
     )
+
+
+class AuthorSuggestion(models.Model):
+    """Класс для хранения рекомендаций авторов для подписки."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='author_suggestions',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    score = models.FloatField(verbose_name='Вес рекомендации')
+
+    class Meta:
+        ordering = ('-score',)
+        indexes = [models.Index(fields=('user', '-score'))]
+
+
+class PostScore(models.Model):
+    """Класс для хранения веса записи в ленте «Популярное»."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='hot_score',
+        verbose_name='Запись'
+    )
+    score = models.FloatField(verbose_name='Вес')
+
+    class Meta:
+        indexes = [models.Index(fields=('score', 'post'))]
+
+
+class Term(models.Model):
+    """Класс для хранения числа записей, в которых встречается слово."""
+    text = models.CharField(max_length=100, unique=True, verbose_name='Слово')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число записей'
+    )
+
+
+class PostTerm(models.Model):
+    """Класс для хранения TF-IDF веса слова в записи."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='terms',
+        verbose_name='Запись'
+    )
+    term = models.CharField(max_length=100, verbose_name='Слово')
+    weight = models.FloatField(verbose_name='Вес')
+
+    class Meta:
+        indexes = [models.Index(fields=('term', 'post'))]
+
+
+class RelatedPost(models.Model):
+    """Класс для хранения похожих записей."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_posts',
+        verbose_name='Запись'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожая запись'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        ordering = ('-score',)
+
+
+class PostTag(models.Model):
+    """Класс для хранения хэштегов записей."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tags',
+        verbose_name='Запись'
+    )
+    tag = models.CharField(max_length=50, verbose_name='Тег')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        indexes = [models.Index(fields=('tag', '-pub_date'))]
+
+
+class PostMention(models.Model):
+    """Класс для хранения упоминаний пользователей в записях."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Запись'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        indexes = [models.Index(fields=('user', '-pub_date'))]
+
+
+class GroupStats(models.Model):
+    """Класс для хранения статистики сообщества."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.IntegerField(
+        default=0,
+        verbose_name='Всего записей'
+    )
+    posts_week = models.IntegerField(
+        default=0,
+        verbose_name='Записей за 7 дней'
+    )
+    last_post = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последняя запись'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=('posts_count', 'group')),
+            models.Index(fields=('posts_week', 'group')),
+        ]
+
+
+class GroupDailyPosts(models.Model):
+    """Класс для хранения числа записей сообщества за день."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='daily_posts',
+        verbose_name='Группа'
+    )
+    day = models.DateField(verbose_name='День')
+    posts_count = models.IntegerField(default=0, verbose_name='Записей')
+
+    class Meta:
+        unique_together = ('group', 'day')
+
+
+class PostSignature(models.Model):
+    """Класс для хранения MinHash-подписи текста записи."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Запись'
+    )
+    minhash = models.BinaryField(verbose_name='Подпись')
+
+
+class PostBand(models.Model):
+    """Класс для LSH-индекса: корзина одной полосы подписи записи."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='bands',
+        verbose_name='Запись'
+    )
+    band = models.SmallIntegerField(verbose_name='Полоса')
+    bucket = models.BigIntegerField(verbose_name='Корзина')
+
+    class Meta:
+        indexes = [models.Index(fields=['bucket', 'band'])]
+
+
+class PostViewShard(models.Model):
+    """Класс для одной из строк-шардов счётчика просмотров записи."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='view_shards',
+        verbose_name='Запись'
+    )
+    shard = models.SmallIntegerField(verbose_name='Шард')
+    count = models.BigIntegerField(default=0, verbose_name='Просмотров')
+
+    class Meta:
+        unique_together = ('post', 'shard')
+
+
+class Reaction(models.Model):
+    """Класс для отметки «нравится» пользователя у записи."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пользователь'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Запись'
+    )
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Дата')
+
+    class Meta:
+        unique_together = ('user', 'post')
+
+
+class PostReactionShard(models.Model):
+    """Класс для одной из строк-шардов счётчика отметок записи."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reaction_shards',
+        verbose_name='Запись'
+    )
+    shard = models.SmallIntegerField(verbose_name='Шард')
+    count = models.IntegerField(default=0, verbose_name='Отметок')
+
+    class Meta:
+        unique_together = ('post', 'shard')
@@ -0,0 +1,137 @@
+"""Отметки «нравится» у записей.
+
+Отметка ставится одним INSERT с пропуском конфликта по (user, post) и
+снимается одним DELETE, поэтому повтор запроса ничего не меняет. Число
+изменённых строк говорит, нужно ли менять счётчик. Счётчик записи
+разбит на REACTION_SHARDS строк, шард выбирается случайно, чтобы
+отметки популярной записи не ждали блокировку одной строки. Сумма
+шардов кэшируется и при изменении правится через incr/decr.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import PostReactionShard, Reaction
+
+COUNT_KEY = 'reactions:{}'
+
+
+def add_to_counter(post_id, delta):
+    shard = random.randrange(settings.REACTION_SHARDS)
+    updated = PostReactionShard.objects.filter(
+        post_id=post_id, shard=shard
+    ).update(count=F('count') + delta)
+    if not updated:
+        try:
+            with transaction.atomic():
+                PostReactionShard.objects.create(
+                    post_id=post_id, shard=shard, count=delta
+                )
+        except IntegrityError:
+            add_to_counter(post_id, delta)
+            return
+    key = COUNT_KEY.format(post_id)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def discount(post_id):
+    """Вычитает отметку, удалённую каскадом, например вместе с
+    пользователем. Шард не создаём: запись могла удаляться сама."""
+    shard_id = PostReactionShard.objects.filter(
+        post_id=post_id, count__gt=0
+    ).values_list('pk', flat=True).first()
+    if shard_id is not None:
+        PostReactionShard.objects.filter(pk=shard_id).update(
+            count=F('count') - 1
+        )
+        cache.delete(COUNT_KEY.format(post_id))
+
+
+def execute(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def react(user_id, post_id):
+    """Ставит отметку; True, если её ещё не было."""
+    ops = connection.ops
+    table = ops.quote_name(Reaction._meta.db_table)
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} {table} '
+        f'(user_id, post_id, created) VALUES (%s, %s, %s)'
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with transaction.atomic():
+        changed = execute(sql, [
+            user_id, post_id,
+            ops.adapt_datetimefield_value(timezone.now()),
+        ]) == 1
+        if changed:
+            add_to_counter(post_id, 1)
+    return changed
+
+
+def unreact(user_id, post_id):
+    """Снимает отметку; True, если она была."""
+    table = connection.ops.quote_name(Reaction._meta.db_table)
+    with transaction.atomic():
+        changed = execute(
+            f'DELETE FROM {table} WHERE user_id = %s AND post_id = %s',
+            [user_id, post_id],
+        ) == 1
+        if changed:
+            add_to_counter(post_id, -1)
+    return changed
+
+
+def set_reaction(user_id, post_id, on):
+    return react(user_id, post_id) if on else unreact(user_id, post_id)
+
+
+def counts(post_ids):
+    """Число отметок записей: из кэша, промахи - одним запросом."""
+    keys = {post_id: COUNT_KEY.format(post_id) for post_id in post_ids}
+    cached = cache.get_many(keys.values())
+    result = {
+        post_id: cached[key] for post_id, key in keys.items() if key in cached
+    }
+    missing = set(keys) - set(result)
+    if missing:
+        loaded = dict(
+            PostReactionShard.objects.filter(post_id__in=missing).values(
+                'post_id'
+            ).annotate(total=Sum('count')).values_list('post_id', 'total')
+        )
+        loaded = {post_id: loaded.get(post_id, 0) for post_id in missing}
+        cache.set_many(
+            {keys[post_id]: total for post_id, total in loaded.items()},
+            settings.REACTION_CACHE_TIMEOUT,
+        )
+        result.update(loaded)
+    return result
+
+
+def reacted_ids(user, post_ids):
+    """id записей страницы, отмеченных пользователем, одним запросом."""
+    if not user.is_authenticated:
+        return set()
+    return set(Reaction.objects.filter(
+        user=user, post_id__in=post_ids
+    ).values_list('post_id', flat=True))
+
+
+def attach(posts, user):
+    post_ids = [post.pk for post in posts]
+    totals = counts(post_ids)
+    reacted = reacted_ids(user, post_ids)
+    for post in posts:
+        post.reactions_count = totals[post.pk]
+        post.reacted = post.pk in reacted
@@ -0,0 +1,188 @@
+"""Похожие записи по косинусному сходству TF-IDF векторов текста.
+
+Векторы хранятся разреженно в таблице PostTerm (слово, вес), которая
+служит и обратным индексом: кандидатов для записи находим по её самым
+весомым словам. Новая или отредактированная запись индексируется
+фоновой задачей posts.update_related; команда build_related_posts
+пересобирает всё пачками, чтобы память не зависела от числа записей.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import Post, PostTerm, RelatedPost, Term, visible_posts
+
+TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+
+
+def tokenize(text):
+    return Counter(word.lower()[:100] for word in TOKEN_RE.findall(text))
+
+
+def vectorize(counts, document_frequency, total):
+    """Нормированный TF-IDF вектор в виде словаря слово -> вес."""
+    weights = {
+        term: (1 + math.log(count)) * math.log(
+            (1 + total) / (1 + document_frequency.get(term, 0))
+        ) + 1e-9
+        for term, count in counts.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {term: weight / norm for term, weight in weights.items()}
+
+
+def query_terms(weights, total, document_frequency):
+    """Самые весомые слова записи, кроме уникальных и слишком частых."""
+    limit = max(
+        settings.RELATED_MAX_DF_RATIO * total, settings.RELATED_MIN_DF_LIMIT
+    )
+    terms = [
+        term for term in weights
+        if 2 <= document_frequency.get(term, 0) <= limit
+    ]
+    return heapq.nlargest(
+        settings.RELATED_QUERY_TERMS, terms, key=weights.get
+    )
+
+
+def nearest(vectors, postings, limit):
+    """Top-K соседей для пачки векторов по общему списку постингов.
+
+    vectors - {post_id: {слово: вес}}, postings - {слово: [(id, вес)]}.
+    """
+    result = {}
+    for post_id, weights in vectors.items():
+        scores = Counter()
+        for term, weight in weights.items():
+            for other_id, other_weight in postings.get(term, ()):
+                if other_id != post_id:
+                    scores[other_id] += weight * other_weight
+        result[post_id] = heapq.nlargest(
+            limit, scores.items(), key=lambda item: item[1]
+        )
+    return result
+
+
+def load_postings(terms):
+    postings = {}
+    for post_id, term, weight in PostTerm.objects.filter(
+        term__in=terms
+    ).order_by('-post_id').values_list('post_id', 'term', 'weight'):
+        term_postings = postings.setdefault(term, [])
+        if len(term_postings) < settings.RELATED_MAX_POSTINGS:
+            term_postings.append((post_id, weight))
+    return postings
+
+
+def store_related(neighbours):
+    RelatedPost.objects.filter(post_id__in=neighbours).delete()
+    RelatedPost.objects.bulk_create(
+        RelatedPost(post_id=post_id, related_id=related_id, score=score)
+        for post_id, pairs in neighbours.items()
+        for related_id, score in pairs
+    )
+
+
+def update_post(post):
+    """Переиндексирует запись и пересчитывает её похожие записи."""
+    counts = tokenize(post.text)
+    old_terms = set(
+        PostTerm.objects.filter(post=post).values_list('term', flat=True)
+    )
+    new_terms = set(counts)
+    Term.objects.filter(text__in=old_terms - new_terms).update(
+        posts_count=F('posts_count') - 1
+    )
+    Term.objects.bulk_create(
+        [Term(text=term) for term in new_terms - old_terms],
+        ignore_conflicts=True,
+    )
+    Term.objects.filter(text__in=new_terms - old_terms).update(
+        posts_count=F('posts_count') + 1
+    )
+    document_frequency = dict(
+        Term.objects.filter(text__in=new_terms).values_list(
+            'text', 'posts_count'
+        )
+    )
+    total = Post.objects.count()
+    weights = vectorize(counts, document_frequency, total)
+    PostTerm.objects.filter(post=post).delete()
+    PostTerm.objects.bulk_create(
+        PostTerm(post=post, term=term, weight=weight)
+        for term, weight in weights.items()
+    )
+    terms = query_terms(weights, total, document_frequency)
+    vector = {term: weights[term] for term in terms}
+    store_related(nearest(
+        {post.pk: vector}, load_postings(terms), settings.RELATED_TOP_K
+    ))
+
+
+def forget_post(post):
+    terms = PostTerm.objects.filter(post=post).values_list('term', flat=True)
+    Term.objects.filter(text__in=list(terms)).update(
+        posts_count=F('posts_count') - 1
+    )
+
+
+def iter_chunks(chunk_size):
+    """Тексты записей пачками по chunk_size."""
+    last_id = 0
+    while True:
+        chunk = list(
+            Post.objects.filter(pk__gt=last_id).order_by('pk').values_list(
+                'pk', 'text'
+            )[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
+
+def rebuild(chunk_size=500):
+    """Пересобирает словарь, векторы и похожие записи пачками."""
+    document_frequency = Counter()
+    total = 0
+    for chunk in iter_chunks(chunk_size):
+        total += len(chunk)
+        for _, text in chunk:
+            document_frequency.update(tokenize(text).keys())
+    Term.objects.all().delete()
+    Term.objects.bulk_create(
+        (Term(text=term, posts_count=count)
+         for term, count in document_frequency.items()),
+        batch_size=chunk_size,
+    )
+    for chunk in iter_chunks(chunk_size):
+        PostTerm.objects.filter(post_id__in=[pk for pk, _ in chunk]).delete()
+        PostTerm.objects.bulk_create(
+            PostTerm(post_id=pk, term=term, weight=weight)
+            for pk, text in chunk
+            for term, weight in vectorize(
+                tokenize(text), document_frequency, total
+            ).items()
+        )
+    for chunk in iter_chunks(chunk_size):
+        vectors = {}
+        for pk, text in chunk:
+            weights = vectorize(tokenize(text), document_frequency, total)
+            terms = query_terms(weights, total, document_frequency)
+            vectors[pk] = {term: weights[term] for term in terms}
+        terms = set().union(*vectors.values())
+        store_related(nearest(
+            vectors, load_postings(terms), settings.RELATED_TOP_K
+        ))
+
+
+def for_post(post):
+    return RelatedPost.objects.filter(
+        visible_posts('related__'), post=post
+    ).select_related(
+        'related'
+    )[:settings.RELATED_SHOWN]
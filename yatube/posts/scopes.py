@@ -0,0 +1,109 @@
+"""Отметки изменений для лент: общей, группы и автора.
+
+Для каждой ленты в кэше хранится время последнего изменения и
+id самой новой записи (high-water mark), поэтому проверить,
+изменилась ли лента, можно без запроса к базе. Все отметки и
+подписки лежат в кэше SCOPES_CACHE_ALIAS, общем для всех процессов, -
+иначе процесс, не видевший сохранения, отдавал бы старую ленту и 304.
+Время изменения пишется сразу и ещё раз после коммита, чтобы ответ,
+собранный до коммита, не остался под новой отметкой. High-water mark
+новая запись удаляет, и следующий запрос считает его заново. Удаление
+тоже повторяется после коммита, а отметка живёт не дольше
+SCOPE_MARK_TIMEOUT секунд, так что значение, посчитанное до коммита,
+не задержится надолго.
+"""
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+
+INDEX = 'index'
+KEY = 'scope-modified:{}'
+HWM_KEY = 'scope-hwm:{}'
+FOLLOWING_KEY = 'following:{}'
+
+
+def shared_cache():
+    return caches[settings.SCOPES_CACHE_ALIAS]
+
+
+def group_scope(slug):
+    return f'group:{quote(slug)}'
+
+
+def author_scope(username):
+    return f'author:{quote(username)}'
+
+
+def post_scopes(post, group_slug=None):
+    """Ленты, в которых показывается запись."""
+    scopes = {INDEX, author_scope(post.author.username)}
+    if post.group_id:
+        scopes.add(group_scope(post.group.slug))
+    if group_slug:
+        scopes.add(group_scope(group_slug))
+    return scopes
+
+
+def touch(scopes):
+    def stamp():
+        now = time.time()
+        shared_cache().set_many(
+            {KEY.format(scope): now for scope in scopes}, None
+        )
+    stamp()
+    transaction.on_commit(stamp)
+
+
+def last_modified(scope):
+    """Время последнего изменения ленты в секундах эпохи.
+
+    Если отметки нет в кэше, ленту считаем изменившейся сейчас.
+    """
+    key = KEY.format(scope)
+    modified = shared_cache().get(key)
+    if modified is None:
+        modified = time.time()
+        shared_cache().add(key, modified, None)
+        modified = shared_cache().get(key, modified)
+    return modified
+
+
+def forget_marks(scopes):
+    """Сбрасывает high-water mark лент сейчас и после коммита."""
+    keys = [HWM_KEY.format(scope) for scope in scopes]
+    shared_cache().delete_many(keys)
+    transaction.on_commit(lambda: shared_cache().delete_many(keys))
+
+
+def high_water_mark(scope, post_list):
+    """id самой новой записи ленты.
+
+    К базе обращаемся только при промахе кэша: post_list вычисляется
+    лениво.
+    """
+    key = HWM_KEY.format(scope)
+    mark = shared_cache().get(key)
+    if mark is None:
+        mark = post_list.aggregate(mark=Max('pk'))['mark'] or 0
+        shared_cache().add(key, mark, settings.SCOPE_MARK_TIMEOUT)
+    return mark
+
+
+def following(user, author_list):
+    """Имена авторов, на которых подписан пользователь."""
+    key = FOLLOWING_KEY.format(user.pk)
+    usernames = shared_cache().get(key)
+    if usernames is None:
+        usernames = list(author_list.values_list('username', flat=True))
+        shared_cache().set(key, usernames, settings.SCOPE_MARK_TIMEOUT)
+    return usernames
+
+
+def forget_following(user_id):
+    key = FOLLOWING_KEY.format(user_id)
+    shared_cache().delete(key)
+    transaction.on_commit(lambda: shared_cache().delete(key))
@@ -0,0 +1,233 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core import jobs
+from . import (
+    autocomplete, dedup, existence, follow_graph, forms, group_stats, hot,
+    reactions, related, scopes, tags,
+)
+from .models import Follow, Group, GroupStats, Post, Reaction, User
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, **kwargs):
+    """Запоминаем прежнюю группу, чтобы обновить её ленту и статистику."""
+    instance._old_group_id = instance._old_group_slug = None
+    if instance.pk:
+        instance._old_group_id, instance._old_group_slug = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'group__slug'
+            ).first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def touch_post_scopes(sender, instance, created=False, **kwargs):
+    post_scopes = scopes.post_scopes(
+        instance, getattr(instance, '_old_group_slug', None)
+    )
+    scopes.touch(post_scopes)
+    if created:
+        scopes.forget_marks(post_scopes)
+        hot.record_post(instance)
+
+
+def text_saved(update_fields):
+    """Сохраняется ли текст: индексы текста не трогаем, если
+    save(update_fields=...) меняет только другие поля."""
+    return update_fields is None or 'text' in update_fields
+
+
+@receiver(pre_save, sender=Post)
+def update_spans(sender, instance, update_fields=None, **kwargs):
+    if text_saved(update_fields):
+        tags.update_spans(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_tags(sender, instance, update_fields=None, **kwargs):
+    if text_saved(update_fields):
+        tags.update_index(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_related(sender, instance, update_fields=None, **kwargs):
+    """Индекс похожих записей считает воркер: задача ставится в той же
+    транзакции и станет видна ему после коммита."""
+    if text_saved(update_fields):
+        jobs.enqueue_once('posts.update_related', instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def update_signature(sender, instance, update_fields=None, **kwargs):
+    if text_saved(update_fields):
+        dedup.index_posts([instance])
+
+
+@receiver(pre_delete, sender=Post)
+def forget_related(sender, instance, **kwargs):
+    related.forget_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def forget_following(sender, instance, **kwargs):
+    scopes.forget_following(instance.user_id)
+
+
+def record_follow_edge(instance):
+    """Переносит состояние подписки из базы в граф после коммита."""
+    if follow_graph.shared_paths() is None:
+        return
+
+    def record():
+        follow_graph.get_graph().sync_edge(
+            instance.user_id, instance.author_id
+        )
+        if follow_graph.needs_compaction():
+            jobs.enqueue_once('posts.compact_follow_graph')
+
+    transaction.on_commit(record)
+
+
+@receiver(post_save, sender=Follow)
+def add_follow_edge(sender, instance, created, **kwargs):
+    if created:
+        record_follow_edge(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow_edge(sender, instance, **kwargs):
+    record_follow_edge(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def schedule_suggestions(sender, instance, **kwargs):
+    transaction.on_commit(lambda: jobs.enqueue_once(
+        'posts.refresh_suggestions', instance.user_id
+    ))
+
+
+@receiver(pre_save, sender=User)
+def remember_old_username(sender, instance, update_fields=None, **kwargs):
+    """Прежнее имя: запись индекса под ним нужно убрать при смене."""
+    instance._old_username = None
+    if instance.pk and (
+        update_fields is None or 'username' in update_fields
+    ):
+        instance._old_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(pre_save, sender=Group)
+def remember_old_slug(sender, instance, **kwargs):
+    instance._old_slug = instance.pk and Group.objects.filter(
+        pk=instance.pk
+    ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def autocomplete_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    entries = instance.is_active and autocomplete.user_entries(
+        instance.username, instance.get_full_name()
+    ) or ()
+    removed = {instance.username, getattr(instance, '_old_username', None)}
+    transaction.on_commit(lambda: autocomplete.change(
+        'users', remove_values=removed - {None}, entries=entries
+    ))
+
+
+@receiver(post_save, sender=Group)
+def autocomplete_group(sender, instance, **kwargs):
+    entries = not instance.hidden and autocomplete.group_entries(
+        instance.title, instance.slug
+    ) or ()
+    removed = {instance.slug, getattr(instance, '_old_slug', None)}
+    transaction.on_commit(lambda: autocomplete.change(
+        'groups', remove_values=removed - {None}, entries=entries
+    ))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def autocomplete_remove(sender, instance, **kwargs):
+    kind, value = (
+        ('users', instance.username) if sender is User
+        else ('groups', instance.slug)
+    )
+    transaction.on_commit(
+        lambda: autocomplete.change(kind, remove_values=[value])
+    )
+
+
+@receiver(post_save, sender=Post)
+def autocomplete_tags(sender, instance, update_fields=None, **kwargs):
+    if not text_saved(update_fields):
+        return
+    entries = [
+        entry
+        for _, _, kind, value in tags.load_spans(instance)
+        if kind == tags.TAG
+        for entry in autocomplete.tag_entries(value)
+    ]
+    if entries:
+        transaction.on_commit(
+            lambda: autocomplete.change('tags', entries=entries)
+        )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_cached_group(sender, instance, **kwargs):
+    forms.forget_group(instance)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Post)
+def update_group_stats(sender, instance, created, **kwargs):
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if created or old_group_id != instance.group_id:
+        if old_group_id:
+            group_stats.post_removed(old_group_id, instance.pub_date)
+        if instance.group_id:
+            group_stats.post_added(instance.group_id, instance.pub_date)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_group_stats(sender, instance, **kwargs):
+    if instance.group_id:
+        group_stats.post_removed(instance.group_id, instance.pub_date)
+
+
+@receiver(post_delete, sender=Reaction)
+def discount_reaction(sender, instance, **kwargs):
+    reactions.discount(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def remember_post(sender, instance, created, **kwargs):
+    if created:
+        existence.remember('post', instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def remember_group(sender, instance, **kwargs):
+    existence.remember('group', instance.slug)
+
+
+@receiver(post_save, sender=User)
+def remember_user(sender, instance, **kwargs):
+    existence.remember('user', instance.username)
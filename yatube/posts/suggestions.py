@@ -0,0 +1,74 @@
+"""Рекомендации авторов для подписки.
+
+Вес кандидата складывается из двух частей:
+- друзья друзей: за каждого автора, на которого подписан кто-то из
+  моих авторов, +1;
+- совместные подписки: подписчики моих авторов голосуют за своих
+  авторов с весом 1 / число подписчиков общего автора, чтобы
+  популярные авторы не забивали рекомендации.
+Рекомендации считаются пачками и хранятся как top-K на пользователя,
+поэтому на странице их читает один запрос.
+"""
+import heapq
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from . import follow_graph
+from .models import AuthorSuggestion
+
+CO_FOLLOW_WEIGHT = 0.5
+
+
+def compute(graph, user_id, limit):
+    """Top-K авторов для user_id в виде списка (author_id, score)."""
+    followees = graph.followees(user_id)
+    scores = Counter()
+    for author_id in followees:
+        for candidate in graph.followees(author_id):
+            scores[candidate] += 1
+        followers = graph.followers(author_id)
+        fanout = followers[:settings.SUGGESTIONS_MAX_FANOUT]
+        weight = CO_FOLLOW_WEIGHT / len(followers)
+        for follower_id in fanout:
+            if follower_id == user_id:
+                continue
+            for candidate in graph.followees(follower_id):
+                scores[candidate] += weight
+    scores.pop(user_id, None)
+    for author_id in followees:
+        scores.pop(author_id, None)
+    return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def refresh(user_ids, graph=None):
+    """Пересчитывает рекомендации пользователей пачкой."""
+    graph = graph or follow_graph.get_graph()
+    limit = settings.SUGGESTIONS_TOP_K
+    rows = [
+        AuthorSuggestion(user_id=user_id, author_id=author_id, score=score)
+        for user_id in user_ids
+        for author_id, score in compute(graph, user_id, limit)
+    ]
+    with transaction.atomic():
+        AuthorSuggestion.objects.filter(user_id__in=user_ids).delete()
+        AuthorSuggestion.objects.bulk_create(
+            rows, batch_size=settings.SUGGESTIONS_BATCH_SIZE
+        )
+
+
+def refresh_all(user_ids):
+    """Пересчитывает рекомендации всех user_ids пачками."""
+    graph = follow_graph.get_graph()
+    batch_size = settings.SUGGESTIONS_BATCH_SIZE
+    for start in range(0, len(user_ids), batch_size):
+        refresh(user_ids[start:start + batch_size], graph)
+
+
+def for_user(user):
+    return AuthorSuggestion.objects.filter(
+        user=user, author__is_active=True
+    ).select_related(
+        'author'
+    )[:settings.SUGGESTIONS_SHOWN]
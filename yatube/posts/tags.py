@@ -0,0 +1,99 @@
+"""Хэштеги и упоминания в тексте записей.
+
+При сохранении записи теги и упоминания извлекаются один раз:
+позиции в тексте сохраняются в Post.spans для ссылок при выводе,
+а сами теги и упоминания - в таблицы с индексами (тег, дата) и
+(пользователь, дата) для лент.
+"""
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Post, PostMention, PostTag
+
+TAG_RE = re.compile(r'(?<![\w#])#(\w{1,50})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w+-]+(?:\.[\w+-]+)*)')
+TAG = 't'
+MENTION = 'm'
+
+User = get_user_model()
+
+
+def normalize_tag(name):
+    return name.lower()
+
+
+def extract(text):
+    """Позиции тегов и упоминаний существующих пользователей."""
+    spans = [
+        (match.start(), match.end(), TAG, normalize_tag(match.group(1)))
+        for match in TAG_RE.finditer(text)
+    ]
+    mentions = [
+        (match.start(), match.end(), match.group(1))
+        for match in MENTION_RE.finditer(text)
+    ]
+    if mentions:
+        users = dict(User.objects.filter(
+            username__in={username for _, _, username in mentions}
+        ).values_list('username', 'pk'))
+        spans.extend(
+            (start, end, MENTION, username)
+            for start, end, username in mentions
+            if username in users
+        )
+    return sorted(spans)
+
+
+def update_spans(post):
+    post.spans = json.dumps(extract(post.text), ensure_ascii=False)
+
+
+def load_spans(post):
+    return json.loads(post.spans) if post.spans else []
+
+
+def update_index(post):
+    """Перезаписывает теги и упоминания записи."""
+    spans = load_spans(post)
+    PostTag.objects.filter(post=post).delete()
+    PostMention.objects.filter(post=post).delete()
+    PostTag.objects.bulk_create(
+        PostTag(post=post, tag=tag, pub_date=post.pub_date)
+        for tag in {value for _, _, kind, value in spans if kind == TAG}
+    )
+    usernames = {value for _, _, kind, value in spans if kind == MENTION}
+    if usernames:
+        PostMention.objects.bulk_create(
+            PostMention(post=post, user_id=user_id, pub_date=post.pub_date)
+            for user_id in User.objects.filter(
+                username__in=usernames
+            ).values_list('pk', flat=True)
+        )
+
+
+def rebuild(chunk_size=500):
+    """Заново извлекает теги и упоминания всех записей пачками.
+
+    Нужна для записей, сохранённых до появления тегов, и после смены
+    правил разбора. Возвращает число обработанных записей.
+    """
+    last_id = 0
+    done = 0
+    while True:
+        chunk = list(
+            Post.objects.filter(pk__gt=last_id).order_by('pk').only(
+                'pk', 'text', 'pub_date', 'spans'
+            )[:chunk_size]
+        )
+        if not chunk:
+            return done
+        with transaction.atomic():
+            for post in chunk:
+                update_spans(post)
+                Post.objects.filter(pk=post.pk).update(spans=post.spans)
+                update_index(post)
+        done += len(chunk)
+        last_id = chunk[-1].pk
@@ -0,0 +1,41 @@
+"""Фоновые задачи записей."""
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core import jobs
+
+from . import follow_graph, related, suggestions
+from .bulk_actions import THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS
+from .models import Post
+
+
+@jobs.task('posts.warm_thumbnail', queue='images')
+def warm_thumbnail(post_id):
+    """Готовит миниатюру заранее, чтобы её не строил первый просмотр."""
+    post = Post.objects.filter(pk=post_id).exclude(image='').first()
+    if post is not None:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@jobs.task('posts.compact_follow_graph')
+def compact_follow_graph():
+    """Переносит журнал графа подписок в новый снимок."""
+    if follow_graph.needs_compaction():
+        follow_graph.rebuild_snapshot()
+
+
+@jobs.task('posts.refresh_suggestions')
+def refresh_suggestions(user_id):
+    """Пересчитывает рекомендации пользователя и его подписчиков:
+    у них поменялись друзья друзей."""
+    followers = follow_graph.get_graph().followers(user_id)
+    suggestions.refresh(
+        [user_id, *followers[:settings.SUGGESTIONS_MAX_FANOUT]]
+    )
+
+
+@jobs.task('posts.update_related')
+def update_related(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        related.update_post(post)
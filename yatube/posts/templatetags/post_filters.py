@@ -0,0 +1,32 @@
+from django import template
+from django.template.defaultfilters import linebreaksbr
+from django.urls import reverse
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from posts import tags
+
+register = template.Library()
+
+LINKS = {
+    tags.TAG: ('posts:tag_posts', 'name'),
+    tags.MENTION: ('posts:profile', 'username'),
+}
+
+
+@register.filter
+def linkify(post):
+    """Текст записи со ссылками на теги и упомянутых пользователей."""
+    parts = []
+    position = 0
+    for start, end, kind, value in tags.load_spans(post):
+        url_name, kwarg = LINKS[kind]
+        parts.append(escape(post.text[position:start]))
+        parts.append(format_html(
+            '<a href="{}">{}</a>',
+            reverse(url_name, kwargs={kwarg: value}),
+            post.text[start:end],
+        ))
+        position = end
+    parts.append(escape(post.text[position:]))
+    return linebreaksbr(mark_safe(''.join(parts)), autoescape=False)
@@ -0,0 +1,132 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import bulk, jobs
+
+from posts.admin import ReassignGroupForm
+from posts.models import Group, GroupStats, Post, User
+
+CHANGELIST_URL = reverse('admin:posts_post_changelist')
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Тест-группа', slug='test-slug', description='Тест-описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.admin, text=f'Кошки пост {i}', group=cls.group
+            )
+            for i in range(3)
+        ]
+        jobs.work(burst=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(PostAdminTests.admin)
+
+    def changelist_ids(self, data=None):
+        response = self.client.get(CHANGELIST_URL, data or {})
+        self.assertEqual(response.status_code, 200)
+        result_list = response.context['cl'].result_list
+        return response, [post.pk for post in result_list]
+
+    def test_cursor_pages(self):
+        """Страницы листаются по id без номеров страниц."""
+        newest, *_, oldest = reversed(PostAdminTests.posts)
+        post_admin = admin.site._registry[Post]
+        with mock.patch.object(post_admin, 'list_per_page', 2):
+            response, first = self.changelist_ids()
+            self.assertEqual(len(first), 2)
+            self.assertEqual(first[0], newest.pk)
+            next_cursor = response.context['cl'].next_cursor
+            response, second = self.changelist_ids({'after': next_cursor})
+        self.assertEqual(second, [oldest.pk])
+        self.assertIsNone(response.context['cl'].next_cursor)
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов не зависит от числа строк на странице."""
+        self.changelist_ids()
+        with CaptureQueriesContext(connection) as few:
+            self.changelist_ids()
+        for i in range(5):
+            Post.objects.create(
+                author=PostAdminTests.admin, text=f'Пост {i}',
+                group=PostAdminTests.group,
+            )
+        cache.clear()
+        self.changelist_ids()
+        with CaptureQueriesContext(connection) as many:
+            self.changelist_ids()
+        self.assertEqual(len(many), len(few))
+
+    def test_search_uses_word_index(self):
+        """Поиск находит записи по слову и по id."""
+        Post.objects.create(author=PostAdminTests.admin, text='Собаки')
+        _, found = self.changelist_ids({'q': 'кошки'})
+        self.assertCountEqual(
+            found, [post.pk for post in PostAdminTests.posts]
+        )
+        post = PostAdminTests.posts[0]
+        _, found = self.changelist_ids({'q': str(post.pk)})
+        self.assertEqual(found, [post.pk])
+        _, found = self.changelist_ids({'q': 'т 0'})
+        self.assertEqual(found, [post.pk])
+
+    def test_group_chosen_by_pk(self):
+        """В админке значение группы - pk, даже если у другой группы
+        такой же slug из цифр."""
+        other = Group.objects.create(
+            title='Другая группа', slug='other', description='-'
+        )
+        Group.objects.create(
+            title='Цифры', slug=str(other.pk), description='-'
+        )
+        form = ReassignGroupForm(data={'group': str(other.pk)})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], other)
+        form = ReassignGroupForm(data={'group': 'other'})
+        self.assertFalse(form.is_valid())
+
+    def test_background_actions(self):
+        """Перенос и удаление ставятся в очередь и выполняются в фоне."""
+        other = Group.objects.create(
+            title='Другая группа', slug='other', description='Тест-описание'
+        )
+        moved, deleted, _ = PostAdminTests.posts
+        response = self.client.post(CHANGELIST_URL, {
+            'action': 'reassign_group',
+            '_selected_action': [moved.pk],
+        })
+        self.assertContains(response, 'Другая группа')
+        self.client.post(CHANGELIST_URL, {
+            'action': 'reassign_group',
+            '_selected_action': [moved.pk],
+            'apply': 'Перенести',
+            'group': other.pk,
+        })
+        self.client.post(CHANGELIST_URL, {
+            'action': 'delete_in_background',
+            '_selected_action': [deleted.pk],
+        })
+        self.assertEqual(Post.objects.get(pk=moved.pk).group, self.group)
+        self.assertEqual(bulk.run_pending(), 2)
+        self.assertEqual(Post.objects.get(pk=moved.pk).group, other)
+        self.assertFalse(Post.objects.filter(pk=deleted.pk).exists())
+        self.assertEqual(GroupStats.objects.get(group=other).posts_count, 1)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 1
+        )
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import autocomplete
+from posts.models import Group, Post, User
+
+AUTOCOMPLETE_URL = reverse('posts:autocomplete')
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='testAuthor', first_name='Анна'
+        )
+        User.objects.create_user(username='another')
+        Group.objects.create(
+            title='Тест-группа', slug='cats', description='Тест-описание'
+        )
+        Post.objects.create(author=cls.author, text='#testing #tea')
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        autocomplete.reset()
+
+    def search(self, kind, prefix):
+        return Client().get(
+            AUTOCOMPLETE_URL, {'kind': kind, 'q': prefix}
+        ).json()['results']
+
+    def test_prefix_search(self):
+        """Подсказки ищутся по началу имени, названия, адреса и тега."""
+        self.assertEqual(
+            self.search('users', 'TEST'),
+            [{'value': 'testAuthor', 'label': 'Анна'}],
+        )
+        for prefix in ('тест', 'ca'):
+            with self.subTest(prefix=prefix):
+                self.assertEqual(
+                    self.search('groups', prefix),
+                    [{'value': 'cats', 'label': 'Тест-группа'}],
+                )
+        self.assertEqual(
+            [item['value'] for item in self.search('tags', 'te')],
+            ['tea', 'testing'],
+        )
+
+    def test_incremental_change(self):
+        """Изменения применяются к индексу без перестроения."""
+        autocomplete.get_index('groups')
+        autocomplete.change(
+            'groups',
+            remove_values=['cats'],
+            entries=autocomplete.group_entries('Кошки', 'cats'),
+        )
+        self.assertEqual(self.search('groups', 'тест'), [])
+        self.assertEqual(
+            self.search('groups', 'кош'),
+            [{'value': 'cats', 'label': 'Кошки'}],
+        )
+
+    def test_other_process_replays_changes(self):
+        """Отставший процесс применяет опубликованные изменения, не
+        перестраивая индекс из базы."""
+        autocomplete.get_index('users')
+        autocomplete.change(
+            'users', entries=autocomplete.user_entries('newcomer')
+        )
+        index = autocomplete._indexes['users']
+        index.remove_value('newcomer')
+        autocomplete._versions['users'] -= 1
+        with mock.patch.dict(autocomplete.LOADERS, users=mock.Mock()):
+            self.assertEqual(
+                self.search('users', 'new'),
+                [{'value': 'newcomer', 'label': 'newcomer'}],
+            )
+            autocomplete.LOADERS['users'].assert_not_called()
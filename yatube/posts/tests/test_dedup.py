@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import dedup
+from posts.models import Post, User
+
+POST_CREATE_URL = reverse('posts:post_create')
+SPAM = ' '.join(f'слово{i}' for i in range(40))
+
+
+class DedupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.original = Post.objects.create(author=cls.author, text=SPAM)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(DedupTests.author)
+
+    def test_find_duplicate(self):
+        """Почти такой же текст находится, другой и короткий - нет."""
+        self.assertEqual(
+            dedup.find_duplicate(SPAM + ' купите!'), DedupTests.original.pk
+        )
+        self.assertIsNone(dedup.find_duplicate(SPAM, DedupTests.original.pk))
+        self.assertIsNone(dedup.find_duplicate(
+            ' '.join(f'другое{i}' for i in range(40))
+        ))
+        self.assertIsNone(dedup.find_duplicate('Тест-пост'))
+
+    def test_create_flags_duplicate(self):
+        """Копия публикуется с пометкой о совпадении."""
+        self.authorized_client.post(
+            POST_CREATE_URL, {'text': SPAM + ' купите!'}
+        )
+        post = Post.objects.latest('pk')
+        self.assertEqual(post.duplicate_of, DedupTests.original)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+        admin = Client()
+        admin.force_login(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        ))
+        response = admin.get(
+            reverse('admin:posts_post_changelist'), {'duplicate': 'yes'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+
+    @override_settings(DEDUP_ACTION='reject')
+    def test_create_rejects_duplicate(self):
+        """В режиме reject копия не публикуется."""
+        count = Post.objects.count()
+        response = self.authorized_client.post(
+            POST_CREATE_URL, {'text': SPAM + ' купите!'}
+        )
+        self.assertFormError(
+            response, 'form', 'text', 'Похожая запись уже опубликована.'
+        )
+        self.assertEqual(Post.objects.count(), count)
+
+    def test_dedupe_command(self):
+        """Команда помечает копии самой ранней записью, а с --delete
+        удаляет их."""
+        copies = [
+            Post.objects.create(
+                author=DedupTests.author, text=SPAM + ' купите' * i
+            )
+            for i in (1, 2)
+        ]
+        Post.objects.filter(pk__in=[copy.pk for copy in copies]).update(
+            duplicate_of=None
+        )
+        call_command('dedupe_posts', chunk_size=1, stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.filter(
+                duplicate_of=DedupTests.original
+            ).order_by('pk')),
+            copies,
+        )
+        call_command('dedupe_posts', delete=True, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(
+            pk__in=[copy.pk for copy in copies]
+        ).exists())
@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import bulk, deletion, jobs
+from core.models import Deletion
+from posts.models import Comment, Follow, Group, GroupStats, Post, User
+
+
+@override_settings(DELETION_BATCH_SIZE=2)
+class DeletionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тест-группа', slug='test-slug', description='Тест-описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=author, text=f'Тест-пост {i}', group=cls.group
+            )
+            for i, author in enumerate([cls.spammer] * 5 + [cls.reader])
+        ]
+        Comment.objects.create(
+            post=cls.posts[-1], author=cls.spammer, text='Спам'
+        )
+        Follow.objects.create(user=cls.spammer, author=cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.spammer)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_user_hidden_then_deleted_in_batches(self):
+        """Профиль скрывается сразу, а записи, комментарии и подписки
+        удаляются в фоне."""
+        spammer = DeletionTests.spammer
+        task = deletion.schedule(spammer)
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': 'spammer'})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Post.objects.filter(author=spammer).count(), 5)
+        jobs.work(burst=True)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Deletion.DONE)
+        self.assertEqual(task.processed, task.total)
+        self.assertGreaterEqual(task.total, 8)
+        self.assertFalse(User.objects.filter(pk=spammer.pk).exists())
+        self.assertFalse(Comment.objects.filter(author=spammer).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_group_hidden_then_detached(self):
+        """Группа скрывается сразу, а записи остаются без группы."""
+        group = DeletionTests.group
+        deletion.schedule(group)
+        response = Client().get(
+            reverse('posts:group_list', kwargs={'slug': group.slug})
+        )
+        self.assertEqual(response.status_code, 404)
+        jobs.work(burst=True)
+        self.assertFalse(Group.objects.filter(pk=group.pk).exists())
+        self.assertFalse(GroupStats.objects.filter(group_id=group.pk).exists())
+        self.assertEqual(Post.objects.filter(group__isnull=True).count(), 6)
+
+    def test_hidden_user_content_not_shown(self):
+        """Записи и комментарии скрытого автора пропадают из лент,
+        страницы записи и API ещё до удаления."""
+        deletion.schedule(DeletionTests.spammer)
+        client = Client()
+        response = client.get(reverse('posts:index'))
+        self.assertEqual(
+            [post.author for post in response.context['page_obj']],
+            [DeletionTests.reader],
+        )
+        response = client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': DeletionTests.posts[0].pk}
+        ))
+        self.assertEqual(response.status_code, 404)
+        response = client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': DeletionTests.posts[-1].pk}
+        ))
+        self.assertEqual(list(response.context['comments']), [])
+        response = client.get(reverse('api:post_list'))
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_hidden_group_posts_not_shown(self):
+        deletion.schedule(DeletionTests.group)
+        response = Client().get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_queued_delete_groups_action(self):
+        """Действие delete_groups из старой очереди передаёт группы
+        фоновому удалению."""
+        bulk.enqueue('delete_groups', Group.objects.all())
+        jobs.work(burst=True)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(
+            Deletion.objects.get().object_id, DeletionTests.group.pk
+        )
@@ -0,0 +1,97 @@
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.bloom import BloomFilter
+from posts import existence
+from posts.models import Group, Post, User
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        """Добавленные значения всегда найдены, чужие - почти никогда."""
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'value-{i}')
+        self.assertTrue(all(f'value-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class ExistenceTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.group = Group.objects.create(title='Тест-группа', slug='test')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        existence.reset()
+        self.client = Client()
+
+    def test_missing_pages_without_queries(self):
+        """404 для несуществующих страниц отдаётся без запросов к базе."""
+        missing_post = Post.objects.create(
+            author=ExistenceTests.author, text='Удалённый пост'
+        )
+        post_id = missing_post.pk
+        missing_post.delete()
+        Post.objects.create(author=ExistenceTests.author, text='Новый пост')
+        urls = [
+            reverse('posts:post_detail', kwargs={'post_id': post_id}),
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+        ]
+        cache.clear()
+        existence.reset()
+        for url in urls:
+            self.client.get(url)
+        for url in urls:
+            with self.subTest(url=url):
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn(url, response.content.decode())
+
+    def test_new_objects_found(self):
+        """Созданные после сборки фильтра объекты доступны сразу."""
+        self.client.get(reverse('posts:group_list', kwargs={'slug': 'x'}))
+        Group.objects.create(title='Новая группа', slug='new')
+        User.objects.create_user(username='newcomer')
+        for url in (
+            reverse('posts:group_list', kwargs={'slug': 'new'}),
+            reverse('posts:profile', kwargs={'username': 'newcomer'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_recent_values_shared_through_cache(self):
+        """Значения, добавленные другим процессом, видны через кэш."""
+        self.assertFalse(existence.may_exist('group', 'elsewhere'))
+        existence.publish('group', 'elsewhere')
+        self.assertTrue(existence.may_exist('group', 'elsewhere'))
+        self.assertFalse(existence.may_exist('group', 'later'))
+
+    def test_lost_change_falls_back_to_database(self):
+        """Если пропущенное значение пропало из кэша, фильтр строится
+        заново, а не отвечает 404 по устаревшим данным."""
+        self.assertFalse(existence.may_exist('group', 'elsewhere'))
+        Group.objects.bulk_create([Group(title='Чужая', slug='elsewhere')])
+        existence.publish('group', 'elsewhere')
+        version = existence.current_version('group')
+        caches['shared'].delete(existence.CHANGE_KEY.format('group', version))
+        self.assertTrue(existence.may_exist('group', 'elsewhere'))
+        self.assertEqual(existence.get_filter('group').version, version)
+
+    def test_not_found_page_escapes_path(self):
+        """Заранее отрисованная страница экранирует адрес запроса."""
+        self.client.get('/missing/')
+        response = self.client.get('/missing/%3Cb%3E/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('/missing/&lt;b&gt;/', response.content.decode())
@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import scopes
+from posts.models import Group, Post, User
+
+
+class PostFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.group = Group.objects.create(
+            title='Тест-группа',
+            slug='test-slug',
+            description='Тест-описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Большой тест-пост',
+            group=cls.group,
+        )
+        cls.GROUP_FEED_URL = reverse(
+            'posts:group_feed', kwargs={'slug': 'test-slug', 'fmt': 'rss'}
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.guest_client = Client()
+
+    def test_feed_formats(self):
+        """Ленты отдаются в форматах RSS, Atom и JSON Feed."""
+        urls = {
+            reverse('posts:index_feed', kwargs={'fmt': 'rss'}): 'rss+xml',
+            reverse('posts:index_feed', kwargs={'fmt': 'atom'}): 'atom+xml',
+            reverse(
+                'posts:author_feed',
+                kwargs={'username': 'testAuthor', 'fmt': 'json'}
+            ): 'feed+json',
+        }
+        for url, content_type in urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn(content_type, response['Content-Type'])
+                self.assertIn('Большой тест-пост', response.content.decode())
+        response = self.guest_client.get(
+            reverse('posts:index_feed', kwargs={'fmt': 'xml'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_conditional_get_and_cache(self):
+        """Повторный запрос с ETag получает 304 без запросов к базе."""
+        response = self.guest_client.get(PostFeedsTests.GROUP_FEED_URL)
+        with self.assertNumQueries(0):
+            cached = self.guest_client.get(
+                PostFeedsTests.GROUP_FEED_URL,
+                HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(cached.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_feed_invalidated_on_post_save(self):
+        """Новая запись группы сбрасывает кэш ленты группы."""
+        response = self.guest_client.get(PostFeedsTests.GROUP_FEED_URL)
+        Post.objects.create(
+            author=PostFeedsTests.author,
+            text='Свежий тест-пост',
+            group=PostFeedsTests.group,
+        )
+        fresh = self.guest_client.get(
+            PostFeedsTests.GROUP_FEED_URL,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(fresh.status_code, HTTPStatus.OK)
+        self.assertIn('Свежий тест-пост', fresh.content.decode())
+
+    def test_stamp_shared_between_processes(self):
+        """Отметка изменения берётся из общего кэша: ответ процесса,
+        который не видел сохранения, тоже устаревает."""
+        response = self.guest_client.get(PostFeedsTests.GROUP_FEED_URL)
+        scope = scopes.group_scope(PostFeedsTests.group.slug)
+        caches['shared'].set(
+            scopes.KEY.format(scope), scopes.last_modified(scope) + 1
+        )
+        fresh = self.guest_client.get(
+            PostFeedsTests.GROUP_FEED_URL,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(fresh.status_code, HTTPStatus.OK)
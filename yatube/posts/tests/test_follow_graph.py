@@ -0,0 +1,187 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from posts import follow_graph, suggestions
+from posts.models import Follow, Post, User
+
+
+class FollowGraphTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.snapshot_path = os.path.join(self.directory, 'graph.snapshot')
+        self.log_path = os.path.join(self.directory, 'graph.log')
+        follow_graph.write_snapshot(
+            self.snapshot_path, [(1, 2), (1, 3), (4, 3), (4, 2), (5, 1)], 0
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def load(self):
+        return follow_graph.load_snapshot(self.snapshot_path, self.log_path)
+
+    def test_queries(self):
+        """Проверки подписки, счётчики и пересечения."""
+        graph = self.load()
+        self.assertTrue(graph.is_following(1, 2))
+        self.assertFalse(graph.is_following(2, 1))
+        self.assertEqual(graph.followees_count(1), 2)
+        self.assertEqual(graph.followers_count(3), 2)
+        self.assertEqual(graph.common_followees(1, 4), [2, 3])
+        self.assertEqual(graph.common_followers(2, 3), [1, 4])
+        self.assertEqual(list(graph.followees(5)), [1])
+        self.assertEqual(list(graph.followees(42)), [])
+
+    def test_log_shared_between_workers(self):
+        """Изменения одного воркера видны другому через журнал."""
+        first, second = self.load(), self.load()
+        first.follow(2, 1)
+        first.unfollow(1, 3)
+        self.assertTrue(first.is_following(2, 1))
+        self.assertFalse(second.is_following(2, 1))
+        second.refresh()
+        self.assertTrue(second.is_following(2, 1))
+        self.assertFalse(second.is_following(1, 3))
+        self.assertEqual(list(second.followers(1)), [2, 5])
+
+    def test_snapshot_keeps_log_offset(self):
+        """Новый снимок не применяет журнал повторно с начала."""
+        graph = self.load()
+        graph.follow(2, 1)
+        follow_graph.write_snapshot(
+            self.snapshot_path, [(2, 1)], os.path.getsize(self.log_path)
+        )
+        graph = self.load()
+        self.assertEqual(graph.log_offset, os.path.getsize(self.log_path))
+        self.assertTrue(graph.is_following(2, 1))
+        self.assertFalse(graph.is_following(1, 2))
+
+
+class FollowGraphViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.user = User.objects.create_user(username='testAuthorized')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.PROFILE_URL = reverse(
+            'posts:profile', kwargs={'username': cls.author.username}
+        )
+
+    def test_profile_uses_graph(self):
+        """Профиль показывает подписку и счётчики из графа."""
+        client = Client()
+        client.force_login(FollowGraphViewsTests.user)
+        response = client.get(FollowGraphViewsTests.PROFILE_URL)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['followers_count'], 1)
+        self.assertEqual(response.context['followees_count'], 0)
+
+    def test_rebuild_compacts_log(self):
+        """Пересборка снимка из базы очищает журнал."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        paths = (
+            os.path.join(directory, 'graph.snapshot'),
+            os.path.join(directory, 'graph.log'),
+        )
+        with mock.patch.object(
+            follow_graph, 'shared_paths', return_value=paths
+        ):
+            follow_graph.write_snapshot(paths[0], [], 0)
+            graph = follow_graph.load_snapshot(*paths)
+            graph.follow(7, 8)
+            graph.unfollow(7, 8)
+            with self.settings(FOLLOW_GRAPH_COMPACT_BYTES=1):
+                self.assertTrue(follow_graph.needs_compaction())
+            follow_graph.rebuild_snapshot()
+            self.assertEqual(os.path.getsize(paths[1]), 0)
+            graph = follow_graph.load_snapshot(*paths)
+        self.assertTrue(graph.is_following(
+            FollowGraphViewsTests.user.pk, FollowGraphViewsTests.author.pk
+        ))
+        self.assertFalse(graph.is_following(7, 8))
+
+    def test_sync_edge_reads_database(self):
+        """В журнал пишется состояние подписки из базы, а не из сигнала."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        paths = (
+            os.path.join(directory, 'graph.snapshot'),
+            os.path.join(directory, 'graph.log'),
+        )
+        user = FollowGraphViewsTests.user.pk
+        author = FollowGraphViewsTests.author.pk
+        follow_graph.write_snapshot(paths[0], [], 0)
+        graph = follow_graph.load_snapshot(*paths)
+        other = follow_graph.load_snapshot(*paths)
+        graph.follow(author, user)
+        # Отписка закоммичена раньше повторной подписки, а её обработчик
+        # после коммита сработал последним: берётся состояние из базы.
+        graph.sync_edge(user, author)
+        graph.sync_edge(author, user)
+        other.refresh()
+        self.assertTrue(other.is_following(user, author))
+        self.assertFalse(other.is_following(author, user))
+
+    @override_settings(FOLLOW_MAX_IN=0)
+    def test_follow_feed_with_many_authors(self):
+        """Длинный список авторов заменяется подзапросом."""
+        post = Post.objects.create(
+            author=FollowGraphViewsTests.author, text='Тест-пост'
+        )
+        client = Client()
+        client.force_login(FollowGraphViewsTests.user)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user, cls.friend, cls.author, cls.other = (
+            User.objects.create_user(username=f'testUser{number}')
+            for number in range(4)
+        )
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.author)
+        Follow.objects.create(user=cls.other, author=cls.friend)
+        Follow.objects.create(user=cls.other, author=cls.author)
+
+    def test_friends_of_friends_suggested(self):
+        """Рекомендуются авторы друзей и совместных подписчиков,
+        кроме уже отслеживаемых."""
+        suggestions.refresh([SuggestionsTests.user.pk])
+        suggested = [
+            suggestion.author
+            for suggestion in suggestions.for_user(SuggestionsTests.user)
+        ]
+        self.assertEqual(suggested, [SuggestionsTests.author])
+
+    def test_refresh_runs_as_job(self):
+        """Пересчёт ставится задачей, одна на пользователя, пока она
+        ждёт в очереди."""
+        user_id = SuggestionsTests.user.pk
+        jobs.enqueue_once('posts.refresh_suggestions', user_id)
+        jobs.enqueue_once('posts.refresh_suggestions', user_id)
+        self.assertEqual(Job.objects.count(), 1)
+        jobs.work(burst=True)
+        self.assertTrue(suggestions.for_user(SuggestionsTests.user))
+        jobs.enqueue_once('posts.refresh_suggestions', user_id)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    def test_follow_page_shows_suggestions(self):
+        """Лента подписок показывает сохранённые рекомендации."""
+        suggestions.refresh([SuggestionsTests.user.pk])
+        client = Client()
+        client.force_login(SuggestionsTests.user)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertContains(response, SuggestionsTests.author.username)
@@ -2,6 +2,7 @@ import shutil
 import tempfile
 
 from django.conf import settings
+from django.core.cache import cache
 from http import HTTPStatus
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
@@ -176,3 +177,76 @@ class CommentFormTests(TestCase):
         )
         self.assertEqual(Comment.objects.count(), 0)
         self.assertRedirects(comment_response, comment_guest_redirect_url)
+
+
+class GroupChoiceFieldTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тест-группа',
+            slug='test-slug',
+            description='Тест-описание',
+        )
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i}', description='-')
+            for i in range(50)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_form_does_not_render_all_groups(self):
+        """Форма не выводит список всех групп и не читает их из базы."""
+        form = PostForm(initial={'group': GroupChoiceFieldTests.group.pk})
+        form.as_p()
+        with self.assertNumQueries(0):
+            html = form.as_p()
+        self.assertNotIn('<option', html)
+        self.assertIn('Тест-группа', html)
+
+    def test_group_validated_by_slug_and_pk(self):
+        """Группа принимается по slug и pk, неизвестная - ошибка."""
+        group = GroupChoiceFieldTests.group
+        for value in (group.slug, group.pk):
+            with self.subTest(value=value):
+                form = PostForm(data={'text': 'Тест', 'group': value})
+                self.assertTrue(form.is_valid())
+                self.assertEqual(form.cleaned_data['group'], group)
+        for value in ('no-such-group', '²', '٣'):
+            with self.subTest(value=value):
+                form = PostForm(data={'text': 'Тест', 'group': value})
+                self.assertFalse(form.is_valid())
+                self.assertIn('group', form.errors)
+
+    def test_edit_form_round_trip(self):
+        """Отрисованное значение поля группы проходит проверку формы."""
+        group = GroupChoiceFieldTests.group
+        author = User.objects.create_user(username='testAuthor')
+        post = Post.objects.create(author=author, text='Тест', group=group)
+        client = Client()
+        client.force_login(author)
+        url = reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        widget = client.get(url).context['form']['group']
+        self.assertInHTML(
+            f'<input type="hidden" name="group" value="{group.slug}" '
+            f'id="id_group">',
+            str(widget),
+        )
+        response = client.post(url, {'text': 'Правка', 'group': group.slug})
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.group, group)
+
+    def test_numeric_slug_is_slug(self):
+        """Slug из одних цифр находит свою группу, а не группу с таким pk."""
+        group = Group.objects.create(
+            title='Цифры', slug=str(GroupChoiceFieldTests.group.pk)
+        )
+        self.addCleanup(cache.clear)
+        form = PostForm(data={'text': 'Тест', 'group': group.slug})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], group)
@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import group_stats
+from posts.models import Group, GroupStats, Post, User
+
+GROUP_INDEX_URL = reverse('posts:group_index')
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.cats, cls.dogs, cls.empty = (
+            Group.objects.create(
+                title=title, slug=slug, description='Тест-описание'
+            )
+            for title, slug in (
+                ('Кошки', 'cats'), ('Собаки', 'dogs'), ('Пусто', 'empty')
+            )
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Тест-пост {i}', group=cls.cats
+            )
+            for i in range(3)
+        ]
+        Post.objects.create(
+            author=cls.author, text='Тест-пост', group=cls.dogs
+        )
+
+    def stats(self):
+        return {
+            row.group.slug: (row.posts_count, row.posts_week)
+            for row in GroupStats.objects.select_related('group')
+        }
+
+    def test_stats_follow_posts(self):
+        """Статистика меняется при создании, переносе и удалении."""
+        self.assertEqual(
+            self.stats(),
+            {'cats': (3, 3), 'dogs': (1, 1), 'empty': (0, 0)},
+        )
+        post = Post.objects.get(pk=GroupStatsTests.posts[0].pk)
+        post.group = GroupStatsTests.dogs
+        post.save()
+        GroupStatsTests.posts[1].delete()
+        expected = {'cats': (1, 1), 'dogs': (2, 2), 'empty': (0, 0)}
+        self.assertEqual(self.stats(), expected)
+        group_stats.refresh_week()
+        self.assertEqual(self.stats(), expected)
+        group_stats.rebuild()
+        self.assertEqual(self.stats(), expected)
+
+    @override_settings(NUMBER_ROWS=2)
+    def test_directory_page(self):
+        """Каталог не обращается к таблице записей и листается
+        курсором."""
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(GROUP_INDEX_URL)
+        self.assertFalse(
+            any('posts_post' in query['sql'] for query in queries)
+        )
+        first_page = [row.group for row in response.context['rows']]
+        self.assertEqual(
+            first_page, [GroupStatsTests.cats, GroupStatsTests.dogs]
+        )
+        response = Client().get(
+            GROUP_INDEX_URL, {'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(
+            [row.group for row in response.context['rows']],
+            [GroupStatsTests.empty],
+        )
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_cursor_value_checked_against_sort(self):
+        """Курсор, значение которого не подходит к сортировке, - 400."""
+        for sort, value in (
+            ('posts', 'Кошки'), ('posts', {}), ('title', None),
+        ):
+            with self.subTest(sort=sort, value=value):
+                response = Client().get(GROUP_INDEX_URL, {
+                    'sort': sort,
+                    'cursor': group_stats.encode_cursor([value, 1]),
+                })
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import reactions
+from posts.models import Post, PostReactionShard, Reaction, User
+
+
+class ReactionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.reader = User.objects.create_user(username='testReader')
+        cls.post = Post.objects.create(author=cls.author, text='Тест-пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ReactionsTests.reader)
+
+    def test_toggle_is_idempotent(self):
+        """Повторная отметка и повторное снятие не меняют счётчик."""
+        post_id = ReactionsTests.post.pk
+        user_id = ReactionsTests.reader.pk
+        self.assertTrue(reactions.react(user_id, post_id))
+        self.assertFalse(reactions.react(user_id, post_id))
+        self.assertEqual(Reaction.objects.count(), 1)
+        self.assertEqual(reactions.counts([post_id]), {post_id: 1})
+        self.assertTrue(reactions.unreact(user_id, post_id))
+        self.assertFalse(reactions.unreact(user_id, post_id))
+        self.assertEqual(reactions.counts([post_id]), {post_id: 0})
+        cache.clear()
+        self.assertEqual(reactions.counts([post_id]), {post_id: 0})
+
+    def test_page_reactions_in_two_queries(self):
+        """Счётчики и отметки пользователя для страницы - два запроса,
+        а счётчики из кэша - без запросов."""
+        posts = [
+            Post.objects.create(author=ReactionsTests.author, text=str(i))
+            for i in range(3)
+        ]
+        reactions.react(ReactionsTests.reader.pk, posts[1].pk)
+        cache.clear()
+        with self.assertNumQueries(2):
+            reactions.attach(posts, ReactionsTests.reader)
+        self.assertEqual([post.reacted for post in posts],
+                         [False, True, False])
+        self.assertEqual([post.reactions_count for post in posts], [0, 1, 0])
+        with self.assertNumQueries(0):
+            reactions.counts([post.pk for post in posts])
+
+    def test_view_toggles_and_redirects(self):
+        """Форма ставит и снимает отметку и возвращает на страницу."""
+        post = ReactionsTests.post
+        url = reverse('posts:post_react', kwargs={'post_id': post.pk})
+        response = self.client.post(url, {'on': '1', 'next': '/'})
+        self.assertRedirects(response, '/')
+        self.client.post(url, {'on': '1'})
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.context['post'].reactions_count, 1)
+        self.assertTrue(response.context['post'].reacted)
+        response = self.client.post(
+            url, {'on': '0', 'next': 'http://evil.example/'}
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        )
+        self.assertFalse(Reaction.objects.exists())
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_index_shows_new_reaction(self):
+        """Кэш главной не отдаёт отметку в состоянии до переключения."""
+        url = reverse(
+            'posts:post_react', kwargs={'post_id': ReactionsTests.post.pk}
+        )
+        before = self.client.get(reverse('posts:index')).content
+        self.client.post(url, {'on': '1'})
+        after = self.client.get(reverse('posts:index')).content
+        self.assertNotEqual(before, after)
+
+    def test_cascade_delete_decrements(self):
+        """Удаление пользователя уменьшает счётчик отмеченных им записей."""
+        post_id = ReactionsTests.post.pk
+        user = User.objects.create_user(username='leaving')
+        reactions.react(ReactionsTests.reader.pk, post_id)
+        reactions.react(user.pk, post_id)
+        user.delete()
+        self.assertEqual(reactions.counts([post_id]), {post_id: 1})
+        self.assertEqual(
+            sum(PostReactionShard.objects.values_list('count', flat=True)), 1
+        )
+        post = Post.objects.create(author=ReactionsTests.author, text='x')
+        deleted_id = post.pk
+        reactions.react(ReactionsTests.reader.pk, deleted_id)
+        post.delete()
+        self.assertFalse(
+            PostReactionShard.objects.filter(post_id=deleted_id).exists()
+        )
@@ -0,0 +1,58 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import jobs
+from posts import related
+from posts.models import Post, RelatedPost, User
+
+
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Кошки любят молоко и тёплые батареи'
+        )
+        cls.kittens = Post.objects.create(
+            author=cls.author, text='Котята тоже любят молоко'
+        )
+        cls.python = Post.objects.create(
+            author=cls.author, text='Django работает на Python'
+        )
+        jobs.work(burst=True)
+
+    def test_related_updated_on_save(self):
+        """Задача, поставленная при сохранении, находит похожие записи
+        по общим словам."""
+        related_ids = list(
+            RelatedPost.objects.filter(
+                post=RelatedPostsTests.kittens
+            ).values_list('related_id', flat=True)
+        )
+        self.assertEqual(related_ids, [RelatedPostsTests.cats.pk])
+
+    def test_rebuild_in_chunks(self):
+        """Пакетная пересборка находит соседей в обе стороны."""
+        related.rebuild(chunk_size=1)
+        for post, expected in (
+            (RelatedPostsTests.cats, [RelatedPostsTests.kittens.pk]),
+            (RelatedPostsTests.kittens, [RelatedPostsTests.cats.pk]),
+            (RelatedPostsTests.python, []),
+        ):
+            with self.subTest(post=post):
+                self.assertEqual(
+                    [item.related_id for item in related.for_post(post)],
+                    expected,
+                )
+
+    def test_post_detail_shows_related(self):
+        """Страница записи показывает похожие записи."""
+        response = Client().get(reverse(
+            'posts:post_detail',
+            kwargs={'post_id': RelatedPostsTests.kittens.pk}
+        ))
+        self.assertEqual(
+            [item.related for item in response.context['related_posts']],
+            [RelatedPostsTests.cats],
+        )
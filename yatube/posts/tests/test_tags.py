@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostMention, PostTag, User
+
+
+class PostTagsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.reader = User.objects.create_user(username='testReader')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Привет, @testReader и @nobody! #Кошки <b>#django</b>',
+        )
+
+    def test_tags_and_mentions_indexed(self):
+        """Теги нормализуются, упоминания только существующих
+        пользователей."""
+        self.assertEqual(
+            set(PostTag.objects.values_list('tag', flat=True)),
+            {'кошки', 'django'},
+        )
+        self.assertEqual(
+            list(PostMention.objects.values_list('user', flat=True)),
+            [PostTagsTests.reader.pk],
+        )
+
+    def test_edit_reindexes(self):
+        """Редактирование записи перезаписывает теги."""
+        post = Post.objects.get(pk=PostTagsTests.post.pk)
+        post.text = 'Только #новое'
+        post.save()
+        self.assertEqual(
+            list(PostTag.objects.values_list('tag', flat=True)), ['новое']
+        )
+        self.assertFalse(PostMention.objects.exists())
+
+    def test_build_tags_backfills_old_posts(self):
+        """Команда build_tags индексирует записи, сохранённые без тегов."""
+        Post.objects.filter(pk=PostTagsTests.post.pk).update(spans='')
+        PostTag.objects.all().delete()
+        PostMention.objects.all().delete()
+        call_command('build_tags', chunk_size=1, stdout=StringIO())
+        self.assertEqual(PostTag.objects.count(), 2)
+        self.assertEqual(PostMention.objects.count(), 1)
+        self.assertTrue(Post.objects.get(pk=PostTagsTests.post.pk).spans)
+
+    def test_tag_and_mentions_pages(self):
+        """Ленты тега и упоминаний показывают запись со ссылками."""
+        response = Client().get(
+            reverse('posts:tag_posts', kwargs={'name': 'КОШКИ'})
+        )
+        self.assertIn(PostTagsTests.post, response.context['page_obj'])
+        self.assertContains(response, reverse(
+            'posts:profile', kwargs={'username': 'testReader'}
+        ))
+        self.assertContains(response, '&lt;b&gt;')
+        self.assertContains(response, '@nobody')
+        self.assertNotContains(response, reverse(
+            'posts:profile', kwargs={'username': 'nobody'}
+        ))
+        client = Client()
+        client.force_login(PostTagsTests.reader)
+        response = client.get(reverse('posts:mentions_index'))
+        self.assertIn(PostTagsTests.post, response.context['page_obj'])
@@ -0,0 +1,76 @@
+import os
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import view_counts
+from posts.models import Post, PostViewShard, User
+
+
+@override_settings(VIEWS_FLUSH_INTERVAL=3600, VIEWS_FLUSH_THRESHOLD=1000)
+class ViewCountsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.post = Post.objects.create(author=cls.author, text='Тест-пост')
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        view_counts.flush()
+        PostViewShard.objects.all().delete()
+
+    def test_views_buffered_and_merged(self):
+        """Просмотры не пишут в базу сразу, а чтение учитывает дельты."""
+        post_id = ViewCountsTests.post.pk
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                view_counts.record(post_id)
+        self.assertEqual(view_counts.counts([post_id]), {post_id: 3})
+        view_counts.flush()
+        self.assertEqual(view_counts.counts([post_id]), {post_id: 3})
+        other_pid = os.getpid() + 1
+        with mock.patch('os.getpid', return_value=other_pid):
+            view_counts.record(post_id)
+            view_counts.flush()
+        self.assertEqual(PostViewShard.objects.count(), 2)
+        self.assertEqual(view_counts.counts([post_id]), {post_id: 4})
+
+    def test_pending_views_of_other_processes(self):
+        """Ещё не записанные просмотры другого процесса видны из общего
+        кэша."""
+        post_id = ViewCountsTests.post.pk
+        caches['shared'].set(view_counts.PENDING_KEY.format(post_id), 5)
+        self.assertEqual(view_counts.counts([post_id]), {post_id: 5})
+
+    def test_post_detail_counts_views(self):
+        """Страница записи считает и показывает просмотры."""
+        url = reverse(
+            'posts:post_detail', kwargs={'post_id': ViewCountsTests.post.pk}
+        )
+        Client().get(url)
+        response = Client().get(url)
+        self.assertEqual(response.context['post'].views_count, 2)
+        response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'][0].views_count, 2)
+
+    def test_background_flusher(self):
+        """Веб-процесс запускает поток записи один раз и пишет остаток
+        при выходе."""
+        self.addCleanup(view_counts._state.pop, 'background', None)
+        self.addCleanup(view_counts._state.pop, 'pid', None)
+        view_counts.start_flusher()
+        with mock.patch('threading.Thread') as thread, \
+                mock.patch('atexit.register') as register:
+            view_counts.record(ViewCountsTests.post.pk)
+            view_counts.record(ViewCountsTests.post.pk)
+        thread.assert_called_once_with(
+            target=view_counts.flush_periodically,
+            name='view-counts-flusher',
+            daemon=True,
+        )
+        thread.return_value.start.assert_called_once_with()
+        register.assert_called_once_with(view_counts.flush)
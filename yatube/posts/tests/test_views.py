@@ -4,12 +4,14 @@ import tempfile
 from django import forms
 from django.conf import settings
 from http import HTTPStatus
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Group, Post, User, Follow
+from core import events
+from posts import hot, scopes
+from posts.models import Group, Post, PostScore, User, Follow
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -385,3 +387,197 @@ class FollowViewsTests(TestCase):
         )
         self.assertEqual(len(response.context['page_obj']), 0)
         self.assertNotContains(response, FollowViewsTests.post)
+
+
+class PostsSinceTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.group = Group.objects.create(
+            title='Тест-группа',
+            slug='test',
+            description='Тест-описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Большой тест-пост',
+            group=cls.group,
+        )
+        cls.user = User.objects.create_user(username='testAuthorized')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+        cls.SINCE_URLS = [
+            reverse('posts:index_since'),
+            reverse('posts:group_since', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile_since',
+                kwargs={'username': cls.author.username}
+            ),
+            reverse('posts:follow_since'),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostsSinceTests.user)
+
+    def test_since_returns_new_posts(self):
+        """Курсор ?since= отдаёт только более новые записи."""
+        new_post = Post.objects.create(
+            author=PostsSinceTests.author,
+            text='Свежий тест-пост',
+            group=PostsSinceTests.group,
+        )
+        for url in PostsSinceTests.SINCE_URLS:
+            with self.subTest(url=url):
+                data = self.authorized_client.get(
+                    url, {'since': PostsSinceTests.post.pk}
+                ).json()
+                self.assertEqual(data['cursor'], new_post.pk)
+                self.assertEqual(
+                    [post['id'] for post in data['posts']], [new_post.pk]
+                )
+                self.assertIn('Свежий тест-пост', data['posts'][0]['html'])
+
+    @override_settings(DELTA_MAX_POSTS=2)
+    def test_since_pages_through_many_posts(self):
+        """Больше DELTA_MAX_POSTS новых записей отдаются по порядку за
+        несколько запросов, без пропусков."""
+        new_posts = [
+            Post.objects.create(author=PostsSinceTests.author, text=str(i))
+            for i in range(5)
+        ]
+        url = reverse('posts:index_since')
+        cursor, seen = PostsSinceTests.post.pk, []
+        while True:
+            response = self.authorized_client.get(url, {'since': cursor})
+            if response.status_code == HTTPStatus.NO_CONTENT:
+                break
+            data = response.json()
+            seen.extend(post['id'] for post in data['posts'])
+            cursor = data['cursor']
+        self.assertEqual(seen, [post.pk for post in new_posts])
+
+    def test_new_post_resets_mark(self):
+        """Новая запись сбрасывает отметку, и она считается заново."""
+        url = reverse('posts:index_since')
+        self.authorized_client.get(url)
+        key = scopes.HWM_KEY.format(scopes.INDEX)
+        self.assertEqual(
+            caches['shared'].get(key), PostsSinceTests.post.pk
+        )
+        post = Post.objects.create(author=PostsSinceTests.author, text='Н')
+        self.assertIsNone(caches['shared'].get(key))
+        response = self.authorized_client.get(
+            url, {'since': PostsSinceTests.post.pk}
+        )
+        self.assertEqual(response.json()['cursor'], post.pk)
+
+    def test_since_no_changes_without_queries(self):
+        """Без новых записей ответ 204 отдаётся без запросов к базе."""
+        for url in PostsSinceTests.SINCE_URLS:
+            with self.subTest(url=url):
+                cursor = self.authorized_client.get(url).json()['cursor']
+                self.assertEqual(cursor, PostsSinceTests.post.pk)
+                with self.assertNumQueries(0):
+                    response = self.authorized_client.get(
+                        url, {'since': cursor}
+                    )
+                self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+
+
+@override_settings(EVENTS_KEEPALIVE=0.01)
+class PostEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Большой тест-пост',
+        )
+        cls.POST_EVENTS_URL = reverse(
+            'posts:post_events', kwargs={'post_id': cls.post.pk}
+        )
+        cls.COMMENT_URL = reverse(
+            'posts:add_comment', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(PostEventsTests.author)
+
+    def test_comment_pushed_to_stream(self):
+        """Новый комментарий приходит в поток событий записи."""
+        response = Client().get(PostEventsTests.POST_EVENTS_URL)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertTrue(next(stream).startswith(b'retry:'))
+        self.author_client.post(
+            PostEventsTests.COMMENT_URL, {'text': 'Тест-комментарий'}
+        )
+        chunk = next(stream).decode()
+        self.assertTrue(chunk.startswith('event: comment\n'))
+        self.assertIn('testAuthor', chunk)
+        response.close()
+
+    def test_unstarted_stream_releases_slot(self):
+        """Закрытый сервером ответ освобождает подписку, даже если
+        поток не читали."""
+        bus = events.get_bus()
+        before = len(bus.subscriptions)
+        response = Client().get(PostEventsTests.POST_EVENTS_URL)
+        self.assertEqual(len(bus.subscriptions), before + 1)
+        response.close()
+        self.assertEqual(len(bus.subscriptions), before)
+
+
+class HotPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                text=f'Тест-пост {number}',
+            )
+            for number in range(3)
+        ]
+        cls.HOT_URL = reverse('posts:hot_index')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(HotPostsTests.author)
+
+    def test_comments_raise_post(self):
+        """Комментарий поднимает запись в ленте «Популярное»."""
+        oldest = HotPostsTests.posts[0]
+        self.author_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': oldest.pk}),
+            {'text': 'Тест-комментарий'},
+        )
+        response = self.author_client.get(HotPostsTests.HOT_URL)
+        self.assertEqual(response.context['posts'][0], oldest)
+        scores = dict(PostScore.objects.values_list('post_id', 'score'))
+        hot.rescore()
+        for post_id, score in PostScore.objects.values_list(
+            'post_id', 'score'
+        ):
+            self.assertAlmostEqual(scores[post_id], score)
+
+    @override_settings(NUMBER_ROWS=2)
+    def test_cursor_pagination(self):
+        """Курсор проходит по ленте без повторов."""
+        response = self.author_client.get(HotPostsTests.HOT_URL)
+        first_page = response.context['posts']
+        second_page = self.author_client.get(
+            HotPostsTests.HOT_URL,
+            {'cursor': response.context['next_cursor']},
+        ).context['posts']
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(
+            set(first_page + second_page), set(HotPostsTests.posts)
+        )
@@ -1,20 +1,53 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 
 app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
+    path('since/', views.index_since, name='index_since'),
+    path('hot/', views.hot_index, name='hot_index'),
+    path('events/', views.index_events, name='index_events'),
+    path('feed/<str:fmt>/', feeds.IndexFeed(), name='index_feed'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/since/', views.group_since, name='group_since'),
+    path(
+        'group/<slug:slug>/feed/<str:fmt>/',
+        feeds.GroupFeed(),
+        name='group_feed'
+    ),
+    path('tag/<str:name>/', views.tag_posts, name='tag_posts'),
+    path('mentions/', views.mentions_index, name='mentions_index'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/since/',
+        views.profile_since,
+        name='profile_since'
+    ),
+    path(
+        'profile/<str:username>/feed/<str:fmt>/',
+        feeds.AuthorFeed(),
+        name='author_feed'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/events/', views.post_events, name='post_events'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/react/', views.post_react, name='post_react'
+    ),
+    path(
+        'autocomplete/', views.autocomplete_view, name='autocomplete'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/since/', views.follow_since, name='follow_since'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
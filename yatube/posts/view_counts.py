@@ -0,0 +1,158 @@
+"""Счётчики просмотров записей с отложенной записью в базу.
+
+Просмотр увеличивает счётчик в памяти процесса и ожидающую дельту в
+кэше VIEWS_CACHE_ALIAS, общем для всех процессов, без запроса к базе.
+Раз в VIEWS_FLUSH_INTERVAL секунд (или когда накопилось
+VIEWS_FLUSH_THRESHOLD записей) процесс одним UPDATE
+прибавляет свои дельты к строкам PostViewShard и вычитает их из кэша.
+Каждый процесс пишет в свой шард (pid % VIEWS_SHARDS), так что горячая
+запись не упирается в блокировку одной строки. Чтение складывает шарды
+из базы и ещё не записанные дельты из кэша.
+
+Без фонового потока дельты пишет только следующий просмотр, и у
+затихшего процесса они висели бы до остановки. Поэтому wsgi.py вызывает
+start_flusher(): в каждом процессе (в том числе форкнутом после импорта)
+при первом просмотре запускается поток, который раз в интервал
+вызывает flush(), а при выходе процесса остаток пишет atexit.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Case, F, Sum, Value, When
+
+from .models import Post, PostViewShard
+
+PENDING_KEY = 'views-pending:{}'
+
+_pending = Counter()
+_state = {'flushed': time.monotonic()}
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def shared_cache():
+    return caches[settings.VIEWS_CACHE_ALIAS]
+
+
+def start_flusher():
+    """Включает фоновую запись дельт для процессов веб-сервера."""
+    _state['background'] = True
+
+
+def ensure_flusher():
+    """Запускает поток записи дельт, если в этом процессе его ещё нет."""
+    with _lock:
+        if _state.get('pid') == os.getpid():
+            return
+        _state['pid'] = os.getpid()
+    threading.Thread(
+        target=flush_periodically, name='view-counts-flusher', daemon=True
+    ).start()
+    atexit.register(flush)
+
+
+def flush_periodically():
+    while True:
+        time.sleep(settings.VIEWS_FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Не удалось записать просмотры')
+        finally:
+            connection.close()
+
+
+def record(post_id):
+    if _state.get('background'):
+        ensure_flusher()
+    key = PENDING_KEY.format(post_id)
+    cache = shared_cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+    with _lock:
+        _pending[post_id] += 1
+        due = (
+            len(_pending) >= settings.VIEWS_FLUSH_THRESHOLD
+            or time.monotonic() - _state['flushed']
+            > settings.VIEWS_FLUSH_INTERVAL
+        )
+    if due:
+        flush()
+
+
+def flush():
+    """Записывает накопленные процессом дельты одной транзакцией."""
+    with _lock:
+        deltas = dict(_pending)
+        _pending.clear()
+        _state['flushed'] = time.monotonic()
+    if not deltas:
+        return
+    shard = os.getpid() % settings.VIEWS_SHARDS
+    try:
+        with transaction.atomic():
+            rows = PostViewShard.objects.filter(
+                shard=shard, post_id__in=deltas
+            )
+            existing = set(rows.values_list('post_id', flat=True))
+            if existing:
+                rows.filter(post_id__in=existing).update(
+                    count=F('count') + Case(*[
+                        When(post_id=post_id, then=Value(deltas[post_id]))
+                        for post_id in existing
+                    ])
+                )
+            PostViewShard.objects.bulk_create(
+                PostViewShard(
+                    post_id=post_id, shard=shard, count=deltas[post_id]
+                )
+                for post_id in Post.objects.filter(
+                    pk__in=set(deltas) - existing
+                ).values_list('pk', flat=True)
+            )
+    except Exception:
+        with _lock:
+            _pending.update(deltas)
+        raise
+    for post_id, delta in deltas.items():
+        try:
+            shared_cache().decr(PENDING_KEY.format(post_id), delta)
+        except ValueError:
+            pass
+
+
+def counts(post_ids):
+    """Просмотры записей: шарды из базы плюс дельты из кэша."""
+    post_ids = list(post_ids)
+    persisted = dict(
+        PostViewShard.objects.filter(post_id__in=post_ids).values(
+            'post_id'
+        ).annotate(total=Sum('count')).values_list('post_id', 'total')
+    )
+    pending = shared_cache().get_many(
+        [PENDING_KEY.format(pk) for pk in post_ids]
+    )
+    return {
+        pk: persisted.get(pk, 0) + max(
+            pending.get(PENDING_KEY.format(pk), 0), 0
+        )
+        for pk in post_ids
+    }
+
+
+def attach(posts):
+    """Проставляет views_count записям страницы одним запросом."""
+    views = counts(post.pk for post in posts)
+    for post in posts:
+        post.views_count = views[post.pk]
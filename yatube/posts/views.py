@@ -1,8 +1,22 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed,
+    JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.utils.http import is_safe_url
 
+from core import events, jobs, throttle
+from . import (
+    autocomplete, existence, follow_graph, group_stats, hot, reactions,
+    related, scopes, suggestions, tags, view_counts,
+)
 from .forms import CommentForm, PostForm
 from .models import Post, Group, User, Follow
 
@@ -10,20 +24,74 @@ from .models import Post, Group, User, Follow
 def paginator(request, post_list):
     paginator = Paginator(post_list, settings.NUMBER_ROWS)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    page = paginator.get_page(page_number)
+    page.object_list = list(page.object_list)
+    view_counts.attach(page.object_list)
+    reactions.attach(page.object_list, request.user)
+    return page
+
+
+def followed_by(user, values, field='id'):
+    """Условие на авторов из подписок пользователя.
+
+    Короткий список подставляем в IN; длинный SQLite не примет
+    параметрами (не больше 999), тогда берём авторов подзапросом.
+    """
+    if len(values) > settings.FOLLOW_MAX_IN:
+        return Q(author_id__in=Follow.objects.filter(user=user).values(
+            'author_id'
+        ))
+    return Q(**{f'author__{field}__in': list(values)})
 
 
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
+    post_list = Post.objects.visible().select_related('author', 'group')
     context = {
         'page_obj': paginator(request, post_list),
     }
     return render(request, 'posts/index.html', context)
 
 
+def hot_index(request):
+    cursor = request.GET.get('cursor')
+    if cursor:
+        cursor = hot.decode_cursor(cursor)
+        if cursor is None:
+            return HttpResponseBadRequest('Некорректный курсор')
+    posts, next_cursor = hot.page(cursor)
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'hot': True,
+    }
+    return render(request, 'posts/hot.html', context)
+
+
+def group_index(request):
+    sort = request.GET.get('sort', 'posts')
+    if sort not in group_stats.SORTS:
+        sort = 'posts'
+    cursor = request.GET.get('cursor')
+    if cursor:
+        cursor = group_stats.decode_cursor(cursor, sort)
+        if cursor is None:
+            return HttpResponseBadRequest('Некорректный курсор')
+    rows, next_cursor = group_stats.page(
+        sort, cursor, settings.NUMBER_ROWS
+    )
+    context = {
+        'rows': rows,
+        'sort': sort,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/groups.html', context)
+
+
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    if not existence.may_exist('group', slug):
+        raise Http404
+    group = get_object_or_404(Group, slug=slug, hidden=False)
+    post_list = group.posts.visible().select_related('author')
     context = {
         'group': group,
         'page_obj': paginator(request, post_list),
@@ -31,33 +99,72 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def tag_posts(request, name):
+    name = tags.normalize_tag(name)
+    post_list = Post.objects.visible().filter(
+        tags__tag=name
+    ).select_related('author', 'group').order_by('-tags__pub_date')
+    context = {
+        'tag': name,
+        'page_obj': paginator(request, post_list),
+    }
+    return render(request, 'posts/tag_list.html', context)
+
+
+@login_required
+def mentions_index(request):
+    post_list = Post.objects.visible().filter(
+        mentions__user=request.user
+    ).select_related('author', 'group').order_by('-mentions__pub_date')
+    context = {
+        'page_obj': paginator(request, post_list),
+    }
+    return render(request, 'posts/mentions.html', context)
+
+
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group')
+    if not existence.may_exist('user', username):
+        raise Http404
+    author = get_object_or_404(User, username=username, is_active=True)
+    post_list = author.posts.visible().select_related('group')
+    graph = follow_graph.get_graph()
     following = request.user.is_authenticated and (
-        request.user.follower.filter(author=author).exists()
+        graph.is_following(request.user.pk, author.pk)
     )
     context = {
         'author': author,
         'page_obj': paginator(request, post_list),
         'following': following,
+        'followers_count': graph.followers_count(author.pk),
+        'followees_count': graph.followees_count(author.pk),
+        'suggestions': (
+            suggestions.for_user(request.user)
+            if request.user.is_authenticated else ()
+        ),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    if not existence.may_exist('post', post_id):
+        raise Http404
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
+    view_counts.record(post.pk)
+    view_counts.attach([post])
+    reactions.attach([post], request.user)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = post.comments.filter(author__is_active=True)
     context = {
         'post': post,
         'form': form,
         'comments': comments,
+        'related_posts': related.for_post(post),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@throttle.limit_writes('post')
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -67,11 +174,18 @@ def post_create(request):
         return render(request, 'posts/create_post.html', {'form': form})
     post = form.save(commit=False)
     post.author = request.user
+    post.duplicate_of_id = form.duplicate_of
     post.save()
+    if post.image:
+        jobs.enqueue('posts.warm_thumbnail', post.pk)
+    events.publish(
+        'posts', 'post', {'id': post.pk, 'author': post.author.username}
+    )
     return redirect('posts:profile', username=post.author)
 
 
 @login_required
+@throttle.limit_writes('post')
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = PostForm(
@@ -92,36 +206,220 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle.limit_writes('comment')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        hot.record_comment(comment)
+        events.publish(f'post:{post.pk}', 'comment', {
+            'id': comment.pk,
+            'author': comment.author.username,
+            'text': comment.text,
+        })
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+@throttle.limit_writes('reaction')
+def post_react(request, post_id):
+    """Ставит (on=1) или снимает отметку; повтор ничего не меняет."""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    post = get_object_or_404(Post.objects.visible().only('pk'), pk=post_id)
+    reactions.set_reaction(
+        request.user.pk, post.pk, request.POST.get('on') == '1'
+    )
+    # Главная кэширует ленту для каждого читателя вместе с его отметками.
+    cache.delete(
+        make_template_fragment_key('index_page', [request.user.pk])
+    )
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(
+        next_url, allowed_hosts={request.get_host()}
+    ):
+        return redirect(next_url)
+    return redirect('posts:post_detail', post_id=post.pk)
+
+
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    followees = follow_graph.get_graph().followees(request.user.pk)
+    post_list = Post.objects.visible().filter(
+        followed_by(request.user, followees)
+    )
     context = {
         'page_obj': paginator(request, post_list),
+        'suggestions': suggestions.for_user(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@throttle.limit_writes('follow', methods=None)
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User, username=username, is_active=True)
     if request.user != author:
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@throttle.limit_writes('follow', methods=None)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+def posts_since(request, mark, post_list, **card_context):
+    """Записи ленты новее курсора ?since= (id последней записи).
+
+    Если high-water mark ленты не больше курсора, отвечаем 204,
+    не обращаясь к базе. Записи идут от старых к новым; если их больше
+    DELTA_MAX_POSTS, курсором возвращаем id последней отданной, и
+    следующий запрос получит остальные.
+    """
+    since = request.GET.get('since')
+    if since is None:
+        return JsonResponse({'cursor': mark, 'posts': []})
+    try:
+        since = int(since)
+    except ValueError:
+        return HttpResponseBadRequest('since должен быть числом')
+    if mark <= since:
+        return HttpResponse(status=204)
+    posts = list(
+        post_list.filter(pk__gt=since).order_by('pk')[
+            :settings.DELTA_MAX_POSTS
+        ]
+    )
+    if len(posts) == settings.DELTA_MAX_POSTS:
+        mark = posts[-1].pk
+    return JsonResponse({
+        'cursor': mark,
+        'posts': [
+            {
+                'id': post.pk,
+                'html': render_to_string(
+                    'includes/post_card.html',
+                    dict(card_context, post=post),
+                    request,
+                ),
+            }
+            for post in posts
+        ],
+    })
+
+
+def index_since(request):
+    post_list = Post.objects.visible().select_related('author', 'group')
+    mark = scopes.high_water_mark(scopes.INDEX, post_list)
+    return posts_since(
+        request, mark, post_list, show_author=True, show_group=True
+    )
+
+
+def group_since(request, slug):
+    post_list = Post.objects.visible().filter(
+        group__slug=slug
+    ).select_related(
+        'author', 'group'
+    )
+    mark = scopes.high_water_mark(scopes.group_scope(slug), post_list)
+    return posts_since(request, mark, post_list, show_author=True)
+
+
+def profile_since(request, username):
+    post_list = Post.objects.visible().filter(
+        author__username=username
+    ).select_related('author', 'group')
+    mark = scopes.high_water_mark(scopes.author_scope(username), post_list)
+    return posts_since(request, mark, post_list, show_group=True)
+
+
+@login_required
+def follow_since(request):
+    usernames = scopes.following(
+        request.user, User.objects.filter(following__user=request.user)
+    )
+    post_list = Post.objects.visible().filter(
+        followed_by(request.user, usernames, 'username')
+    ).select_related('author', 'group')
+    mark = max(
+        (
+            scopes.high_water_mark(
+                scopes.author_scope(username),
+                Post.objects.visible().filter(author__username=username),
+            )
+            for username in usernames
+        ),
+        default=0,
+    )
+    return posts_since(
+        request, mark, post_list, show_author=True, show_group=True
+    )
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """Освобождает подписку при закрытии ответа сервером, даже если
+    генератор потока так и не был запущен (HEAD, клиент ушёл сразу)."""
+
+    def __init__(self, subscription, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subscription = subscription
+
+    def close(self):
+        self.subscription.close()
+        super().close()
+
+
+def event_response(*channels):
+    """Поток Server-Sent Events по каналам шины событий."""
+    try:
+        subscription = events.get_bus().subscribe(*channels)
+    except events.TooManyConnections:
+        response = HttpResponse(status=503)
+        response['Retry-After'] = settings.EVENTS_RETRY_MS // 1000
+        return response
+    response = EventStreamResponse(
+        subscription,
+        events.event_stream(
+            subscription,
+            settings.EVENTS_KEEPALIVE,
+            settings.EVENTS_MAX_AGE,
+        ),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def index_events(request):
+    return event_response('posts')
+
+
+def post_events(request, post_id):
+    get_object_or_404(Post.objects.visible().only('pk'), pk=post_id)
+    return event_response(f'post:{post_id}')
+
+
+def autocomplete_view(request):
+    """Подсказки по префиксу: ?kind=users|groups|tags&q=..."""
+    kind = request.GET.get('kind')
+    prefix = request.GET.get('q', '').strip()
+    if kind not in autocomplete.LOADERS:
+        return HttpResponseBadRequest('Неизвестный вид подсказок')
+    results = autocomplete.search(
+        kind, prefix, settings.AUTOCOMPLETE_LIMIT
+    ) if prefix else []
+    return JsonResponse({
+        'results': [
+            {'value': value, 'label': label} for value, label in results
+        ],
+    })
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.admin import ScheduledDeletionMixin
+
+User = get_user_model()
+
+
+class YatubeUserAdmin(ScheduledDeletionMixin, UserAdmin):
+    actions = ('delete_in_background',)
+
+
+admin.site.unregister(User)
+admin.site.register(User, YatubeUserAdmin)
@@ -1,4 +1,6 @@
 import os
+import tempfile
+from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -24,11 +26,14 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'analytics.apps.AnalyticsConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,7 +64,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма сначала попадают в таблицу OutboxMessage, а отправляет их
+# фоновая задача через OUTBOX_DELIVERY_BACKEND.
+EMAIL_BACKEND = 'core.mail.OutboxBackend'
+OUTBOX_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DATABASES = {
@@ -100,6 +108,8 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
+AUTHENTICATION_BACKENDS = ['core.auth.CachedModelBackend']
+
 NUMBER_ROWS = 10
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -110,5 +120,166 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Общий для всех процессов сервера кэш сессий и версий пользователей;
+    # при нескольких серверах здесь нужен memcached.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube-shared'),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+COMPRESSION_LEVEL = 6
+COMPRESSION_MIN_LENGTH = 200
+
+API_MAX_PAGE_SIZE = 100
+API_BATCH_SIZE = 100
+
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+
+DELTA_MAX_POSTS = 50
+# High-water mark лент и подписки в общем кэше; срок ограничивает
+# устаревание отметки, посчитанной одновременно с новой записью.
+SCOPES_CACHE_ALIAS = 'shared'
+SCOPE_MARK_TIMEOUT = 60
+
+# memory - только в пределах процесса, sqlite - между процессами.
+EVENTS_BACKEND = 'memory'
+EVENTS_SQLITE_PATH = os.path.join(BASE_DIR, 'events.sqlite3')
+EVENTS_POLL_INTERVAL = 0.5
+EVENTS_RETENTION = 60
+EVENTS_MAX_CONNECTIONS = 100
+EVENTS_QUEUE_SIZE = 50
+EVENTS_KEEPALIVE = 15
+EVENTS_MAX_AGE = 5 * 60
+EVENTS_RETRY_MS = 5000
+
+# Каталог снимка и журнала графа подписок, общих для всех воркеров.
+FOLLOW_GRAPH_DIR = os.path.join(BASE_DIR, 'follow_graph')
+FOLLOW_GRAPH_REFRESH = 1
+# Размер журнала графа, после которого снимок пересобирается задачей.
+FOLLOW_GRAPH_COMPACT_BYTES = 1024 * 1024
+# Больше стольких авторов в IN не подставляем, берём подзапрос.
+FOLLOW_MAX_IN = 500
+
+SUGGESTIONS_TOP_K = 20
+SUGGESTIONS_SHOWN = 5
+SUGGESTIONS_MAX_FANOUT = 200
+SUGGESTIONS_BATCH_SIZE = 500
+
+# Постоянная затухания ленты «Популярное» в секундах.
+HOT_DECAY = 12 * 60 * 60
+HOT_COMMENT_WEIGHT = 3
+HOT_WINDOW = timedelta(days=7)
+
+RELATED_TOP_K = 10
+RELATED_SHOWN = 5
+RELATED_QUERY_TERMS = 10
+RELATED_MAX_POSTINGS = 1000
+# Слова из большей доли записей не используются для поиска похожих.
+RELATED_MAX_DF_RATIO = 0.1
+RELATED_MIN_DF_LIMIT = 100
+
+AUTOCOMPLETE_LIMIT = 10
+# Изменения индексов автодополнения, которые другие процессы применяют
+# по одному; при большем отставании индекс строится заново.
+AUTOCOMPLETE_MAX_REPLAY = 100
+AUTOCOMPLETE_CACHE_ALIAS = 'shared'
+AUTOCOMPLETE_CHANGE_TIMEOUT = 60 * 60
+
+# Сколько строк источника дневных агрегатов обрабатывать за транзакцию.
+ANALYTICS_BATCH_SIZE = 1000
+
+# Поиск почти одинаковых записей: копия при сходстве Жаккара >= порога.
+# DEDUP_ACTION - 'flag' (пометить копию и скрыть её до решения модератора
+# в админке) или 'reject' (не публиковать).
+DEDUP_ACTION = 'flag'
+DEDUP_THRESHOLD = 0.8
+DEDUP_PERMUTATIONS = 64
+DEDUP_BANDS = 16
+DEDUP_MIN_SHINGLES = 5
+DEDUP_MAX_CANDIDATES = 50
+
+# Режим админки записей для больших таблиц: переход по id вместо
+# номеров страниц, кэшированное число строк и поиск по индексу слов.
+ADMIN_HIGH_VOLUME = True
+ADMIN_COUNT_CACHE_TIMEOUT = 5 * 60
+
+# Фоновые массовые действия админки: размер пачки и время, после
+# которого действие без прогресса считается брошенным.
+BULK_CHUNK_SIZE = 200
+BULK_STALE_AFTER = timedelta(minutes=5)
+
+# Очередь фоновых задач (manage.py worker): очереди и сколько задач
+# каждой выполняется одновременно.
+JOBS_QUEUES = {'default': 4, 'images': 2, 'bulk': 1, 'mail': 1}
+JOBS_PROCESSES = 4
+JOBS_POLL_INTERVAL = 1
+JOBS_MAX_ATTEMPTS = 5
+# Задержка перед повтором в секундах; удваивается с каждой попыткой.
+JOBS_BACKOFF = 10
+JOBS_TIMEOUT = timedelta(minutes=10)
+
+OUTBOX_BATCH_SIZE = 50
+# Писем в секунду через одно соединение.
+OUTBOX_RATE_LIMIT = 10
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_BACKOFF = 60
+OUTBOX_TIMEOUT = timedelta(minutes=10)
+
+# Сколько зависимых строк удалять за транзакцию при фоновом удалении
+# пользователей и групп.
+DELETION_BATCH_SIZE = 200
+
+# Счётчики просмотров: как часто процесс пишет накопленное в базу и на
+# сколько строк делится счётчик каждой записи.
+VIEWS_FLUSH_INTERVAL = 5
+VIEWS_FLUSH_THRESHOLD = 500
+VIEWS_SHARDS = 8
+# Ещё не записанные в базу просмотры видны всем процессам.
+VIEWS_CACHE_ALIAS = 'shared'
+
+REACTION_SHARDS = 8
+REACTION_CACHE_TIMEOUT = 5 * 60
+
+# Сессии читаются из кэша, в базу пишутся при создании и не чаще раза в
+# SESSION_PERSIST_INTERVAL секунд; пользователь запроса тоже кэшируется.
+# Оба слоя работают только поверх общего кэша (проверка core.E001).
+SESSION_ENGINE = 'core.sessions'
+SESSION_CACHE_ALIAS = 'shared'
+SESSION_PERSIST_INTERVAL = 5 * 60
+AUTH_USER_CACHE_TIMEOUT = 15 * 60
+
+# Фильтр Блума существующих записей, групп и авторов для быстрого 404.
+EXISTENCE_REBUILD_INTERVAL = 10 * 60
+EXISTENCE_ERROR_RATE = 0.01
+EXISTENCE_MIN_CAPACITY = 10000
+# Новые значения процессы узнают друг от друга через общий кэш; при
+# большем отставании фильтр строится заново.
+EXISTENCE_CACHE_ALIAS = 'shared'
+EXISTENCE_MAX_REPLAY = 100
+EXISTENCE_CHANGE_TIMEOUT = 60 * 60
+NOT_FOUND_CACHE_TIMEOUT = 60 * 60
+
+# Лимиты запросов на запись: (жетонов в ведре, за сколько секунд ведро
+# наполняется). Ведро IP в RATE_LIMIT_IP_FACTOR раз больше ведра
+# пользователя.
+RATE_LIMITS = {
+    'post': (10, 60),
+    'comment': (20, 60),
+    'reaction': (60, 60),
+    'follow': (30, 60),
 }
+RATE_LIMIT_IP_FACTOR = 5
+# Сколько запросов на запись выполняется одновременно во всех процессах.
+WRITE_CONCURRENCY = 8
+WRITE_GATE_TIMEOUT = 60
+WRITE_SHED_RETRY_AFTER = 1
+# Вёдра и места шлюза должны быть видны всем процессам.
+THROTTLE_CACHE_ALIAS = 'shared'
+
+# Как часто процесс прибавляет свои счётчики к таблице Metric.
+METRICS_FLUSH_INTERVAL = 60